@@ -0,0 +1,103 @@
+"""Benchmark dashboard load: four per-log requests vs /api/dashboard/today.
+
+Registers a throwaway user against a running backend, seeds a day of logs,
+then times a dashboard load both ways. The baseline issues the four requests
+the clients used to make (food, water, workout logs and insights), both
+concurrently as ``Promise.all`` does and one after another as a client on a
+single connection would. ``--rtt-ms`` adds a fixed delay per request to
+model a mobile network. Prints p50/p99 per approach:
+
+    python benchmarks/bench_dashboard.py --base-url http://localhost:8001/api --rtt-ms 0 150
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+
+async def get(client: httpx.AsyncClient, path: str, rtt_ms: float):
+    if rtt_ms:
+        await asyncio.sleep(rtt_ms / 1000)
+    response = await client.get(path)
+    response.raise_for_status()
+    return response
+
+
+async def baseline(client: httpx.AsyncClient, date: str, rtt_ms: float):
+    await asyncio.gather(
+        get(client, f"/food/log?date={date}", rtt_ms),
+        get(client, f"/water/log?date={date}", rtt_ms),
+        get(client, f"/workout/log?date={date}", rtt_ms),
+        get(client, "/analytics/insights", rtt_ms),
+    )
+
+
+async def baseline_sequential(client: httpx.AsyncClient, date: str, rtt_ms: float):
+    for path in (f"/food/log?date={date}", f"/water/log?date={date}", f"/workout/log?date={date}",
+                 "/analytics/insights"):
+        await get(client, path, rtt_ms)
+
+
+async def dashboard(client: httpx.AsyncClient, date: str, rtt_ms: float):
+    await get(client, f"/dashboard/today?date={date}", rtt_ms)
+
+
+async def seed(client: httpx.AsyncClient, logs_per_type: int):
+    email = f"bench_{uuid.uuid4().hex[:10]}@example.com"
+    response = await client.post("/auth/register", json={
+        "email": email, "password": "BenchPass123!", "name": "Bench", "current_weight": 80, "goal_weight": 75,
+    })
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['token']}"
+    for i in range(logs_per_type):
+        await client.post("/food/log", json={
+            "food_name": f"Meal {i}", "calories": 450, "protein": 30, "carbs": 50, "fat": 12, "meal_type": "lunch",
+        })
+        await client.post("/water/log", json={"amount_ml": 250})
+        await client.post("/workout/log", json={
+            "exercise_name": "Squat", "sets": 3, "reps": 10, "duration_minutes": 20, "calories_burned": 150,
+        })
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def measure(func, client, date, rtt_ms, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func(client, date, rtt_ms)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), percentile(timings, 99)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8001/api")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--logs", type=int, default=10, help="food, water and workout logs to seed for today")
+    parser.add_argument("--rtt-ms", type=float, nargs="+", default=[0, 150])
+    args = parser.parse_args()
+
+    date = datetime.now(timezone.utc).date().isoformat()
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+        await seed(client, args.logs)
+        for func in (baseline, baseline_sequential, dashboard):
+            await measure(func, client, date, 0, 5)
+
+        print(f"{'rtt':>7} | {'approach':>18} {'p50':>9} {'p99':>9} {'requests':>9}")
+        for rtt_ms in args.rtt_ms:
+            for name, func, requests in (("4 concurrent", baseline, 4), ("4 sequential", baseline_sequential, 4),
+                                         ("/dashboard/today", dashboard, 1)):
+                p50, p99 = await measure(func, client, date, rtt_ms, args.iterations)
+                print(f"{rtt_ms:>5.0f}ms | {name:>18} {p50:>7.1f}ms {p99:>7.1f}ms {requests:>9}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
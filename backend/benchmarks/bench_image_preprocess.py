@@ -0,0 +1,111 @@
+"""Benchmark food photo preprocessing: legacy full decode vs prepare_image.
+
+For each synthetic photo size both pipelines run in a fresh subprocess so
+peak RSS (VmHWM above the post-warm-up RSS) is attributable to one pipeline
+and one size.
+Run from ``backend/``:
+
+    python benchmarks/bench_image_preprocess.py
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+
+from image_pipeline import prepare_image  # noqa: E402
+
+SIZES = {
+    "1MP": (1280, 960),
+    "4MP": (2304, 1728),
+    "12MP": (4032, 3024),
+    "24MP": (6000, 4000),
+}
+
+
+def make_photo(width: int, height: int) -> bytes:
+    """Gradient plus sensor-like noise, encoded like a phone camera JPEG."""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 40)
+    image = Image.merge("RGB", (gradient, noise, Image.blend(gradient, noise, 0.5)))
+    buffered = io.BytesIO()
+    image.save(buffered, format="JPEG", quality=92)
+    return buffered.getvalue()
+
+
+def legacy_prepare(data: bytes) -> bytes:
+    """The original analyze_food pipeline: full decode, no resize."""
+    image = Image.open(io.BytesIO(data))
+    if image.mode == 'RGBA':
+        image = image.convert('RGB')
+    buffered = io.BytesIO()
+    image.save(buffered, format="JPEG", quality=85)
+    return buffered.getvalue()
+
+
+def read_status_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak_rss() -> None:
+    """Reset VmHWM to the current RSS (Linux only; harmless elsewhere)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def run_pipeline(name: str, data: bytes, iterations: int, results):
+    func = legacy_prepare if name == "legacy" else (lambda d: prepare_image(d).jpeg)
+    func(data)  # warm up codecs and allocator
+    baseline_kb = read_status_kb("VmRSS")
+    reset_peak_rss()
+    timings = []
+    output_size = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        output_size = len(func(data))
+        timings.append((time.perf_counter() - start) * 1000)
+    peak_kb = read_status_kb("VmHWM")
+    results.put({
+        "median_ms": statistics.median(timings),
+        "peak_rss_delta_mb": (peak_kb - baseline_kb) / 1024,
+        "output_kb": output_size / 1024,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'size':>5} {'input':>8} | {'pipeline':>8} {'median':>9} {'peak RSS':>10} {'output':>9}")
+    for label, (width, height) in SIZES.items():
+        data = make_photo(width, height)
+        for name in ("legacy", "prepared"):
+            results = ctx.Queue()
+            process = ctx.Process(target=run_pipeline, args=(name, data, args.iterations, results))
+            process.start()
+            result = results.get()
+            process.join()
+            print(
+                f"{label:>5} {len(data) / 1024:>6.0f}KB | {name:>8} {result['median_ms']:>7.1f}ms "
+                f"{result['peak_rss_delta_mb']:>8.1f}MB {result['output_kb']:>7.0f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
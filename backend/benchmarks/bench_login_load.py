@@ -0,0 +1,85 @@
+"""Load test: /health latency during a burst of concurrent logins.
+
+Registers one user against a running backend, then probes ``/health`` at a
+fixed interval while ``--logins`` logins are in flight, and compares the
+probe latencies with an idle baseline. With bcrypt on the event loop the
+probes queue behind every hash; with the hashing pool they should stay flat.
+
+    python benchmarks/bench_login_load.py --base-url http://localhost:8001 --logins 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def probe_health(client: httpx.AsyncClient, interval: float, stop: asyncio.Event):
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str):
+    start = time.perf_counter()
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    return response.status_code, (time.perf_counter() - start) * 1000
+
+
+def describe(label: str, samples):
+    print(f"{label:>22}: n={len(samples):<5} p50={statistics.median(samples):7.1f}ms "
+          f"p99={percentile(samples, 99):7.1f}ms max={max(samples):7.1f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--probe-interval-ms", type=float, default=10)
+    parser.add_argument("--idle-seconds", type=float, default=2)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.logins + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=300, limits=limits) as client:
+        email, password = f"bench_{uuid.uuid4().hex[:10]}@example.com", "BenchPass123!"
+        response = await client.post("/api/auth/register", json={
+            "email": email, "password": password, "name": "Bench", "current_weight": 80, "goal_weight": 75,
+        })
+        response.raise_for_status()
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, args.probe_interval_ms / 1000, stop))
+        await asyncio.sleep(args.idle_seconds)
+        stop.set()
+        idle = await probe
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, args.probe_interval_ms / 1000, stop))
+        start = time.perf_counter()
+        results = await asyncio.gather(*(login(client, email, password) for _ in range(args.logins)))
+        burst_seconds = time.perf_counter() - start
+        stop.set()
+        loaded = await probe
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"{args.logins} logins in {burst_seconds:.1f}s, status codes: {statuses}")
+    describe("login latency", [elapsed for _, elapsed in results])
+    describe("/health idle", idle)
+    describe("/health during logins", loaded)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""Benchmark coach prompts: inline persona text vs a reused prefix.
+
+For each coach, streams the same chat turn three ways and reports the median
+time to first token plus Gemini's reported input and cached token counts:
+
+- ``inline``: the persona text and rules pasted into every prompt (the old way);
+- ``system_instruction``: the prefix attached to a reusable model handle;
+- ``cached_content``: the prefix uploaded once with the CachedContent API.
+  Gemini refuses caches below its minimum size, in which case this row is
+  skipped.
+
+Needs a real ``GOOGLE_API_KEY``. ``--offline`` only prints the estimated
+prefix/dynamic token split per coach. Run from ``backend/``:
+
+    python benchmarks/bench_persona_prefix.py --runs 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for key, value in (("MONGO_URL", "mongodb://localhost:27017"), ("DB_NAME", "bench"), ("JWT_SECRET", "bench"),
+                   ("GOOGLE_API_KEY", "offline")):
+    os.environ.setdefault(key, value)
+
+import google.generativeai as genai  # noqa: E402
+from google.generativeai import caching  # noqa: E402
+
+from chat_memory import estimate_tokens  # noqa: E402
+from llm_gateway import DEFAULT_MODEL  # noqa: E402
+from server import COACH_PREFIXES  # noqa: E402
+
+DYNAMIC_PROMPT = (
+    "SENTIMENT CONTEXT: The user is asking a question. Be thorough and helpful with your answer.\n\n"
+    "USER CONTEXT: User's name: Sam. Current weight: 82kg. Goal weight: 75kg. Fitness goal: fat_loss. \n\n"
+    "CONVERSATION HISTORY:\nUser: I did squats yesterday.\nAssistant: Nice work, how did it feel?\n\n"
+    "User: How many rest days should I take per week?"
+)
+
+
+async def first_token(model: genai.GenerativeModel, contents: str):
+    start = time.perf_counter()
+    ttft = None
+    chunk = None
+    response = await model.generate_content_async(contents, stream=True)
+    async for chunk in response:
+        if ttft is None:
+            ttft = (time.perf_counter() - start) * 1000
+    usage = chunk.usage_metadata
+    return ttft, usage.prompt_token_count, getattr(usage, "cached_content_token_count", 0) or 0
+
+
+async def measure(model, contents, runs):
+    samples = [await first_token(model, contents) for _ in range(runs)]
+    return (statistics.median(s[0] for s in samples), statistics.median(s[1] for s in samples),
+            statistics.median(s[2] for s in samples))
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--offline", action="store_true")
+    args = parser.parse_args()
+
+    if args.offline:
+        print(f"{'coach':>8} | {'prefix tok':>10} {'dynamic tok':>11} {'inline tok':>10}")
+        for persona, prefix in COACH_PREFIXES.items():
+            print(f"{persona:>8} | {estimate_tokens(prefix):>10} {estimate_tokens(DYNAMIC_PROMPT):>11} "
+                  f"{estimate_tokens(prefix + DYNAMIC_PROMPT):>10}")
+        return
+
+    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+    print(f"{'coach':>8} | {'mode':>18} {'ttft p50':>10} {'input tok':>10} {'cached tok':>10}")
+    for persona, prefix in COACH_PREFIXES.items():
+        rows = [
+            ("inline", genai.GenerativeModel(args.model), prefix + "\n\n" + DYNAMIC_PROMPT),
+            ("system_instruction", genai.GenerativeModel(args.model, system_instruction=prefix), DYNAMIC_PROMPT),
+        ]
+        cached = None
+        try:
+            cached = caching.CachedContent.create(model=args.model, system_instruction=prefix,
+                                                  ttl=timedelta(minutes=10))
+            rows.append(("cached_content", genai.GenerativeModel.from_cached_content(cached), DYNAMIC_PROMPT))
+        except Exception as e:
+            print(f"{persona:>8} | {'cached_content':>18} skipped: {str(e)[:80]}")
+        try:
+            for mode, model, contents in rows:
+                ttft, prompt_tokens, cached_tokens = await measure(model, contents, args.runs)
+                print(f"{persona:>8} | {mode:>18} {ttft:>8.0f}ms {prompt_tokens:>10.0f} {cached_tokens:>10.0f}")
+        finally:
+            if cached is not None:
+                cached.delete()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
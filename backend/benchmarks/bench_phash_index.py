@@ -0,0 +1,81 @@
+"""Benchmark near-duplicate lookup in PerceptualHashIndex.
+
+Builds an index of random 64-bit hashes and times lookups for hashes that
+are a few bits away from a stored one (hits) and for unrelated hashes
+(misses). Run from ``backend/``:
+
+    python benchmarks/bench_phash_index.py --size 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_hash import PerceptualHashIndex  # noqa: E402
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def time_queries(index, queries, max_distance):
+    timings = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        if index.search(query, max_distance) is not None:
+            found += 1
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return {
+        "found": found,
+        "mean_us": statistics.fmean(timings),
+        "p50_us": timings[len(timings) // 2],
+        "p99_us": timings[int(len(timings) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--max-distance", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stored = [rng.getrandbits(64) for _ in range(args.size)]
+
+    start = time.perf_counter()
+    index = PerceptualHashIndex()
+    index.extend(stored)
+    build_seconds = time.perf_counter() - start
+
+    near = [flip_bits(rng.choice(stored), rng.randint(0, args.max_distance), rng) for _ in range(args.queries)]
+    far = [rng.getrandbits(64) for _ in range(args.queries)]
+
+    print(f"indexed {len(index):,} hashes in {build_seconds:.1f}s, index memory {index.memory_bytes() / 2**20:.1f} MiB")
+    for label, queries in (("near-duplicate", near), ("unrelated", far)):
+        result = time_queries(index, queries, args.max_distance)
+        print(
+            f"{label:>15}: found {result['found']:>6}/{len(queries)}  "
+            f"mean {result['mean_us']:.1f}us  p50 {result['p50_us']:.1f}us  p99 {result['p99_us']:.1f}us"
+        )
+
+    # Linear scan baseline for comparison, on a sample of queries
+    sample = near[:50]
+    start = time.perf_counter()
+    for query in sample:
+        min(((value ^ query).bit_count() for value in stored))
+    linear_us = (time.perf_counter() - start) / len(sample) * 1e6
+    print(f"{'linear scan':>15}: mean {linear_us:.0f}us per lookup")
+
+
+if __name__ == "__main__":
+    main()
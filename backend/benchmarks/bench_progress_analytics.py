@@ -0,0 +1,147 @@
+"""Benchmark /analytics/progress: Python-side rollup vs Mongo aggregation.
+
+Seeds a scratch database with N food and workout logs for one user spread
+over a year, then times the original approach (fetch every document and sum
+in Python) against a ``$group`` aggregation plus ``count_documents``.
+The route now reads ``daily_summaries`` (bucketed by each user's timezone)
+instead; the aggregation below groups by UTC day and is kept here only as
+the comparison point. Needs a reachable MongoDB; the scratch database is dropped afterwards.
+Run from ``backend/``:
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_progress_analytics.py --rows 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo import ASCENDING, DESCENDING  # noqa: E402
+
+USER_ID = "bench-user"
+SPAN_DAYS = 365
+NUTRITION_FIELDS = ["calories", "protein", "carbs", "fat"]
+
+
+def daily_nutrition_pipeline(user_id: str, since: datetime):
+    """Macros summed per UTC day for one user (benchmark only; not timezone-aware)."""
+    return [
+        {"$match": {"user_id": user_id, "timestamp": {"$gte": since}}},
+        {"$project": {"_id": 0, "timestamp": 1, **{field: 1 for field in NUTRITION_FIELDS}}},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+            **{field: {"$sum": f"${field}"} for field in NUTRITION_FIELDS}
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+async def seed(db, rows: int):
+    await db.food_logs.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
+    await db.workout_logs.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)])
+    now = datetime.now(timezone.utc)
+    rng = random.Random(rows)
+    batch = []
+    for _ in range(rows):
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "user_id": USER_ID,
+            "food_name": "Chicken rice bowl",
+            "calories": rng.uniform(100, 900),
+            "protein": rng.uniform(0, 60),
+            "carbs": rng.uniform(0, 120),
+            "fat": rng.uniform(0, 40),
+            "fiber": rng.uniform(0, 10),
+            "sugar": rng.uniform(0, 30),
+            "meal_type": "lunch",
+            "timestamp": now - timedelta(seconds=rng.uniform(0, SPAN_DAYS * 86400)),
+        })
+        if len(batch) == 10000:
+            await db.food_logs.insert_many(batch)
+            await db.workout_logs.insert_many([{**doc, "exercise_name": "Squat"} for doc in batch])
+            batch = []
+    if batch:
+        await db.food_logs.insert_many(batch)
+        await db.workout_logs.insert_many([{**doc, "exercise_name": "Squat"} for doc in batch])
+
+
+async def legacy(db, since):
+    """The original implementation, including its 10,000-document cap."""
+    food_logs = await db.food_logs.find({"user_id": USER_ID, "timestamp": {"$gte": since}}, {"_id": 0}).to_list(10000)
+    workout_logs = await db.workout_logs.find({"user_id": USER_ID, "timestamp": {"$gte": since}}, {"_id": 0}).to_list(10000)
+    daily = {}
+    for log in food_logs:
+        day = daily.setdefault(log["timestamp"].date().isoformat(), {"calories": 0, "protein": 0, "carbs": 0, "fat": 0})
+        for field in day:
+            day[field] += log[field]
+    return daily, len(workout_logs)
+
+
+async def legacy_uncapped(db, since):
+    """The original approach without the cap, i.e. what correct results would cost."""
+    daily = {}
+    cursor = db.food_logs.find({"user_id": USER_ID, "timestamp": {"$gte": since}}, {"_id": 0})
+    food_logs = await cursor.to_list(None)
+    for log in food_logs:
+        day = daily.setdefault(log["timestamp"].date().isoformat(), {"calories": 0, "protein": 0, "carbs": 0, "fat": 0})
+        for field in day:
+            day[field] += log[field]
+    workouts = await db.workout_logs.find({"user_id": USER_ID, "timestamp": {"$gte": since}}, {"_id": 1}).to_list(None)
+    return daily, len(workouts)
+
+
+async def aggregated(db, since):
+    rows = await db.food_logs.aggregate(daily_nutrition_pipeline(USER_ID, since)).to_list(None)
+    daily = {row["_id"]: {field: row[field] for field in NUTRITION_FIELDS} for row in rows}
+    workouts = await db.workout_logs.count_documents({"user_id": USER_ID, "timestamp": {"$gte": since}})
+    return daily, workouts
+
+
+async def measure(func, db, since, repeats):
+    timings = []
+    peak = 0
+    result = None
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = await func(db, since)
+        timings.append((time.perf_counter() - start) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(timings), peak / 2**20, result
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--days", type=int, default=SPAN_DAYS, help="analytics window, as the ?days= parameter")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"), tz_aware=True)
+    since = datetime.now(timezone.utc) - timedelta(days=args.days)
+    print(f"{'rows':>9} | {'approach':>16} {'median':>10} {'py peak':>9} {'days':>5} {'workouts':>9}")
+    try:
+        for rows in args.rows:
+            db = client[f"fittrack_bench_{uuid.uuid4().hex[:8]}"]
+            try:
+                await seed(db, rows)
+                for name, func in (("legacy (capped)", legacy), ("legacy uncapped", legacy_uncapped), ("aggregation", aggregated)):
+                    median_ms, peak_mb, (daily, workouts) = await measure(func, db, since, args.repeats)
+                    print(f"{rows:>9,} | {name:>16} {median_ms:>8.1f}ms {peak_mb:>7.1f}MB {len(daily):>5} {workouts:>9,}")
+            finally:
+                await client.drop_database(db.name)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
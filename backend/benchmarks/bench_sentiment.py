@@ -0,0 +1,92 @@
+"""Microbenchmark: keyword sentiment on coach-sized replies.
+
+Compares the old substring scan (``kw in text`` for every keyword) with the
+compiled single-pass matcher in ``sentiment.py`` on generated replies of
+about ``--size`` bytes, the length of a typical Gemini coach answer, plus a
+short user message. Also counts replies where the two disagree, which is the
+substring false positives ("how" in "show") the matcher removes.
+
+    python benchmarks/bench_sentiment.py --size 2048 --iterations 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentiment import MOOD_MAP, SENTIMENT_KEYWORDS, analyze_sentiment  # noqa: E402
+
+FILLER = (
+    "Let me show you this week's plan. Keep your core tight through every rep and control the lowering phase. "
+    "Whatever your schedule looks like, consistency beats intensity, so aim for three sessions and one long walk. "
+    "Protein at each meal helps recovery; think eggs, lentils, chicken or Greek yogurt. "
+    "Stretch your hips and hamstrings afterwards, and sleep at least seven hours. "
+    "If something feels sharp rather than tiring, stop and rest that area. "
+    "Great effort so far — you are building strength and the habit matters more than any single workout! "
+    "How are you feeling about adding a fourth day? "
+)
+
+
+def legacy_analyze(text: str):
+    """The pre-compiled-matcher implementation, kept verbatim for comparison."""
+    text_lower = text.lower()
+    scores = {}
+    for sentiment, keywords in SENTIMENT_KEYWORDS.items():
+        score = sum(1 for kw in keywords if kw in text_lower)
+        scores[sentiment] = score
+
+    max_sentiment = max(scores, key=scores.get)
+    if scores[max_sentiment] == 0:
+        max_sentiment = "neutral"
+    total_hits = sum(scores.values())
+    return {
+        "sentiment": max_sentiment,
+        "mood": MOOD_MAP.get(max_sentiment, "idle"),
+        "energy": min(5, max(1, total_hits)),
+        "scores": scores
+    }
+
+
+def make_texts(count: int, size: int, seed: int = 7):
+    rng = random.Random(seed)
+    sentences = [s.strip() + "." for s in FILLER.split(". ") if s.strip()]
+    texts = []
+    for _ in range(count):
+        parts = []
+        while sum(len(p) + 1 for p in parts) < size:
+            parts.append(rng.choice(sentences))
+        texts.append(" ".join(parts)[:size])
+    return texts
+
+
+def run(fn, texts, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(texts[i % len(texts)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=2048)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--texts", type=int, default=50)
+    args = parser.parse_args()
+
+    cases = [
+        ("reply", make_texts(args.texts, args.size)),
+        ("message", ["hey coach, how many rest days should I take? my legs are sore"]),
+    ]
+    print(f"{'input':>8} {'bytes':>6} | {'substring':>10} {'compiled':>10} {'speedup':>8} | {'disagree':>8}")
+    for name, texts in cases:
+        legacy = run(legacy_analyze, texts, args.iterations)
+        compiled = run(analyze_sentiment, texts, args.iterations)
+        disagree = sum(1 for t in texts if legacy_analyze(t)["scores"] != analyze_sentiment(t)["scores"])
+        print(f"{name:>8} {len(texts[0]):>6} | {legacy:>8.1f}us {compiled:>8.1f}us {legacy / compiled:>7.1f}x "
+              f"| {disagree:>3}/{len(texts):<4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Microbenchmark: per-request auth cost with and without the token cache.
+
+Times the work ``verify_token`` does for a request carrying an already-seen
+token: a full ``jwt.decode`` (HS256) versus a ``TokenCache`` hit (SHA-256 of
+the token plus an LRU lookup). ``--tokens`` controls how many distinct live
+tokens are cycled through, to show the cost with a populated cache.
+
+    python benchmarks/bench_token_cache.py --iterations 200000 --tokens 1 1000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+
+from token_cache import TokenCache  # noqa: E402
+
+SECRET = "bench-secret-0123456789abcdef0123456789abcdef"
+
+
+def make_tokens(count: int):
+    exp = datetime.now(timezone.utc) + timedelta(days=7)
+    return [jwt.encode({"user_id": str(uuid.uuid4()), "exp": exp}, SECRET, algorithm="HS256") for _ in range(count)]
+
+
+def uncached(tokens, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        jwt.decode(tokens[i % len(tokens)], SECRET, algorithms=["HS256"])["user_id"]
+    return time.perf_counter() - start
+
+
+def cached(tokens, iterations: int) -> float:
+    cache = TokenCache(max_entries=len(tokens) + 1)
+    for token in tokens:
+        payload = jwt.decode(token, SECRET, algorithms=["HS256"])
+        cache.put(cache.key(token), payload["user_id"], payload["exp"])
+    start = time.perf_counter()
+    for i in range(iterations):
+        key = cache.key(tokens[i % len(tokens)])
+        if cache.is_revoked(key) or cache.get(key) is None:
+            raise RuntimeError("unexpected cache miss")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[1, 1000])
+    args = parser.parse_args()
+
+    print(f"{'tokens':>7} | {'jwt.decode':>12} {'cache hit':>12} {'speedup':>8}")
+    for count in args.tokens:
+        tokens = make_tokens(count)
+        slow = uncached(tokens, args.iterations) / args.iterations * 1e6
+        fast = cached(tokens, args.iterations) / args.iterations * 1e6
+        print(f"{count:>7} | {slow:>9.2f} us {fast:>9.2f} us {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Microbenchmark: workout library queries over a large catalog.
+
+Compares the old request path (filter a list of dicts with comprehensions,
+then validate and encode every result through ``List[WorkoutVideo]`` the way
+FastAPI's ``response_model`` does) with ``WorkoutCatalog.search`` plus
+``render`` on ``--entries`` generated workouts. Also times building the
+catalog, which happens once at startup, and the ETag a 304 costs.
+
+    python benchmarks/bench_workout_library.py --entries 10000 --iterations 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+from pydantic import BaseModel, TypeAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_cache import etag_matches, strong_etag  # noqa: E402
+from workout_library import WorkoutCatalog, load_file  # noqa: E402
+
+MUSCLE_GROUPS = ["full_body", "chest", "legs", "back", "mobility", "abs", "shoulders", "arms"]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+EQUIPMENT = ["none", "dumbbells", "barbell", "mat", "kettlebell", "bands"]
+TITLE_WORDS = ["power", "flow", "blast", "burn", "sculpt", "strength", "stretch", "hiit", "core", "recovery"]
+
+
+class WorkoutVideo(BaseModel):
+    """Mirror of ``server.WorkoutVideo``; importing server needs a database."""
+    id: str
+    title: str
+    description: str
+    duration_minutes: int
+    difficulty: str
+    muscle_group: str
+    equipment: str
+    video_url: str
+    thumbnail_url: str
+
+
+def make_entries(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    base = load_file()
+    entries = []
+    for i in range(count):
+        entry = dict(base[i % len(base)])
+        entry.update(
+            id=str(i + 1),
+            title=" ".join(rng.sample(TITLE_WORDS, 3)).title(),
+            muscle_group=rng.choice(MUSCLE_GROUPS),
+            difficulty=rng.choice(DIFFICULTIES),
+            equipment=rng.choice(EQUIPMENT),
+        )
+        entries.append(entry)
+    return entries
+
+
+def legacy_query(entries, adapter, muscle_group=None, difficulty=None, equipment=None, q=None):
+    filtered = entries
+    if muscle_group:
+        filtered = [v for v in filtered if v["muscle_group"] == muscle_group]
+    if difficulty:
+        filtered = [v for v in filtered if v["difficulty"] == difficulty]
+    if equipment:
+        filtered = [v for v in filtered if v["equipment"] == equipment]
+    if q:
+        q = q.lower()
+        filtered = [v for v in filtered if q in v["title"].lower() or q in v["description"].lower()]
+    return adapter.dump_json(adapter.validate_python(filtered))
+
+
+def catalog_query(catalog, muscle_group=None, difficulty=None, equipment=None, q=None):
+    return catalog.render(catalog.search(q=q, muscle_group=muscle_group, difficulty=difficulty, equipment=equipment))
+
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries)
+    adapter = TypeAdapter(List[WorkoutVideo])
+    start = time.perf_counter()
+    catalog = WorkoutCatalog(WorkoutVideo(**e).model_dump() for e in entries)
+    print(f"built catalog of {len(catalog)} entries in {(time.perf_counter() - start) * 1e3:.0f}ms")
+
+    cases = [
+        ("all", {}),
+        ("muscle", {"muscle_group": "legs"}),
+        ("muscle+level", {"muscle_group": "legs", "difficulty": "beginner"}),
+        ("3 filters", {"muscle_group": "legs", "difficulty": "beginner", "equipment": "mat"}),
+        ("text", {"q": "stretch"}),
+    ]
+    print(f"{'query':>13} {'rows':>6} | {'legacy':>10} {'catalog':>10} {'speedup':>8}")
+    for name, params in cases:
+        rows = len(catalog.search(**params))
+        legacy = timed(lambda: legacy_query(entries, adapter, **params), args.iterations)
+        indexed = timed(lambda: catalog_query(catalog, **params), args.iterations)
+        print(f"{name:>13} {rows:>6} | {legacy:>8.0f}us {indexed:>8.0f}us {legacy / indexed:>7.1f}x")
+
+    query = ("legs", "beginner", None, None, None)
+    etag = strong_etag("workout_library", catalog.version, query)
+    revalidate = timed(lambda: etag_matches(etag, strong_etag("workout_library", catalog.version, query)),
+                       args.iterations * 10)
+    print(f"{'304':>13} {0:>6} | {'':>10} {revalidate:>8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Pluggable result caches shared by the API routes.
+
+Each cache is a :class:`ResultCache` (hit/miss counters plus error isolation)
+wrapping one backend:
+
+- ``memory``: in-process LRU with per-entry TTL, the fastest option but
+  private to one worker.
+- ``mongo``: a MongoDB collection with a TTL index, shared by all workers.
+- ``tiered``: memory in front of mongo; mongo hits are promoted to memory.
+- ``redis``: a Redis server shared by all workers (needs the ``redis``
+  package and ``REDIS_URL``).
+- ``tiered-redis``: memory in front of redis.
+"""
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional
+
+from bson import json_util
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional dependency, only needed for the redis backends
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+# Match the Mongo client's tz_aware=True so cached datetimes look the same from every backend
+REDIS_JSON_OPTIONS = json_util.JSONOptions(tz_aware=True, tzinfo=timezone.utc)
+
+
+class MemoryCache:
+    """Bounded LRU cache whose entries expire after ``ttl_seconds``."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MongoCache:
+    """Cache stored in a MongoDB collection so every worker shares entries.
+
+    Documents look like ``{"_id": key, "value": ..., "expires_at": datetime}``.
+    The TTL index only sweeps about once a minute, so ``get`` also checks
+    ``expires_at`` itself.
+    """
+
+    def __init__(self, collection, ttl_seconds: float = 3600):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def get(self, key: str) -> Optional[Any]:
+        doc = await self.collection.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"value": 1}
+        )
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        await self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "value": value, "expires_at": expires_at},
+            upsert=True
+        )
+
+    async def delete(self, key: str) -> None:
+        await self.collection.delete_one({"_id": key})
+
+
+class RedisCache:
+    """Cache stored in Redis so every worker shares entries.
+
+    Values are serialized with BSON's extended JSON so datetimes round-trip;
+    Redis expires keys itself.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float = 3600, prefix: str = "cache:"):
+        if redis_asyncio is None:
+            raise RuntimeError("The redis cache backend needs the 'redis' package")
+        self.client = redis_asyncio.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return json_util.loads(raw, json_options=REDIS_JSON_OPTIONS) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        await self.client.set(self.prefix + key, json_util.dumps(value, json_options=REDIS_JSON_OPTIONS), px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+
+class TieredCache:
+    """Checks a fast local cache before a shared one."""
+
+    def __init__(self, local: MemoryCache, shared):
+        self.local = local
+        self.shared = shared
+
+    async def ensure_indexes(self) -> None:
+        if hasattr(self.shared, "ensure_indexes"):
+            await self.shared.ensure_indexes()
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.local.get(key)
+        if value is not None:
+            return value
+        value = await self.shared.get(key)
+        if value is not None:
+            await self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        await self.local.set(key, value, ttl_seconds)
+        await self.shared.set(key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await self.local.delete(key)
+        await self.shared.delete(key)
+
+
+def build_cache_backend(kind: str, collection=None, max_entries: int = 1024, ttl_seconds: float = 3600,
+                        redis_url: Optional[str] = None, redis_prefix: str = "cache:"):
+    """Create a backend from a config string (see the module docstring for the kinds)."""
+    kind = (kind or "memory").strip().lower()
+    if kind == "memory":
+        return MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if kind in ("redis", "tiered-redis"):
+        if not redis_url:
+            raise ValueError(f"Cache backend '{kind}' needs REDIS_URL")
+        shared = RedisCache(redis_url, ttl_seconds=ttl_seconds, prefix=redis_prefix)
+        if kind == "redis":
+            return shared
+        return TieredCache(MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds), shared)
+    if collection is None:
+        raise ValueError(f"Cache backend '{kind}' needs a Mongo collection")
+    if kind == "mongo":
+        return MongoCache(collection, ttl_seconds=ttl_seconds)
+    if kind == "tiered":
+        return TieredCache(
+            MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds),
+            MongoCache(collection, ttl_seconds=ttl_seconds)
+        )
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+class ResultCache:
+    """Named cache with hit/miss counters.
+
+    Backend errors are logged and treated as misses so a cache outage never
+    fails the request that is using it.
+    """
+
+    def __init__(self, name: str, backend):
+        self.name = name
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def ensure_indexes(self) -> None:
+        if hasattr(self.backend, "ensure_indexes"):
+            await self.backend.ensure_indexes()
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"{self.name} cache read failed: {str(e)}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        try:
+            await self.backend.set(key, value, ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"{self.name} cache write failed: {str(e)}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.backend.delete(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"{self.name} cache delete failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,269 @@
+"""Bounded conversation memory for the coach chatbot.
+
+The chat prompt used to paste the last 10 ``chat_history`` rows verbatim, so
+its size grew with message length and anything older was dropped outright.
+:class:`ChatMemory` instead builds each prompt from two bounded parts:
+
+- a rolling per-user summary in ``chat_summaries`` covering every message up
+  to ``summarized_until``, capped at ``summary_max_chars``;
+- every message after ``summarized_until``: the newest ones that fit in
+  ``window_tokens``, plus the newest of those that have left the window but
+  are not folded into the summary yet, up to ``overflow_tokens``.
+
+After each turn :meth:`ChatMemory.schedule_update` folds messages that no
+longer fit in the window into the summary with one background LLM call, so
+the reply never waits for it; the call is skipped until a few messages have
+overflowed, so it runs every few turns rather than on each one. Until then
+those messages stay in the prompt. If summaries fall behind (LLM failures)
+or a few messages are very long, the oldest overflow is cut short or left
+out of the prompt, never out of ``chat_history``: ``summarized_until`` does
+not move, so it is still folded once a summary call succeeds. History in the
+prompt is therefore bounded by ``window_tokens + overflow_tokens`` whatever
+the message lengths. The latest exchange is always kept, cut short if it
+alone exceeds the window budget. Token counts are estimated (about four
+characters per token) rather than asking the API, which would cost a round
+trip per turn.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Set
+
+CHAT_WINDOW_TOKENS = int(os.environ.get('CHAT_WINDOW_TOKENS', '800'))
+# Prompt budget for messages that left the window but are not summarized yet
+CHAT_OVERFLOW_TOKENS = int(os.environ.get('CHAT_OVERFLOW_TOKENS', '800'))
+CHAT_SUMMARY_MAX_CHARS = int(os.environ.get('CHAT_SUMMARY_MAX_CHARS', '1600'))
+CHAT_HISTORY_FETCH_LIMIT = int(os.environ.get('CHAT_HISTORY_FETCH_LIMIT', '40'))
+# Wait until this many messages have left the window before paying for a summary call
+CHAT_SUMMARY_MIN_MESSAGES = int(os.environ.get('CHAT_SUMMARY_MIN_MESSAGES', '6'))
+# The latest exchange (user message and reply) stays in the window even past the token budget
+MIN_WINDOW_MESSAGES = 2
+# Marks a message cut short to fit the prompt budget
+TRUNCATION_MARK = "…"
+# Messages the legacy prompt included verbatim, for the before/after comparison
+LEGACY_HISTORY_MESSAGES = 10
+
+SUMMARY_PROMPT = """You maintain the long-term memory of a fitness coach chatting with one user.
+Update the summary below with the new messages. Keep facts that matter for future coaching:
+goals, injuries, preferences, routines, progress, commitments and the user's mood.
+Drop greetings and small talk. Write plain prose, at most {max_words} words.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+
+UPDATED SUMMARY:"""
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def message_tokens(msg: Dict) -> int:
+    """Estimated cost of one formatted message, role label included."""
+    return estimate_tokens(msg["content"]) + 3
+
+
+def fit_messages(messages: List[Dict], budget: int) -> List[Dict]:
+    """The newest ``messages`` that fit in ``budget`` tokens; the oldest kept one may be cut to its tail."""
+    kept = []
+    used = 0
+    for msg in reversed(messages):
+        cost = message_tokens(msg)
+        if used + cost > budget:
+            room = (budget - used - 3) * 4 - len(TRUNCATION_MARK)
+            if room > 0:
+                kept.append({**msg, "content": TRUNCATION_MARK + msg["content"][-room:]})
+            break
+        used += cost
+        kept.append(msg)
+    kept.reverse()
+    return kept
+
+
+def format_messages(messages: List[Dict]) -> str:
+    lines = []
+    for msg in messages:
+        role = "User" if msg["role"] == "user" else "Assistant"
+        lines.append(f"{role}: {msg['content']}\n")
+    return "".join(lines)
+
+
+class ChatContext(NamedTuple):
+    """What the prompt builder needs from memory for one turn."""
+    summary: str
+    history_text: str
+    tokens: int
+    legacy_tokens: int
+
+
+class ChatMemory:
+    """Rolling summary plus a token-budgeted window of recent messages."""
+
+    def __init__(self, db, llm, window_tokens: int = CHAT_WINDOW_TOKENS,
+                 overflow_tokens: int = CHAT_OVERFLOW_TOKENS,
+                 summary_max_chars: int = CHAT_SUMMARY_MAX_CHARS,
+                 fetch_limit: int = CHAT_HISTORY_FETCH_LIMIT,
+                 min_fold_messages: int = CHAT_SUMMARY_MIN_MESSAGES):
+        self.history = db.chat_history
+        self.summaries = db.chat_summaries
+        self.llm = llm
+        self.window_tokens = window_tokens
+        self.overflow_tokens = overflow_tokens
+        self.summary_max_chars = summary_max_chars
+        self.fetch_limit = fetch_limit
+        self.min_fold_messages = min_fold_messages
+        self._tasks: Set[asyncio.Task] = set()
+        self._updating: Set[str] = set()
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.legacy_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.max_legacy_prompt_tokens = 0
+        self.summary_updates = 0
+        self.summary_failures = 0
+
+    async def _recent(self, user_id: str, since: Optional[datetime]) -> List[Dict]:
+        query = {"user_id": user_id}
+        if since is not None:
+            query["timestamp"] = {"$gt": since}
+        messages = await self.history.find(
+            query, {"_id": 0, "role": 1, "content": 1, "timestamp": 1}
+        ).sort("timestamp", -1).limit(self.fetch_limit).to_list(self.fetch_limit)
+        messages.reverse()
+        return messages
+
+    def _window(self, messages: List[Dict]) -> List[Dict]:
+        """The newest suffix of ``messages`` that fits in the token budget, and at least the latest exchange."""
+        used = 0
+        start = len(messages)
+        while start > 0:
+            cost = message_tokens(messages[start - 1])
+            if used + cost > self.window_tokens and len(messages) - start >= MIN_WINDOW_MESSAGES:
+                break
+            used += cost
+            start -= 1
+        return messages[start:]
+
+    async def load(self, user_id: str) -> ChatContext:
+        summary_doc, legacy = await asyncio.gather(
+            self.summaries.find_one({"_id": user_id}),
+            self._recent(user_id, None),
+        )
+        summary = (summary_doc or {}).get("summary", "")
+        summarized_until = (summary_doc or {}).get("summarized_until")
+        # The window plus overflow still waiting to be folded, each within its own budget. Clipping
+        # only shapes this prompt; summarized_until is untouched, so clipped messages are folded later.
+        unsummarized = [m for m in legacy if summarized_until is None or m["timestamp"] > summarized_until]
+        window = self._window(unsummarized)
+        overflow = unsummarized[:len(unsummarized) - len(window)]
+        history_text = format_messages(
+            fit_messages(overflow, self.overflow_tokens) + fit_messages(window, self.window_tokens)
+        )
+        legacy_text = format_messages(legacy[-LEGACY_HISTORY_MESSAGES:])
+        return ChatContext(
+            summary=summary,
+            history_text=history_text,
+            tokens=estimate_tokens(summary) + estimate_tokens(history_text),
+            legacy_tokens=estimate_tokens(legacy_text),
+        )
+
+    def record_prompt(self, prompt: str, context: ChatContext) -> None:
+        """Count this turn's prompt size next to what the legacy prompt would have been."""
+        tokens = estimate_tokens(prompt)
+        legacy = tokens - context.tokens + context.legacy_tokens
+        self.turns += 1
+        self.prompt_tokens += tokens
+        self.legacy_prompt_tokens += legacy
+        self.max_prompt_tokens = max(self.max_prompt_tokens, tokens)
+        self.max_legacy_prompt_tokens = max(self.max_legacy_prompt_tokens, legacy)
+
+    def schedule_update(self, user_id: str) -> None:
+        """Fold overflowing messages into the summary in the background."""
+        if user_id in self._updating:
+            return
+        self._updating.add(user_id)
+        task = asyncio.create_task(self._update(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _update(self, user_id: str) -> None:
+        try:
+            await self.update_summary(user_id)
+        except Exception as e:
+            self.summary_failures += 1
+            logger.warning(f"Chat summary update failed for {user_id}: {str(e)}")
+        finally:
+            self._updating.discard(user_id)
+
+    async def update_summary(self, user_id: str) -> bool:
+        """Summarize unsummarized messages that have left the window; True if it did."""
+        summary_doc = await self.summaries.find_one({"_id": user_id}) or {}
+        summarized_until = summary_doc.get("summarized_until")
+        recent = await self._recent(user_id, summarized_until)
+        if not recent:
+            return False
+        window = self._window(recent)
+
+        query = {"user_id": user_id}
+        timestamp = {}
+        if window:
+            timestamp["$lt"] = window[0]["timestamp"]
+        if summarized_until is not None:
+            timestamp["$gt"] = summarized_until
+        if timestamp:
+            query["timestamp"] = timestamp
+        # Oldest first, a bounded batch per call; a backlog drains over later turns
+        overflow = await self.history.find(
+            query, {"_id": 0, "role": 1, "content": 1, "timestamp": 1}
+        ).sort("timestamp", 1).limit(self.fetch_limit).to_list(self.fetch_limit)
+        if len(overflow) < max(1, self.min_fold_messages):
+            return False
+
+        max_words = self.summary_max_chars // 6
+        summary = await self.llm.generate(SUMMARY_PROMPT.format(
+            max_words=max_words,
+            summary=summary_doc.get("summary") or "(none yet)",
+            messages=format_messages(overflow),
+        ))
+        summary = summary.strip()[:self.summary_max_chars]
+        await self.summaries.update_one(
+            {"_id": user_id},
+            {"$set": {
+                "summary": summary,
+                "summarized_until": overflow[-1]["timestamp"],
+                "updated_at": datetime.now(timezone.utc),
+            }},
+            upsert=True
+        )
+        self.summary_updates += 1
+        return True
+
+    async def clear(self, user_id: str) -> None:
+        await self.summaries.delete_one({"_id": user_id})
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        turns = self.turns or 1
+        return {
+            "turns": self.turns,
+            "avg_prompt_tokens": round(self.prompt_tokens / turns, 1),
+            "avg_legacy_prompt_tokens": round(self.legacy_prompt_tokens / turns, 1),
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "max_legacy_prompt_tokens": self.max_legacy_prompt_tokens,
+            "window_tokens": self.window_tokens,
+            "overflow_tokens": self.overflow_tokens,
+            "summary_updates": self.summary_updates,
+            "summary_failures": self.summary_failures,
+            "pending_updates": len(self._tasks),
+        }
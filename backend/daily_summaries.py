@@ -0,0 +1,236 @@
+"""Per-user daily nutrition, hydration and workout totals.
+
+``daily_summaries`` holds one document per ``(user_id, date)``, where
+``date`` is the user's local day (see ``local_days``). The log
+routes keep it current with atomic ``$inc`` upserts on every create and
+delete, so analytics read one small document per day instead of every raw
+log. A log write and its summary update are separate operations; a crash
+between them leaves drift, which the reconciliation job detects and repairs:
+
+    cd backend && python daily_summaries.py [--user USER_ID] [--fix]
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone, tzinfo
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import certifi
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel
+
+from local_days import DEFAULT_TIMEZONE, days_back, get_zone, local_date, zone_key
+
+logger = logging.getLogger(__name__)
+
+FOOD_FIELDS = ["calories", "protein", "carbs", "fat", "fiber", "sugar"]
+SUMMARY_FIELDS = FOOD_FIELDS + [
+    "food_count", "water_ml", "water_count", "workout_count", "calories_burned", "workout_minutes"
+]
+
+INDEXES = [IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], unique=True, name="user_id_date")]
+
+
+def summary_date(timestamp: datetime, zone: Optional[tzinfo] = None) -> str:
+    """The summary key for a log timestamp: its calendar day in the user's ``zone``."""
+    return local_date(timestamp, zone)
+
+
+def food_increments(log: Dict, sign: int = 1) -> Dict[str, float]:
+    return {
+        **{field: sign * float(log.get(field) or 0) for field in FOOD_FIELDS},
+        "food_count": sign,
+    }
+
+
+def water_increments(log: Dict, sign: int = 1) -> Dict[str, float]:
+    return {"water_ml": sign * float(log.get("amount_ml") or 0), "water_count": sign}
+
+
+def workout_increments(log: Dict, sign: int = 1) -> Dict[str, float]:
+    return {
+        "workout_count": sign,
+        "calories_burned": sign * float(log.get("calories_burned") or 0),
+        "workout_minutes": sign * float(log.get("duration_minutes") or 0),
+    }
+
+
+async def ensure_indexes(db) -> None:
+    await db.daily_summaries.create_indexes(INDEXES)
+
+
+async def apply_increments(db, user_id: str, timestamp: datetime, increments: Dict[str, float],
+                           zone: Optional[tzinfo] = None) -> None:
+    await db.daily_summaries.update_one(
+        {"user_id": user_id, "date": summary_date(timestamp, zone)},
+        {"$inc": increments, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+async def apply_increments_many(db, user_id: str, entries: List[Tuple[datetime, Dict[str, float]]],
+                                zone: Optional[tzinfo] = None) -> None:
+    """Apply several ``(timestamp, increments)`` pairs with one upsert per day."""
+    by_date: Dict[str, Dict[str, float]] = {}
+    for timestamp, increments in entries:
+        day = by_date.setdefault(summary_date(timestamp, zone), {})
+        for field, value in increments.items():
+            day[field] = day.get(field, 0) + value
+    await asyncio.gather(*(
+        db.daily_summaries.update_one(
+            {"user_id": user_id, "date": date},
+            {"$inc": increments, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        for date, increments in by_date.items()
+    ))
+
+
+async def get_summaries(db, user_id: str, start_date: str, end_date: Optional[str] = None) -> List[Dict]:
+    """Summaries for ``start_date <= date <= end_date`` (YYYY-MM-DD), oldest first."""
+    date_filter = {"$gte": start_date}
+    if end_date:
+        date_filter["$lte"] = end_date
+    return await db.daily_summaries.find(
+        {"user_id": user_id, "date": date_filter},
+        {"_id": 0, "user_id": 0, "updated_at": 0}
+    ).sort("date", 1).to_list(None)
+
+
+def local_day_expression(zone_name: str, field: str = "$timestamp") -> Dict:
+    """``$dateToString`` for the local YYYY-MM-DD day of ``field`` in ``zone_name``."""
+    expression = {"format": "%Y-%m-%d", "date": field}
+    if zone_name != DEFAULT_TIMEZONE:
+        # UTC is Mongo's default; leaving it implicit keeps the common case portable
+        expression["timezone"] = zone_name
+    return {"$dateToString": expression}
+
+
+def _rollup_pipeline(match: Dict, sums: Dict[str, object], zone_name: str) -> List[Dict]:
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "date": local_day_expression(zone_name)},
+            **sums
+        }},
+    ]
+
+
+async def _zone_groups(db, user_id: Optional[str]) -> List[Tuple[Dict, str]]:
+    """``(log filter, timezone)`` pairs covering the logs to rebuild, one per zone in use."""
+    if user_id:
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "timezone": 1}) or {}
+        return [({"user_id": user_id}, zone_key(get_zone(user.get("timezone"))))]
+    by_zone: Dict[str, List[str]] = {}
+    async for user in db.users.find({"timezone": {"$nin": [None, DEFAULT_TIMEZONE]}},
+                                    {"_id": 0, "id": 1, "timezone": 1}):
+        by_zone.setdefault(zone_key(get_zone(user["timezone"])), []).append(user["id"])
+    by_zone.pop(DEFAULT_TIMEZONE, None)
+    local_users = [uid for ids in by_zone.values() for uid in ids]
+    groups = [({"user_id": {"$nin": local_users}} if local_users else {}, DEFAULT_TIMEZONE)]
+    groups += [({"user_id": {"$in": ids}}, zone_name) for zone_name, ids in by_zone.items()]
+    return groups
+
+
+async def rebuild_from_logs(db, user_id: Optional[str] = None) -> Dict[Tuple[str, str], Dict[str, float]]:
+    """Recompute every summary from the raw log collections, bucketed by each user's local day."""
+    totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+    rollups = [
+        ("food_logs", {**{field: {"$sum": {"$ifNull": [f"${field}", 0]}} for field in FOOD_FIELDS},
+                       "food_count": {"$sum": 1}}),
+        ("water_logs", {"water_ml": {"$sum": {"$ifNull": ["$amount_ml", 0]}}, "water_count": {"$sum": 1}}),
+        ("workout_logs", {"workout_count": {"$sum": 1},
+                          "calories_burned": {"$sum": {"$ifNull": ["$calories_burned", 0]}},
+                          "workout_minutes": {"$sum": {"$ifNull": ["$duration_minutes", 0]}}}),
+    ]
+    for match, zone_name in await _zone_groups(db, user_id):
+        for collection, sums in rollups:
+            async for row in db[collection].aggregate(_rollup_pipeline(match, sums, zone_name)):
+                key = (row["_id"]["user_id"], row["_id"]["date"])
+                summary = totals.setdefault(key, {field: 0 for field in SUMMARY_FIELDS})
+                for field in sums:
+                    summary[field] = row[field]
+    return totals
+
+
+async def rebuild_user(db, user_id: str) -> None:
+    """Replace a user's summaries with ones rebuilt from logs, e.g. after a timezone change."""
+    totals = await rebuild_from_logs(db, user_id)
+    await db.daily_summaries.delete_many({"user_id": user_id, "date": {"$nin": [date for _, date in totals]}})
+    now = datetime.now(timezone.utc)
+    await asyncio.gather(*(
+        db.daily_summaries.update_one(
+            {"user_id": user_id, "date": date},
+            {"$set": {**summary, "updated_at": now}},
+            upsert=True
+        )
+        for (_, date), summary in totals.items()
+    ))
+
+
+async def reconcile(db, user_id: Optional[str] = None, fix: bool = False, tolerance: float = 1e-6) -> List[Dict]:
+    """Compare stored summaries with raw logs and return every drifted day.
+
+    With ``fix=True`` drifted summaries are overwritten with the rebuilt totals.
+    """
+    expected = await rebuild_from_logs(db, user_id)
+    stored = {}
+    async for doc in db.daily_summaries.find({"user_id": user_id} if user_id else {}, {"_id": 0}):
+        stored[(doc["user_id"], doc["date"])] = doc
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        want = expected.get(key, {field: 0 for field in SUMMARY_FIELDS})
+        have = stored.get(key, {})
+        diffs = {
+            field: {"stored": have.get(field, 0), "expected": want[field]}
+            for field in SUMMARY_FIELDS
+            if abs((have.get(field) or 0) - want[field]) > tolerance
+        }
+        if diffs:
+            drift.append({"user_id": key[0], "date": key[1], "fields": diffs})
+            if fix:
+                await db.daily_summaries.update_one(
+                    {"user_id": key[0], "date": key[1]},
+                    {"$set": {**want, "updated_at": datetime.now(timezone.utc)}},
+                    upsert=True
+                )
+    return drift
+
+
+def week_start(today: Optional[datetime] = None, days: int = 7, zone: Optional[tzinfo] = None) -> str:
+    """First date of the ``days``-day window ending today in ``zone``."""
+    return days_back(days, zone, today).isoformat()
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Reconcile daily_summaries against raw logs")
+    parser.add_argument("--user", help="Only reconcile this user_id")
+    parser.add_argument("--fix", action="store_true", help="Overwrite drifted summaries")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    mongo_url = os.environ['MONGO_URL']
+    if mongo_url.startswith('mongodb+srv') or 'mongodb.net' in mongo_url:
+        client = AsyncIOMotorClient(mongo_url, tz_aware=True, tlsCAFile=certifi.where())
+    else:
+        client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_indexes(db)
+        drift = await reconcile(db, user_id=args.user, fix=args.fix)
+        for entry in drift:
+            logger.warning(f"Drift for {entry['user_id']} on {entry['date']}: {entry['fields']}")
+        action = "repaired" if args.fix else "found"
+        logger.info(f"Reconciliation {action} {len(drift)} drifted day(s)")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
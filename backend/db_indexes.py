@@ -0,0 +1,121 @@
+"""MongoDB index bootstrap and query-plan verification.
+
+``ensure_indexes`` runs from the app's ``lifespan`` hook. ``create_indexes``
+is a no-op for indexes that already exist, so it is cheap on every start.
+``verify_query_plans`` explains the canonical query behind each route and
+reports any that would fall back to a collection scan. Set
+``MONGO_VERIFY_QUERY_PLANS=1`` to make startup fail in that case.
+"""
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from daily_summaries import INDEXES as DAILY_SUMMARY_INDEXES
+
+logger = logging.getLogger(__name__)
+
+LOG_COLLECTIONS = ["food_logs", "water_logs", "workout_logs", "weight_logs", "chat_history"]
+SYNC_COLLECTIONS = ["food_logs", "water_logs", "workout_logs", "weight_logs"]
+
+# Offline sync replays are deduplicated on client-generated keys; entries logged
+# through the single-item routes carry no key and are left out of the index.
+IDEMPOTENCY_INDEX = IndexModel(
+    [("user_id", ASCENDING), ("idempotency_key", ASCENDING)],
+    unique=True,
+    partialFilterExpression={"idempotency_key": {"$type": "string"}},
+    name="user_id_idempotency_key"
+)
+
+# Keyset pagination orders log lists by (timestamp, id); see pagination.py
+PAGED_LOG_INDEX = IndexModel(
+    [("user_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)],
+    name="user_id_timestamp_id"
+)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    ],
+    **{collection: [PAGED_LOG_INDEX, IDEMPOTENCY_INDEX] for collection in SYNC_COLLECTIONS},
+    "chat_history": [IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_id_timestamp")],
+    "daily_summaries": DAILY_SUMMARY_INDEXES,
+}
+
+# Indexes made redundant by a wider replacement above; dropped if present
+SUPERSEDED_INDEXES: Dict[str, List[str]] = {
+    collection: ["user_id_timestamp"] for collection in SYNC_COLLECTIONS
+}
+
+
+async def ensure_indexes(db) -> None:
+    """Create every index in ``INDEXES`` and drop superseded ones; failures are logged, not raised."""
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except Exception as e:
+            logger.error(f"Could not create indexes on {collection}: {str(e)}")
+            continue
+        for name in SUPERSEDED_INDEXES.get(collection, []):
+            try:
+                existing = await db[collection].index_information()
+                if name in existing:
+                    await db[collection].drop_index(name)
+                    logger.info(f"Dropped superseded index {name} on {collection}")
+            except Exception as e:
+                logger.warning(f"Could not drop index {name} on {collection}: {str(e)}")
+
+
+def canonical_queries() -> List[Tuple[str, str, Dict, Optional[List[Tuple[str, int]]]]]:
+    """(route, collection, filter, sort) for the query each route issues."""
+    now = datetime.now(timezone.utc)
+    day_range = {"$gte": now - timedelta(days=1), "$lt": now}
+    since = {"$gte": now - timedelta(days=30)}
+    newest_first = [("timestamp", DESCENDING)]
+    page_order = [("timestamp", DESCENDING), ("id", DESCENDING)]
+    user = "explain-probe"
+    return [
+        ("register/login", "users", {"email": "explain-probe@example.com"}, None),
+        ("get_profile", "users", {"id": user}, None),
+        ("get_food_logs", "food_logs", {"user_id": user, "timestamp": day_range}, page_order),
+        ("get_water_logs", "water_logs", {"user_id": user, "timestamp": day_range}, newest_first),
+        ("get_workout_logs", "workout_logs", {"user_id": user, "timestamp": day_range}, page_order),
+        ("get_weight_logs", "weight_logs", {"user_id": user}, page_order),
+        ("get_progress_analytics", "daily_summaries", {"user_id": user, "date": {"$gte": "2024-01-01"}},
+         [("date", ASCENDING)]),
+        ("get_progress_analytics", "weight_logs", {"user_id": user, "timestamp": since}, [("timestamp", ASCENDING)]),
+        ("chat_history", "chat_history", {"user_id": user}, newest_first),
+        ("delete_food_log", "food_logs", {"id": "explain-probe", "user_id": user}, None),
+    ]
+
+
+def plan_stages(plan: Any) -> List[str]:
+    """Collect every ``stage`` name in an explain plan (classic or SBE layout)."""
+    stages = []
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+async def verify_query_plans(db) -> List[str]:
+    """Explain each canonical query; return descriptions of those that COLLSCAN."""
+    problems = []
+    for route, collection, query, sort in canonical_queries():
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages:
+            problems.append(f"{route}: {collection} {query} uses COLLSCAN")
+        else:
+            logger.info(f"Query plan ok for {route} on {collection}: {' <- '.join(stages)}")
+    return problems
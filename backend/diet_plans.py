@@ -0,0 +1,100 @@
+"""Canonical diet plan requests, the key of the shared plan cache.
+
+Every ``/diet/plan`` call used to be a Gemini round trip, even though most
+requests differ only in ways the plan does not depend on: 80.4 vs 79.8 kg,
+"Weight Loss" vs "fat_loss", "vegan, Gluten free" vs "gluten-free,vegan".
+:func:`canonical_plan_request` buckets a request before anything else sees
+it:
+
+- weights are rounded to the nearest kg, halves up (80.5 and 81.5 both
+  round up, unlike Python's ``round``);
+- goals and activity levels are slugged and mapped to the values the
+  clients offer (``fat_loss``, ``moderate``, ...); unknown values are kept
+  as their slug;
+- dietary preferences are split on commas, semicolons and slashes,
+  lowercased, de-duplicated and sorted.
+
+The prompt is built from the canonical request, so a cached plan is exactly
+the plan any request with the same key would have received.
+"""
+import hashlib
+import json
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Optional
+
+# Bump when the prompt or post-processing changes, so old plans are not served
+PLAN_CACHE_VERSION = 1
+
+GOAL_ALIASES = {
+    "weight_loss": "fat_loss",
+    "lose_weight": "fat_loss",
+    "cut": "fat_loss",
+    "cutting": "fat_loss",
+    "gain_muscle": "muscle_gain",
+    "bulk": "muscle_gain",
+    "bulking": "muscle_gain",
+    "maintain": "maintenance",
+    "maintain_weight": "maintenance",
+    "athletic": "athlete",
+    "athlete_mode": "athlete",
+}
+
+ACTIVITY_ALIASES = {
+    "lightly_active": "light",
+    "moderately_active": "moderate",
+    "very": "very_active",
+    "extra_active": "very_active",
+    "extremely_active": "very_active",
+    "high": "very_active",
+    "low": "sedentary",
+    "none": "sedentary",
+}
+
+PREFERENCE_SEPARATORS = re.compile(r"[,;/\n]+")
+SLUG_SEPARATORS = re.compile(r"[\s\-]+")
+
+
+def slug(value: str) -> str:
+    return SLUG_SEPARATORS.sub("_", value.strip().lower()).strip("_")
+
+
+def round_kg(weight: float) -> int:
+    """``weight`` to the nearest whole kg, .5 always rounding up."""
+    return int(Decimal(str(weight)).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def normalize_goal(goal: str) -> str:
+    goal = slug(goal)
+    return GOAL_ALIASES.get(goal, goal)
+
+
+def normalize_activity(activity_level: str) -> str:
+    activity = slug(activity_level)
+    return ACTIVITY_ALIASES.get(activity, activity)
+
+
+def normalize_preferences(preferences: Optional[str]) -> Optional[str]:
+    """Sorted, de-duplicated, comma-separated preferences; None if there are none."""
+    items = {
+        " ".join(item.lower().replace("-", " ").split())
+        for item in PREFERENCE_SEPARATORS.split(preferences or "")
+    }
+    items.discard("")
+    return ", ".join(sorted(items)) or None
+
+
+def canonical_plan_request(goal: str, current_weight: float, goal_weight: float, activity_level: str,
+                           dietary_preferences: Optional[str] = None) -> Dict:
+    return {
+        "goal": normalize_goal(goal),
+        "current_weight": round_kg(current_weight),
+        "goal_weight": round_kg(goal_weight),
+        "activity_level": normalize_activity(activity_level),
+        "dietary_preferences": normalize_preferences(dietary_preferences),
+    }
+
+
+def plan_cache_key(canonical: Dict) -> str:
+    raw = json.dumps([PLAN_CACHE_VERSION, canonical], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
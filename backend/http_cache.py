@@ -0,0 +1,120 @@
+"""Conditional GETs for read-mostly routes.
+
+``/chatbot/coaches``, ``/workout/library``, ``/profile`` and
+``/chatbot/persona`` rarely change, but the web and mobile clients fetch
+them on every screen mount. :class:`ConditionalGetMiddleware` gives their
+responses an ETag and answers a matching ``If-None-Match`` with a 304
+before the route runs, so a revalidation costs no query and no body.
+
+The tags are weak (``W/"..."``): the middleware sits inside GZip, so the
+gzip and identity encodings of a response carry the same tag, and a strong
+tag would promise byte-identical bodies. ``If-None-Match`` uses the weak
+comparison anyway.
+
+ETags come from version numbers, never from hashing response bodies. Each
+route registers a validator on :class:`ConditionalGets` that builds the tag
+from what the response depends on:
+
+- static data (coaches, the workout catalog) uses a content hash computed
+  once when the data is loaded;
+- per-user data uses the ``cache_version`` counter on the user's document,
+  which every profile write increments, plus the user id, so one device
+  signed into two accounts never revalidates one user's copy with the
+  other's tag.
+
+A validator returning None (e.g. no valid token) leaves the request to the
+route untouched. Only 200 responses are tagged.
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+
+
+@dataclass(frozen=True)
+class Validator:
+    etag: str
+    cache_control: str
+
+
+ValidatorFn = Callable[[Request], Awaitable[Optional[Validator]]]
+
+
+def weak_etag(*parts: object) -> str:
+    """Weak ETag derived from ``parts`` (resource name, versions, query)."""
+    digest = hashlib.sha256("|".join(repr(part) for part in parts).encode()).hexdigest()[:16]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header value names ``etag``, by weak comparison."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return opaque in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+class ConditionalGets:
+    """Validators by request path, plus revalidation counters for ``/metrics``."""
+
+    def __init__(self):
+        self.validators: Dict[str, ValidatorFn] = {}
+        self.tagged = 0
+        self.not_modified = 0
+
+    def validator(self, path: str) -> Callable[[ValidatorFn], ValidatorFn]:
+        """Decorator registering the validator for GETs of ``path``."""
+        def register(fn: ValidatorFn) -> ValidatorFn:
+            self.validators[path] = fn
+            return fn
+        return register
+
+    def stats(self) -> Dict:
+        return {
+            "paths": len(self.validators),
+            "tagged": self.tagged,
+            "not_modified": self.not_modified,
+        }
+
+
+class ConditionalGetMiddleware:
+    """ASGI middleware applying :class:`ConditionalGets` validators.
+
+    Add it before CORS and compression so 304s still carry CORS headers.
+    """
+
+    def __init__(self, app, registry: ConditionalGets):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        fn = None
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            fn = self.registry.validators.get(scope["path"])
+        validator = await fn(Request(scope)) if fn is not None else None
+        if validator is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {"ETag": validator.etag, "Cache-Control": validator.cache_control}
+        if etag_matches(Headers(scope=scope).get("if-none-match"), validator.etag):
+            self.registry.not_modified += 1
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_tagged(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                MutableHeaders(scope=message).update(headers)
+                self.registry.tagged += 1
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
@@ -0,0 +1,224 @@
+"""Perceptual hashing and near-duplicate lookup for food photos.
+
+``dhash`` reduces an image to a 64-bit difference hash that survives
+re-cropping, rescaling and recompression, so two photos of the same plate
+land within a few bits of each other. :class:`PerceptualHashIndex` finds the
+closest stored hash within a Hamming radius using multi-index hashing: the
+64 bits are split into four 16-bit bands, and by the pigeonhole principle any
+hash within distance ``d`` matches at least one band within ``d // 4`` bits,
+so only a handful of buckets are scanned instead of every stored hash.
+
+Flat or smoothly shaded photos carry almost no gradient detail: a solid
+colour and a vertical gradient both hash to 0, so unrelated images would be
+"near duplicates" of each other. Hashes with fewer than
+``MIN_DETAIL_BITS`` set (or clear) bits are therefore never indexed or
+matched; those photos only reuse an analysis through the exact-digest cache.
+"""
+import logging
+import sys
+from array import array
+from datetime import datetime, timezone
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from bson.int64 import Int64
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+BAND_COUNT = 4
+BAND_BITS = HASH_BITS // BAND_COUNT
+BAND_MASK = (1 << BAND_BITS) - 1
+MIN_DETAIL_BITS = 8
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """Return the 64-bit horizontal difference hash of ``image``."""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def has_detail(value: int) -> bool:
+    """Whether a hash has enough set and clear bits to be matched approximately."""
+    ones = value.bit_count()
+    return MIN_DETAIL_BITS <= ones <= HASH_BITS - MIN_DETAIL_BITS
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def to_signed64(value: int) -> int:
+    """Map an unsigned 64-bit hash onto BSON's signed int64 range."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def _flip_masks(radius: int) -> List[int]:
+    masks = [0]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), r):
+            mask = 0
+            for bit in bits:
+                mask |= 1 << bit
+            masks.append(mask)
+    return masks
+
+
+class PerceptualHashIndex:
+    """Compact in-memory index of 64-bit hashes with Hamming-radius search.
+
+    Hashes live in one ``array('Q')`` and each band table maps a 16-bit band
+    value to an ``array('I')`` of positions, so a million hashes cost tens of
+    megabytes rather than a Python object per entry.
+    """
+
+    def __init__(self):
+        self._hashes = array("Q")
+        self._bands: List[Dict[int, array]] = [{} for _ in range(BAND_COUNT)]
+        self._masks: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, value: int) -> bool:
+        """Insert ``value``; returns False when the exact hash is already stored."""
+        if self.search(value, 0) is not None:
+            return False
+        self._append(value)
+        return True
+
+    def extend(self, values) -> None:
+        """Bulk-insert hashes known to be unique, e.g. ``_id`` values from Mongo."""
+        for value in values:
+            self._append(value)
+
+    def _append(self, value: int) -> None:
+        position = len(self._hashes)
+        self._hashes.append(value)
+        for band, table in enumerate(self._bands):
+            key = (value >> (band * BAND_BITS)) & BAND_MASK
+            bucket = table.get(key)
+            if bucket is None:
+                bucket = table[key] = array("I")
+            bucket.append(position)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the hash array and band tables."""
+        total = sys.getsizeof(self._hashes)
+        for table in self._bands:
+            total += sys.getsizeof(table) + sum(sys.getsizeof(bucket) for bucket in table.values())
+        return total
+
+    def search(self, value: int, max_distance: int) -> Optional[Tuple[int, int]]:
+        """Return ``(stored_hash, distance)`` of the closest hash within ``max_distance``."""
+        if max_distance < 0 or not self._hashes:
+            return None
+        masks = self._masks.get(max_distance)
+        if masks is None:
+            masks = self._masks[max_distance] = _flip_masks(max_distance // BAND_COUNT)
+
+        hashes = self._hashes
+        best: Optional[Tuple[int, int]] = None
+        seen = set()
+        for band, table in enumerate(self._bands):
+            key = (value >> (band * BAND_BITS)) & BAND_MASK
+            for mask in masks:
+                bucket = table.get(key ^ mask)
+                if bucket is None:
+                    continue
+                for position in bucket:
+                    if position in seen:
+                        continue
+                    seen.add(position)
+                    candidate = hashes[position]
+                    distance = (candidate ^ value).bit_count()
+                    if distance <= max_distance and (best is None or distance < best[1]):
+                        best = (candidate, distance)
+                        if distance == 0:
+                            return best
+        return best
+
+
+class FoodImageHashStore:
+    """Near-duplicate lookup of prior food analyses by perceptual hash.
+
+    Analyses are persisted in Mongo keyed by the signed hash; the in-memory
+    index only holds the hashes and is rebuilt from the collection on startup.
+    Hashes added by other workers become visible to this one after a restart.
+    Mongo errors are logged and treated as misses.
+    """
+
+    def __init__(self, collection, max_distance: int = 4):
+        self.collection = collection
+        self.max_distance = max_distance
+        self.index = PerceptualHashIndex()
+        self.near_hits = 0
+        self.flat_skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_distance >= 0
+
+    async def load(self, batch_size: int = 10000) -> int:
+        cursor = self.collection.find({}, {"_id": 1}).batch_size(batch_size)
+        index = PerceptualHashIndex()
+        async for doc in cursor:
+            index.extend((from_signed64(doc["_id"]),))
+        # Keep hashes added while loading; swap in the rebuilt index afterwards
+        for value in self.index._hashes:
+            index.add(value)
+        self.index = index
+        logger.info(f"Loaded {len(self.index)} food image hashes")
+        return len(self.index)
+
+    async def find(self, value: int) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        if not has_detail(value):
+            self.flat_skipped += 1
+            return None
+        match = self.index.search(value, self.max_distance)
+        if match is None:
+            return None
+        try:
+            doc = await self.collection.find_one({"_id": Int64(to_signed64(match[0]))}, {"analysis": 1})
+        except Exception as e:
+            logger.warning(f"Food image hash lookup failed: {str(e)}")
+            return None
+        if not doc:
+            return None
+        self.near_hits += 1
+        return doc["analysis"]
+
+    async def add(self, value: int, analysis: Dict) -> None:
+        if not self.enabled or not has_detail(value):
+            return
+        try:
+            await self.collection.replace_one(
+                {"_id": Int64(to_signed64(value))},
+                {"analysis": analysis, "created_at": datetime.now(timezone.utc)},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Could not store food image hash: {str(e)}")
+            return
+        self.index.add(value)
+
+    def stats(self) -> Dict:
+        return {
+            "indexed_hashes": len(self.index),
+            "max_distance": self.max_distance,
+            "near_duplicate_hits": self.near_hits,
+            "flat_hashes_skipped": self.flat_skipped,
+        }
@@ -0,0 +1,137 @@
+"""Upload ingestion and preprocessing for food photos.
+
+Uploads are read in chunks with a hard byte cap, then decoded in a process
+pool straight to the resolution sent to Gemini. The cap bounds what is held
+in memory, not what is received: Starlette has already spooled the whole
+multipart body (to a temporary file past 1 MB) before :func:`read_upload`
+runs, so limit request bodies at the proxy as well. For JPEGs ``Image.draft``
+lets libjpeg scale by 1/2, 1/4 or 1/8 during the DCT, so a 12 MP phone photo
+is never materialised at full size; ``thumbnail`` finishes the resize. The
+worker returns the small JPEG plus its dHash so the event loop never touches
+pixel data.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from PIL import Image, UnidentifiedImageError
+
+from image_hash import dhash
+
+FOOD_UPLOAD_MAX_BYTES = int(os.environ.get('FOOD_UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+FOOD_IMAGE_MAX_SIDE = int(os.environ.get('FOOD_IMAGE_MAX_SIDE', '1024'))
+FOOD_IMAGE_MAX_PIXELS = int(os.environ.get('FOOD_IMAGE_MAX_PIXELS', str(50_000_000)))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+JPEG_QUALITY = 85
+
+
+class ImageTooLargeError(Exception):
+    """Upload exceeds the byte or pixel limit."""
+
+
+class InvalidImageError(Exception):
+    """Upload is not a decodable image."""
+
+
+class PreparedImage(NamedTuple):
+    jpeg: bytes
+    dhash: int
+    width: int
+    height: int
+
+
+async def read_upload(file, max_bytes: int = FOOD_UPLOAD_MAX_BYTES) -> bytes:
+    """Read an ``UploadFile`` in chunks, failing as soon as it passes ``max_bytes``.
+
+    The body is already spooled by then; this caps memory, not bytes received.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise ImageTooLargeError(f"Image exceeds {max_bytes // (1024 * 1024)} MB limit")
+    chunks = []
+    total = 0
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise ImageTooLargeError(f"Image exceeds {max_bytes // (1024 * 1024)} MB limit")
+        chunks.append(chunk)
+    if not chunks:
+        raise InvalidImageError("Uploaded file is empty")
+    return b"".join(chunks)
+
+
+def prepare_image(data: bytes, max_side: int = FOOD_IMAGE_MAX_SIDE,
+                  max_pixels: int = FOOD_IMAGE_MAX_PIXELS) -> PreparedImage:
+    """Decode ``data`` at reduced size and re-encode it as a small RGB JPEG."""
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError:
+        # Pillow refuses headers past twice its own pixel limit before our check can run
+        raise ImageTooLargeError(f"Image exceeds {max_pixels} pixel limit")
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        raise InvalidImageError("Unsupported or corrupt image")
+
+    with image:
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ImageTooLargeError(f"Image has {width * height} pixels, limit is {max_pixels}")
+
+        image.draft("RGB", (max_side, max_side))
+        try:
+            image.thumbnail((max_side, max_side), resample=Image.Resampling.BILINEAR)
+        except (OSError, SyntaxError) as e:
+            raise InvalidImageError(f"Could not decode image: {str(e)}")
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        buffered = io.BytesIO()
+        image.save(buffered, format="JPEG", quality=JPEG_QUALITY)
+        return PreparedImage(buffered.getvalue(), dhash(image), image.width, image.height)
+
+
+def pool_context():
+    """``forkserver`` where available, else ``spawn``.
+
+    The server process runs Motor, anyio and LLM-gateway threads; forking it
+    can copy a lock held by one of them into the worker and deadlock there.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ImagePreprocessor:
+    """Runs :func:`prepare_image` off the event loop.
+
+    Uses a process pool so decoding scales past the GIL; ``max_workers=0``
+    falls back to the default thread pool. Workers never fork the server
+    process (see :func:`pool_context`); call :meth:`start` at startup so the
+    first upload does not wait for the pool.
+    """
+
+    def __init__(self, max_workers: int = IMAGE_WORKERS, max_side: int = FOOD_IMAGE_MAX_SIDE):
+        self.max_workers = max_workers
+        self.max_side = max_side
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self.max_workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=pool_context())
+
+    async def prepare(self, data: bytes) -> PreparedImage:
+        loop = asyncio.get_running_loop()
+        if self.max_workers <= 0:
+            return await loop.run_in_executor(None, prepare_image, data, self.max_side)
+        self.start()
+        return await loop.run_in_executor(self._executor, prepare_image, data, self.max_side)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,175 @@
+"""Shared async gateway for every Gemini call made by the API.
+
+The routes in ``server.py`` used to call ``GenerativeModel.generate_content``
+directly, which is synchronous and blocks the event loop for the whole
+round trip. All LLM traffic now goes through :class:`LLMGateway`, which uses
+the library's native async client, bounds the number of in-flight calls and
+enforces a per-call timeout (cancelling the underlying request when it fires).
+"""
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import google.generativeai as genai
+
+DEFAULT_MODEL = os.environ.get('LLM_MODEL', 'gemini-2.5-flash')
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '32'))
+LLM_TIMEOUT_SECONDS = float(os.environ.get('LLM_TIMEOUT_SECONDS', '60'))
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """Raised when the model call fails or returns no usable text."""
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when a model call exceeds its timeout and is cancelled."""
+
+
+class LLMGateway:
+    """Bounded, timeout-aware access to Gemini for async request handlers."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout_seconds: float = LLM_TIMEOUT_SECONDS):
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._models: Dict[Tuple[str, Optional[str]], genai.GenerativeModel] = {}
+        self._in_flight = 0
+        self._completed = 0
+        self._timeouts = 0
+        self._failures = 0
+        self._prompt_tokens = 0
+        self._cached_tokens = 0
+
+    def get_model(self, model_name: Optional[str] = None,
+                  system_instruction: Optional[str] = None) -> genai.GenerativeModel:
+        """Return a cached model handle so clients are not rebuilt per request."""
+        key = (model_name or self.model_name, system_instruction)
+        model = self._models.get(key)
+        if model is None:
+            model = genai.GenerativeModel(key[0], system_instruction=system_instruction)
+            self._models[key] = model
+        return model
+
+    async def generate(self, contents: Any, *, timeout: Optional[float] = None,
+                       model_name: Optional[str] = None,
+                       system_instruction: Optional[str] = None,
+                       model: Optional[genai.GenerativeModel] = None) -> str:
+        """Run one generation and return the stripped response text.
+
+        Waiting for a free slot counts against ``timeout`` too, so a saturated
+        gateway fails fast instead of queueing requests indefinitely. Pass
+        ``model`` to use a prepared handle (e.g. one bound to cached content).
+        """
+        model = model or self.get_model(model_name, system_instruction)
+        timeout = self.timeout_seconds if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(self._generate(model, contents, timeout), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            logger.warning(f"LLM call to {model.model_name} timed out after {timeout}s")
+            raise LLMTimeoutError(f"LLM call timed out after {timeout:g}s")
+
+    async def _generate(self, model: genai.GenerativeModel, contents: Any, timeout: float) -> str:
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                response = await model.generate_content_async(
+                    contents,
+                    request_options={"timeout": timeout},
+                )
+                self._record_usage(response)
+                text = (response.text or "").strip()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                raise LLMError(str(e)) from e
+            finally:
+                self._in_flight -= 1
+            self._completed += 1
+            return text
+
+    async def stream(self, contents: Any, *, timeout: Optional[float] = None,
+                     model_name: Optional[str] = None,
+                     system_instruction: Optional[str] = None,
+                     model: Optional[genai.GenerativeModel] = None) -> AsyncIterator[str]:
+        """Yield response text chunks as Gemini produces them.
+
+        ``timeout`` bounds the whole stream, including the wait for a slot.
+        Closing the iterator early cancels the underlying request.
+        """
+        model = model or self.get_model(model_name, system_instruction)
+        timeout = self.timeout_seconds if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        async def before_deadline(awaitable):
+            try:
+                return await asyncio.wait_for(awaitable, timeout=max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                self._timeouts += 1
+                logger.warning(f"LLM stream from {model.model_name} timed out after {timeout}s")
+                raise LLMTimeoutError(f"LLM call timed out after {timeout:g}s")
+
+        await before_deadline(self._semaphore.acquire())
+        self._in_flight += 1
+        try:
+            try:
+                response = await before_deadline(model.generate_content_async(
+                    contents,
+                    stream=True,
+                    request_options={"timeout": timeout},
+                ))
+                chunks = response.__aiter__()
+                chunk = None
+                while True:
+                    try:
+                        chunk = await before_deadline(chunks.__anext__())
+                    except StopAsyncIteration:
+                        # Usage totals arrive with the final chunk
+                        self._record_usage(chunk)
+                        break
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. finish metadata) carry nothing to forward
+                        continue
+                    if text:
+                        yield text
+            except (LLMTimeoutError, asyncio.CancelledError, GeneratorExit):
+                raise
+            except Exception as e:
+                self._failures += 1
+                raise LLMError(str(e)) from e
+            self._completed += 1
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    def _record_usage(self, response: Any) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        self._prompt_tokens += getattr(usage, "prompt_token_count", 0) or 0
+        self._cached_tokens += getattr(usage, "cached_content_token_count", 0) or 0
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "timeouts": self._timeouts,
+            "failures": self._failures,
+            "prompt_tokens": self._prompt_tokens,
+            "cached_prompt_tokens": self._cached_tokens,
+        }
+
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,81 @@
+"""Calendar days in each user's own timezone.
+
+Logs are stored with UTC timestamps, but "today", daily totals and every
+date filter mean the user's local day: a 23:00 dinner in UTC+5:30 belongs to
+the day it was eaten, not the next UTC day. Each profile carries an IANA
+``timezone`` (default UTC) and every day boundary is computed here, so
+``daily_summaries`` keys and date-keyed caches are stable per user.
+
+Boundaries are computed from local midnights, so a day that contains a DST
+change is 23 or 25 hours long rather than a fixed 24.
+
+IANA zones come from the system database or the ``tzdata`` package (Windows
+and slim images have no system copy). UTC itself never needs either: it is
+``datetime.timezone.utc``, so a missing database degrades every profile to
+UTC instead of failing the request.
+"""
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+DEFAULT_TIMEZONE = "UTC"
+
+
+def validate_timezone(name: str) -> str:
+    """``name`` if it is a known IANA timezone; ValueError otherwise."""
+    if name == DEFAULT_TIMEZONE:
+        return name
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone: {name}") from e
+    return name
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: Optional[str]) -> tzinfo:
+    """Zone for a stored profile value; missing or unknown names mean UTC."""
+    if not name or name == DEFAULT_TIMEZONE:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def zone_key(zone: tzinfo) -> str:
+    """The IANA name of a zone from :func:`get_zone`."""
+    return getattr(zone, "key", DEFAULT_TIMEZONE)
+
+
+def local_date(timestamp: datetime, zone: Optional[tzinfo] = None) -> str:
+    """The YYYY-MM-DD day ``timestamp`` falls on in ``zone`` (naive means UTC)."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(zone or get_zone(None)).date().isoformat()
+
+
+def local_today(zone: Optional[tzinfo] = None, now: Optional[datetime] = None) -> str:
+    return local_date(now or datetime.now(timezone.utc), zone)
+
+
+def parse_day(value: str, zone: Optional[tzinfo] = None) -> date:
+    """A YYYY-MM-DD day, or the local day of an ISO datetime; ValueError if neither."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(zone or get_zone(None))
+    return parsed.date()
+
+
+def day_bounds(day: date, zone: Optional[tzinfo] = None) -> Tuple[datetime, datetime]:
+    """UTC ``[start, end)`` of the local calendar ``day``."""
+    zone = zone or get_zone(None)
+    start = datetime.combine(day, time(), tzinfo=zone)
+    end = datetime.combine(day + timedelta(days=1), time(), tzinfo=zone)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def days_back(days: int, zone: Optional[tzinfo] = None, now: Optional[datetime] = None) -> date:
+    """First local day of the ``days``-day window ending today."""
+    return date.fromisoformat(local_today(zone, now)) - timedelta(days=days - 1)
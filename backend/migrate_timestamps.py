@@ -0,0 +1,106 @@
+"""Convert ISO-string timestamps to native BSON dates, in place.
+
+Older documents store ``timestamp`` (and ``users.created_at``) as ISO
+strings. The API now writes and queries native dates, so those rows drop out
+of date-range filters until they are converted. Run once after deploying:
+
+    cd backend && python migrate_timestamps.py [--batch-size 1000] [--dry-run]
+
+Each collection is processed in ``_id`` order in batches of ``bulk_write``
+updates. Only documents whose field is still a string are selected, so an
+interrupted run can simply be restarted and picks up where it stopped.
+Offsets are normalized to UTC and naive strings are treated as UTC.
+"""
+import argparse
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import certifi
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+TIMESTAMP_FIELDS = {
+    "food_logs": "timestamp",
+    "water_logs": "timestamp",
+    "workout_logs": "timestamp",
+    "weight_logs": "timestamp",
+    "chat_history": "timestamp",
+    "users": "created_at",
+}
+
+logger = logging.getLogger("migrate_timestamps")
+
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def migrate_collection(collection, field: str, batch_size: int, dry_run: bool) -> dict:
+    counts = {"converted": 0, "unparseable": 0}
+    last_id = None
+    while True:
+        query = {field: {"$type": "string"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(collection.find(query, {field: 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        updates = []
+        for doc in batch:
+            parsed = parse_timestamp(doc[field])
+            if parsed is None:
+                counts["unparseable"] += 1
+                logger.warning(f"{collection.name} {doc['_id']}: cannot parse {field}={doc[field]!r}")
+                continue
+            # Match on the original string so concurrent writes are never overwritten
+            updates.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: parsed}}))
+
+        if updates and not dry_run:
+            result = collection.bulk_write(updates, ordered=False)
+            counts["converted"] += result.modified_count
+        else:
+            counts["converted"] += len(updates)
+        logger.info(f"{collection.name}: {counts['converted']} converted so far")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--collections", nargs="*", choices=sorted(TIMESTAMP_FIELDS), default=sorted(TIMESTAMP_FIELDS))
+    parser.add_argument("--dry-run", action="store_true", help="Count convertible documents without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    mongo_url = os.environ['MONGO_URL']
+    if mongo_url.startswith('mongodb+srv') or 'mongodb.net' in mongo_url:
+        client = MongoClient(mongo_url, tz_aware=True, tlsCAFile=certifi.where())
+    else:
+        client = MongoClient(mongo_url, tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+
+    try:
+        for name in args.collections:
+            counts = migrate_collection(db[name], TIMESTAMP_FIELDS[name], args.batch_size, args.dry_run)
+            logger.info(f"{name}: {counts['converted']} converted, {counts['unparseable']} unparseable")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Keyset pagination over ``(timestamp, id)`` for the log listing routes.
+
+Log lists are ordered newest first by ``timestamp`` with ``id`` as the tie
+breaker. A page cursor encodes the last row's ``(timestamp, id)``; the next
+page starts strictly after it, so each page is an index range scan on
+``(user_id, timestamp, id)`` no matter how deep the client pages, and rows
+inserted meanwhile never shift page boundaries. Cursors are opaque
+URL-safe base64 strings.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+SORT = [("timestamp", -1), ("id", -1)]
+
+
+class InvalidCursorError(ValueError):
+    """The cursor was not produced by :func:`encode_cursor`."""
+
+
+def encode_cursor(doc: Dict) -> str:
+    raw = json.dumps({"t": doc["timestamp"].isoformat(), "i": doc["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), str(data["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def after_cursor(query: Dict, cursor: Optional[str]) -> Dict:
+    """``query`` narrowed to rows that sort after ``cursor``."""
+    if not cursor:
+        return query
+    timestamp, log_id = decode_cursor(cursor)
+    return {
+        "$and": [
+            query,
+            {"$or": [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "id": {"$lt": log_id}},
+            ]},
+        ]
+    }
+
+
+async def fetch_page(collection, query: Dict, limit: int, cursor: Optional[str] = None,
+                     projection: Optional[Dict] = None) -> Tuple[List[Dict], Optional[str]]:
+    """One page of ``limit`` rows plus the cursor for the next page (None on the last)."""
+    docs = await collection.find(
+        after_cursor(query, cursor), {"_id": 0, **(projection or {})}
+    ).sort(SORT).limit(limit + 1).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1])
+
+
+def iterate(collection, query: Dict, cursor: Optional[str] = None, batch_size: int = 500):
+    """Async cursor over every matching row in page order, fetched in batches."""
+    return collection.find(after_cursor(query, cursor), {"_id": 0}).sort(SORT).batch_size(batch_size)
@@ -0,0 +1,117 @@
+"""Password hashing off the event loop.
+
+``bcrypt.hashpw``/``checkpw`` cost hundreds of milliseconds of CPU at the
+default work factor; called inline from an async handler they stall every
+other request on the worker. :class:`PasswordHasher` runs them on a small
+dedicated thread pool (bcrypt releases the GIL while hashing, so threads run
+in parallel), admits at most ``max_workers`` at a time and rejects new work
+once ``max_queue`` callers are already waiting, so a login burst degrades
+into fast 503s instead of an unbounded backlog.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '256'))
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many hash/verify calls are already waiting for a worker."""
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """The cost factor encoded in a ``$2b$12$...`` hash, or None if unparseable."""
+    parts = hashed.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """Bounded bcrypt hashing and verification for async request handlers."""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, max_workers: int = PASSWORD_HASH_WORKERS,
+                 max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._waiting = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(bcrypt.hashpw, password.encode(), bcrypt.gensalt(self.rounds))
+        return hashed.decode()
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return await self._run(bcrypt.checkpw, password.encode(), hashed.encode())
+        except ValueError:
+            logger.warning("Stored password hash is malformed")
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when ``hashed`` was made with a different work factor than configured."""
+        return hash_rounds(hashed) != self.rounds
+
+    async def rehash_if_needed(self, password: str, hashed: str) -> Optional[str]:
+        """A fresh hash at the configured cost, or None when ``hashed`` is current.
+
+        Call only after :meth:`verify` succeeded, since it needs the plaintext.
+        """
+        if not self.needs_rehash(hashed):
+            return None
+        self._rehashed += 1
+        return await self.hash(password)
+
+    async def _run(self, func: Callable, *args):
+        if self.max_queue >= 0 and self._waiting >= self.max_queue and self._semaphore.locked():
+            self._rejected += 1
+            raise PasswordHasherBusyError("Too many password operations in progress")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._active += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._active -= 1
+            self._completed += 1
+            self._semaphore.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict:
+        return {
+            "rounds": self.rounds,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "waiting": self._waiting,
+            "active": self._active,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "rehashed": self._rehashed,
+        }
+
+
+password_hasher = PasswordHasher()
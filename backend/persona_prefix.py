@@ -0,0 +1,101 @@
+"""Per-coach static prompt prefixes, built once and reused for every turn.
+
+Each coach's persona text and fixed response rules used to be re-sent inside
+every chat prompt. :class:`PersonaPrefixCache` turns each prefix into a model
+handle at startup so requests only carry the dynamic part (sentiment, user
+context, history, message):
+
+- ``local`` (default, and the stand-in used by tests): the prefix becomes the
+  model's ``system_instruction``; handles are built once and reused.
+- ``cached_content``: the prefix is uploaded with Gemini's ``CachedContent``
+  API and requests reference it, so its tokens are billed at the cached rate.
+  Gemini rejects caches below a minimum size (about 1k tokens on Flash), so
+  any coach whose prefix is refused falls back to ``local``.
+"""
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from typing import Dict, Optional
+
+import google.generativeai as genai
+from google.generativeai import caching
+
+LLM_PERSONA_CACHE = os.environ.get('LLM_PERSONA_CACHE', 'local').strip().lower()
+LLM_PERSONA_CACHE_TTL_SECONDS = int(os.environ.get('LLM_PERSONA_CACHE_TTL_SECONDS', '3600'))
+
+logger = logging.getLogger(__name__)
+
+
+class PersonaPrefixCache:
+    """Model handles with each persona's static prefix already attached."""
+
+    def __init__(self, gateway, mode: str = LLM_PERSONA_CACHE,
+                 ttl_seconds: int = LLM_PERSONA_CACHE_TTL_SECONDS):
+        if mode not in ("local", "cached_content"):
+            raise ValueError(f"Unknown persona cache mode: {mode}")
+        self.gateway = gateway
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.prefixes: Dict[str, str] = {}
+        self._models: Dict[str, genai.GenerativeModel] = {}
+        self._cached: Dict[str, caching.CachedContent] = {}
+
+    async def warm(self, prefixes: Dict[str, str]) -> None:
+        """Build (or upload) every prefix; call once at startup."""
+        self.prefixes = dict(prefixes)
+        for persona, prefix in self.prefixes.items():
+            self._models[persona] = self.gateway.get_model(system_instruction=prefix)
+            if self.mode == "cached_content":
+                await self._upload(persona, prefix)
+
+    async def _upload(self, persona: str, prefix: str) -> None:
+        try:
+            cached = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=self.gateway.model_name,
+                display_name=f"coach-{persona}",
+                system_instruction=prefix,
+                ttl=timedelta(seconds=self.ttl_seconds),
+            )
+        except Exception as e:
+            logger.warning(f"Could not cache prefix for {persona}, using system_instruction: {str(e)}")
+            return
+        self._cached[persona] = cached
+        self._models[persona] = genai.GenerativeModel.from_cached_content(cached)
+
+    def model_for(self, persona: str) -> Optional[genai.GenerativeModel]:
+        return self._models.get(persona)
+
+    async def keep_alive(self) -> None:
+        """Extend cached-content TTLs before they lapse; runs until cancelled."""
+        while self._cached:
+            await asyncio.sleep(self.ttl_seconds / 2)
+            for persona, cached in list(self._cached.items()):
+                try:
+                    await asyncio.to_thread(cached.update, ttl=timedelta(seconds=self.ttl_seconds))
+                except Exception as e:
+                    logger.warning(f"Could not extend cached prefix for {persona}: {str(e)}")
+                    self._cached.pop(persona, None)
+                    self._models[persona] = self.gateway.get_model(system_instruction=self.prefixes[persona])
+
+    async def close(self) -> None:
+        """Delete uploaded caches so they stop accruing storage charges."""
+        for persona, cached in list(self._cached.items()):
+            try:
+                await asyncio.to_thread(cached.delete)
+            except Exception as e:
+                logger.warning(f"Could not delete cached prefix for {persona}: {str(e)}")
+        self._cached.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "personas": {
+                persona: {
+                    "prefix_chars": len(prefix),
+                    "cached_content": persona in self._cached,
+                }
+                for persona, prefix in self.prefixes.items()
+            },
+        }
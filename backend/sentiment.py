@@ -0,0 +1,203 @@
+"""Keyword sentiment for real-time coach reactions.
+
+:func:`analyze_sentiment` runs on every ``/chatbot/sentiment`` call and
+twice per chat turn (the user's message and the coach's reply). It used to
+test ``kw in text`` for every keyword, which cost keywords x text length and
+matched inside words: "how" fired on "show", "hi" on "this".
+
+The keyword lists are now compiled at import into lookup tables of whole
+words, two-word phrases and symbols, and the text is tokenized once: one
+split on whitespace, punctuation trimmed from token edges, then a single set
+intersection against every class at once. Cost grows with the text alone
+and only whole words match. A class's score is still the number of distinct
+keywords from it that appear.
+
+Each ``chat_history`` message stores its ``sentiment``, ``mood`` and
+``energy`` when it is saved, so replaying history needs no scoring. Messages
+saved before that are filled in lazily when history is read, or all at once:
+
+    cd backend && python sentiment.py [--user USER_ID]
+
+A regex alternation or a pure-Python Aho-Corasick automaton would also be a
+single pass, but in CPython both run per character in the interpreter and
+measured slower than the C substring scans they replace; see
+``benchmarks/bench_sentiment.py``.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import string
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import certifi
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_KEYWORDS = {
+    "positive": ["great", "awesome", "love", "amazing", "happy", "excited", "wonderful",
+                 "fantastic", "good", "excellent", "progress", "achieved", "proud", "strong",
+                 "motivated", "energized", "thanks", "thank", "perfect", "yes", "yeah", "crushed"],
+    "negative": ["tired", "exhausted", "hate", "can't", "quit", "give up", "sore", "pain",
+                 "frustrated", "angry", "disappointed", "failed", "weak", "sad", "depressed",
+                 "unmotivated", "lazy", "bored", "hurt", "injury", "sick", "stressed", "anxious"],
+    "curious": ["how", "what", "why", "when", "should", "could", "explain", "tell me",
+                "help", "advice", "recommend", "suggest", "best", "difference", "?"],
+    "greeting": ["hi", "hello", "hey", "sup", "yo", "morning", "evening", "night",
+                 "what's up", "howdy", "greetings"]
+}
+
+# Animation the 3D coach plays for each sentiment
+MOOD_MAP = {
+    "positive": "celebrating",
+    "negative": "encouraging",
+    "curious": "thinking",
+    "greeting": "waving",
+    "neutral": "idle"
+}
+
+# Trimmed from both ends of each whitespace-separated token; inner apostrophes stay ("can't")
+EDGE_PUNCTUATION = string.punctuation + "‘’“”«»…—–"
+# Separators often written without spaces around them ("great—keep going")
+JOINERS = ("—", "–", "/", "...", "…")
+
+
+def compile_keywords(keywords: Dict[str, List[str]]) -> Dict[str, str]:
+    """``{keyword: sentiment}``, checked at import to be matchable by :func:`match_keywords`.
+
+    A keyword is a word, a two-word phrase, or a bare punctuation symbol ("?").
+    """
+    table = {}
+    for sentiment, words in keywords.items():
+        for keyword in words:
+            keyword = keyword.lower()
+            parts = keyword.split()
+            symbol = all(ch in string.punctuation for ch in keyword)
+            plain = all(part.strip(EDGE_PUNCTUATION) == part for part in parts)
+            if not symbol and not (1 <= len(parts) <= 2 and plain and " ".join(parts) == keyword):
+                raise ValueError(f"Keyword {keyword!r} must be one or two plain words, or a symbol")
+            if keyword in table:
+                raise ValueError(f"Keyword {keyword!r} is listed twice")
+            table[keyword] = sentiment
+    return table
+
+
+KEYWORD_TABLE = compile_keywords(SENTIMENT_KEYWORDS)
+WORDS = frozenset(k for k in KEYWORD_TABLE if " " not in k and k.strip(string.punctuation))
+PHRASES = tuple(k for k in KEYWORD_TABLE if " " in k)
+PHRASE_HEADS = frozenset(k.split()[0] for k in PHRASES)
+SYMBOLS = tuple(k for k in KEYWORD_TABLE if not k.strip(string.punctuation))
+
+
+def match_keywords(text: str) -> Set[str]:
+    """Distinct keywords occurring in ``text`` as whole words or phrases.
+
+    Splitting, de-duplicating and the set intersection run in C; only the
+    distinct tokens are trimmed in Python, and phrases are only looked for
+    when their first word is present.
+    """
+    text = text.lower().replace("’", "'")
+    for joiner in JOINERS:
+        if joiner in text:
+            text = text.replace(joiner, " ")
+    words = {token.strip(EDGE_PUNCTUATION) for token in set(text.split())}
+    hits = words & WORDS
+    hits.update(symbol for symbol in SYMBOLS if symbol in text)
+    if not PHRASE_HEADS.isdisjoint(words):
+        padded = f" {' '.join(token.strip(EDGE_PUNCTUATION) for token in text.split())} "
+        hits.update(phrase for phrase in PHRASES if f" {phrase} " in padded)
+    return hits
+
+
+def analyze_sentiment(text: str) -> Dict:
+    """Fast keyword-based sentiment analysis for real-time coach reactions."""
+    scores = {sentiment: 0 for sentiment in SENTIMENT_KEYWORDS}
+    for keyword in match_keywords(text):
+        scores[KEYWORD_TABLE[keyword]] += 1
+
+    max_sentiment = max(scores, key=scores.get)
+    if scores[max_sentiment] == 0:
+        max_sentiment = "neutral"
+
+    # Determine energy level (1-5)
+    total_hits = sum(scores.values())
+    energy = min(5, max(1, total_hits))
+
+    return {
+        "sentiment": max_sentiment,
+        "mood": MOOD_MAP.get(max_sentiment, "idle"),
+        "energy": energy,
+        "scores": scores
+    }
+
+
+def analyze_many(texts: List[str]) -> List[Dict]:
+    return [analyze_sentiment(text) for text in texts]
+
+
+# Stored on each chat_history message so replays need no re-scoring
+HISTORY_FIELDS = ("sentiment", "mood", "energy")
+
+
+def history_fields(result: Dict) -> Dict:
+    return {field: result[field] for field in HISTORY_FIELDS}
+
+
+def backfill_messages(messages: List[Dict]) -> List[UpdateOne]:
+    """Score messages saved without a mood, in place, and return the writes that store it.
+
+    Every message must include ``_id``; it is removed so the documents can be
+    returned to clients as they are.
+    """
+    writes = []
+    for message in messages:
+        key = message.pop("_id")
+        if "mood" in message:
+            continue
+        fields = history_fields(analyze_sentiment(message.get("content") or ""))
+        message.update(fields)
+        writes.append(UpdateOne({"_id": key}, {"$set": fields}))
+    return writes
+
+
+async def backfill_history(collection, user_id: Optional[str] = None, batch_size: int = 500) -> int:
+    """Store sentiment fields on every message missing them; returns how many were updated."""
+    query = {"mood": {"$exists": False}}
+    if user_id:
+        query["user_id"] = user_id
+    updated = 0
+    while True:
+        batch = await collection.find(query, {"_id": 1, "content": 1}).limit(batch_size).to_list(batch_size)
+        if not batch:
+            return updated
+        await collection.bulk_write(backfill_messages(batch), ordered=False)
+        updated += len(batch)
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Store sentiment, mood and energy on old chat_history messages")
+    parser.add_argument("--user", help="Only backfill this user_id")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    mongo_url = os.environ['MONGO_URL']
+    if mongo_url.startswith('mongodb+srv') or 'mongodb.net' in mongo_url:
+        client = AsyncIOMotorClient(mongo_url, tz_aware=True, tlsCAFile=certifi.where())
+    else:
+        client = AsyncIOMotorClient(mongo_url, tz_aware=True)
+    try:
+        updated = await backfill_history(client[os.environ['DB_NAME']].chat_history, args.user, args.batch_size)
+        logger.info(f"Backfilled sentiment on {updated} chat message(s)")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,35 +1,60 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import json
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError, field_validator
+from pymongo.errors import BulkWriteError
+from typing import Generic, List, Literal, Optional, Dict, Tuple, TypeVar, Union
 import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone, timedelta, tzinfo
 from urllib.parse import quote_plus
 import jwt
-import bcrypt
 import base64
+import hashlib
 import google.generativeai as genai
-import io
 import certifi
-from PIL import Image
 
 ROOT_DIR = Path(__file__).parent
+# Load .env before the local modules below read their settings at import time
 load_dotenv(ROOT_DIR / '.env')
 
+from llm_gateway import llm_gateway, LLMTimeoutError
+from cache import ResultCache, build_cache_backend
+from chat_memory import ChatMemory
+from daily_summaries import (FOOD_FIELDS, apply_increments, apply_increments_many, food_increments, get_summaries,
+                             local_day_expression, rebuild_user, water_increments, week_start, workout_increments)
+from db_indexes import ensure_indexes, verify_query_plans
+from diet_plans import canonical_plan_request, plan_cache_key
+from image_hash import FoodImageHashStore
+from local_days import (DEFAULT_TIMEZONE, day_bounds, days_back, get_zone, local_today, parse_day, validate_timezone,
+                        zone_key)
+from image_pipeline import ImagePreprocessor, ImageTooLargeError, InvalidImageError, PreparedImage, read_upload
+from persona_prefix import PersonaPrefixCache
+from pagination import InvalidCursorError, fetch_page, iterate
+from password_hashing import PasswordHasherBusyError, password_hasher
+from sentiment import analyze_many, analyze_sentiment, backfill_messages, history_fields
+from token_cache import token_cache
+from http_cache import ConditionalGetMiddleware, ConditionalGets, Validator, weak_etag
+from user_profiles import UserProfileStore, public_profile
+from workout_library import WorkoutCatalog, load_collection, load_file
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
+# Timestamps are stored as native BSON dates; tz_aware returns them as UTC-aware datetimes
 if mongo_url.startswith('mongodb+srv') or 'mongodb.net' in mongo_url:
-    client = AsyncIOMotorClient(mongo_url, tlsCAFile=certifi.where())
+    client = AsyncIOMotorClient(mongo_url, tz_aware=True, tlsCAFile=certifi.where())
 else:
-    client = AsyncIOMotorClient(mongo_url)
+    client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 # JWT Configuration
@@ -43,12 +68,105 @@ if not GOOGLE_API_KEY:
     raise RuntimeError("GOOGLE_API_KEY is required. Set it in your environment variables.")
 genai.configure(api_key=GOOGLE_API_KEY)
 
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Food analysis cache (memory | mongo | tiered | redis | tiered-redis), keyed on the normalized JPEG digest
+food_analysis_cache = ResultCache(
+    "food_analysis",
+    build_cache_backend(
+        os.environ.get('FOOD_CACHE_BACKEND', 'memory'),
+        collection=db.food_analysis_cache,
+        max_entries=int(os.environ.get('FOOD_CACHE_MAX_ENTRIES', '2048')),
+        ttl_seconds=float(os.environ.get('FOOD_CACHE_TTL_SECONDS', str(7 * 24 * 3600))),
+        redis_url=REDIS_URL,
+        redis_prefix="food_analysis:"
+    )
+)
+
+# Generated diet plans (same backends as above), keyed on the canonical request; see diet_plans.py
+diet_plan_cache = ResultCache(
+    "diet_plans",
+    build_cache_backend(
+        os.environ.get('DIET_PLAN_CACHE_BACKEND', 'memory'),
+        collection=db.diet_plan_cache,
+        max_entries=int(os.environ.get('DIET_PLAN_CACHE_MAX_ENTRIES', '1024')),
+        ttl_seconds=float(os.environ.get('DIET_PLAN_CACHE_TTL_SECONDS', str(24 * 3600))),
+        redis_url=REDIS_URL,
+        redis_prefix="diet_plan:"
+    )
+)
+
+# User profiles read by chat/profile routes; writes go through the store so the cache stays current
+user_profiles = UserProfileStore(
+    db.users,
+    ResultCache(
+        "user_profiles",
+        build_cache_backend(
+            os.environ.get('USER_CACHE_BACKEND', 'memory'),
+            max_entries=int(os.environ.get('USER_CACHE_MAX_ENTRIES', '10000')),
+            ttl_seconds=float(os.environ.get('USER_CACHE_TTL_SECONDS', '300')),
+            redis_url=REDIS_URL,
+            redis_prefix="user_profile:"
+        )
+    )
+)
+
+# ETags and 304s for read-mostly GET routes; validators are registered next to each route
+http_cache = ConditionalGets()
+HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', '3600'))
+STATIC_CACHE_CONTROL = f"public, max-age={HTTP_CACHE_MAX_AGE}"
+# Per-user responses: stored by the client only and revalidated on every use
+USER_CACHE_CONTROL = "private, no-cache"
+
+# Near-duplicate food photos (re-cropped/recompressed) reuse prior analyses; -1 disables
+food_image_hashes = FoodImageHashStore(
+    db.food_image_hashes,
+    max_distance=int(os.environ.get('FOOD_PHASH_MAX_DISTANCE', '4'))
+)
+
+# Upload decoding/resizing runs in a process pool (IMAGE_WORKERS=0 uses threads)
+image_preprocessor = ImagePreprocessor()
+
+# Rolling summary + token-budgeted recent window for chatbot prompts
+chat_memory = ChatMemory(db, llm_gateway)
+
+# Static per-coach prompt prefixes, attached to model handles once (LLM_PERSONA_CACHE=local | cached_content)
+persona_prefixes = PersonaPrefixCache(llm_gateway)
+
 
 @asynccontextmanager
 async def lifespan(app):
     # Startup
+    image_preprocessor.start()
+    await ensure_indexes(db)
+    if os.environ.get('MONGO_VERIFY_QUERY_PLANS', '').lower() in ('1', 'true', 'yes'):
+        problems = await verify_query_plans(db)
+        if problems:
+            raise RuntimeError("Refusing to start, queries without index support:\n" + "\n".join(problems))
+    try:
+        await food_analysis_cache.ensure_indexes()
+    except Exception as e:
+        logging.warning(f"Could not create food analysis cache indexes: {str(e)}")
+    try:
+        await diet_plan_cache.ensure_indexes()
+    except Exception as e:
+        logging.warning(f"Could not create diet plan cache indexes: {str(e)}")
+    hash_index_task = None
+    if food_image_hashes.enabled:
+        hash_index_task = asyncio.create_task(food_image_hashes.load())
+    await persona_prefixes.warm(COACH_PREFIXES)
+    if WORKOUT_LIBRARY_SOURCE == "mongo":
+        await load_workout_catalog()
+    prefix_keep_alive_task = asyncio.create_task(persona_prefixes.keep_alive())
     yield
     # Shutdown
+    if hash_index_task and not hash_index_task.done():
+        hash_index_task.cancel()
+    prefix_keep_alive_task.cancel()
+    await persona_prefixes.close()
+    await chat_memory.shutdown()
+    image_preprocessor.shutdown()
+    password_hasher.shutdown()
     client.close()
 
 app = FastAPI(lifespan=lifespan)
@@ -65,25 +183,178 @@ def create_token(user_id: str) -> str:
 
 
 def verify_token(token: str) -> str:
+    key = token_cache.key(token)
+    if token_cache.is_revoked(key):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        return user_id
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload["user_id"]
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    token_cache.put(key, payload["user_id"], payload["exp"])
+    return payload["user_id"]
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     return verify_token(credentials.credentials)
 
 
+async def get_user_zone(user_id: str = Depends(get_current_user)) -> tzinfo:
+    """The caller's profile timezone, resolved once per request from the cached profile."""
+    profile = await user_profiles.get(user_id)
+    return get_zone((profile or {}).get("timezone"))
+
+
+async def user_validator(request: Request, resource: str) -> Optional[Validator]:
+    """ETag from the caller's profile ``cache_version``; None leaves auth errors to the route."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        user_id = verify_token(token)
+    except HTTPException:
+        return None
+    profile = await user_profiles.get(user_id)
+    if profile is None:
+        return None
+    return Validator(weak_etag(resource, user_id, profile.get("cache_version", 0)), USER_CACHE_CONTROL)
+
+
 def build_youtube_search_url(query: str) -> str:
     cleaned = (query or "healthy recipe").strip()
     if not cleaned:
         cleaned = "healthy recipe"
     return f"https://www.youtube.com/results?search_query={quote_plus(cleaned)}"
 
+
+def day_range(date: str, zone: Optional[tzinfo] = None) -> Dict:
+    """Mongo filter for the local day in ``zone`` containing ``date`` (YYYY-MM-DD or ISO datetime)."""
+    try:
+        day = parse_day(date, zone)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+    start_of_day, end_of_day = day_bounds(day, zone)
+    return {"$gte": start_of_day, "$lt": end_of_day}
+
+
+async def fetch_day_logs(collection: str, user_id: str, date: Optional[str] = None,
+                         projection: Optional[Dict] = None, zone: Optional[tzinfo] = None) -> List[Dict]:
+    """A user's logs from ``collection``, newest first, optionally limited to one local day."""
+    query = {"user_id": user_id}
+    if date:
+        query["timestamp"] = day_range(date, zone)
+    return await db[collection].find(query, {"_id": 0, **(projection or {})}).sort("timestamp", -1).to_list(1000)
+
+
+LOG_PAGE_MAX = 1000
+LOG_RANGE_MAX_DAYS = 92
+
+# Per-day totals computed by the range view's $group stage, besides "count"
+RANGE_TOTALS = {
+    "food_logs": {field: {"$sum": f"${field}"} for field in FOOD_FIELDS},
+    "water_logs": {"amount_ml": {"$sum": "$amount_ml"}},
+    "workout_logs": {
+        "calories_burned": {"$sum": "$calories_burned"},
+        "duration_minutes": {"$sum": "$duration_minutes"},
+    },
+}
+
+
+def log_window(date: Optional[str], start: Optional[str], end: Optional[str],
+               zone: Optional[tzinfo] = None) -> Optional[Dict]:
+    """Timestamp filter for one ``date`` or the inclusive ``from``/``to`` local days; None for all time."""
+    if start is None and end is None:
+        return day_range(date, zone) if date else None
+    if date:
+        raise HTTPException(status_code=400, detail="Use either date or from/to, not both")
+    if start is None:
+        raise HTTPException(status_code=400, detail="'from' is required when 'to' is given")
+    lower = day_range(start, zone)["$gte"]
+    upper = day_range(end or local_today(zone), zone)["$lt"]
+    if upper <= lower:
+        raise HTTPException(status_code=400, detail="'to' is before 'from'")
+    if (upper - lower).days > LOG_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {LOG_RANGE_MAX_DAYS} days")
+    return {"$gte": lower, "$lt": upper}
+
+
+async def fetch_log_range(collection: str, query: Dict, zone: Optional[tzinfo] = None) -> Dict:
+    """Logs matching ``query`` grouped by local day in ``zone``, newest first, with per-day totals.
+
+    One aggregation over the ``(user_id, timestamp, id)`` index replaces a
+    request per day; the sums are computed by Mongo, not in Python.
+    """
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"timestamp": -1, "id": -1}},
+        {"$project": {"_id": 0}},
+        {"$group": {
+            "_id": local_day_expression(zone_key(zone or get_zone(None))),
+            "logs": {"$push": "$$ROOT"},
+            "count": {"$sum": 1},
+            **RANGE_TOTALS[collection],
+        }},
+        {"$sort": {"_id": -1}},
+    ]
+    days = []
+    async for group in db[collection].aggregate(pipeline):
+        date = group.pop("_id")
+        logs = group.pop("logs")
+        days.append({"date": date, "totals": group, "logs": logs})
+    return {"days": days}
+
+
+async def list_logs(collection: str, log_model, query: Dict, response: Response, limit: int,
+                    cursor: Optional[str], format: str, grouped: bool = False, zone: Optional[tzinfo] = None):
+    """Shared body of the log listing routes.
+
+    ``format=json`` returns one page (newest first) and puts the next page's
+    cursor in the ``X-Next-Cursor`` header, keeping the body a plain list.
+    With ``grouped`` (a from/to range) it returns the whole range grouped by
+    day instead, see :func:`fetch_log_range`. ``format=ndjson`` streams every
+    matching row from ``cursor`` onwards, one JSON object per line, reading
+    Mongo in batches; rows go through ``jsonable_encoder`` and JSONResponse's
+    separators, so both formats put the same bytes on the wire for a log.
+    """
+    if grouped and format == "json":
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor cannot be combined with from/to")
+        return await fetch_log_range(collection, query, zone)
+    try:
+        if format == "ndjson":
+            rows = iterate(db[collection], query, cursor)
+        else:
+            logs, next_cursor = await fetch_page(db[collection], query, limit, cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if format == "ndjson":
+        async def lines():
+            async for doc in rows:
+                row = jsonable_encoder(log_model.model_validate(doc))
+                yield json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return logs
+
+
+def parse_llm_json(response_text: str):
+    """Strip Markdown code fences from a model reply and parse the JSON inside."""
+    response_text = (response_text or "").strip()
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+    return json.loads(response_text.strip())
+
 # Models
 
 
@@ -98,6 +369,13 @@ class UserRegister(BaseModel):
     goal_weight: Optional[float] = None
     activity_level: Optional[str] = "moderate"
     goal: Optional[str] = "maintenance"
+    # IANA name such as "Asia/Kolkata"; decides which calendar day each log counts toward
+    timezone: Optional[str] = None
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: Optional[str]) -> Optional[str]:
+        return validate_timezone(value) if value is not None else None
 
 
 class UserLogin(BaseModel):
@@ -121,6 +399,24 @@ class FoodAnalysisResponse(BaseModel):
     sugar: float
     confidence: str
     timestamp: datetime
+    # Set when the analysis was reused: "exact" (same photo) or "near_duplicate" (similar photo)
+    cache_match: Optional[str] = None
+
+
+class BatchFoodAnalysisItem(BaseModel):
+    index: int
+    filename: Optional[str] = None
+    status: str
+    cached: bool = False
+    analysis: Optional[FoodAnalysisResponse] = None
+    error: Optional[str] = None
+
+
+class BatchFoodAnalysisResponse(BaseModel):
+    results: List[BatchFoodAnalysisItem]
+    succeeded: int
+    failed: int
+    model_calls: int
 
 
 class FoodLog(BaseModel):
@@ -199,6 +495,52 @@ class WorkoutLogCreate(BaseModel):
     notes: Optional[str] = None
 
 
+LogT = TypeVar("LogT")
+
+
+class LogDay(BaseModel, Generic[LogT]):
+    date: str
+    # "count" plus the RANGE_TOTALS sums; ints stay ints so count is never 3.0
+    totals: Dict[str, Union[int, float]]
+    logs: List[LogT]
+
+
+class LogRange(BaseModel, Generic[LogT]):
+    days: List[LogDay[LogT]]
+
+
+class WaterDayLogs(BaseModel):
+    logs: List[WaterLog]
+    total_ml: float
+
+
+class SyncItem(BaseModel):
+    type: Literal["food", "water", "workout", "weight"]
+    idempotency_key: str = Field(min_length=1, max_length=128)
+    data: Dict
+    # When the entry was recorded on the device; defaults to the sync time
+    timestamp: Optional[datetime] = None
+
+
+class SyncRequest(BaseModel):
+    items: List[SyncItem]
+
+
+class SyncItemResult(BaseModel):
+    idempotency_key: str
+    type: str
+    status: str  # created | duplicate | error
+    id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class SyncResponse(BaseModel):
+    results: List[SyncItemResult]
+    created: int
+    duplicates: int
+    failed: int
+
+
 class WorkoutVideo(BaseModel):
     id: str
     title: str
@@ -217,6 +559,8 @@ class DietPlanRequest(BaseModel):
     goal_weight: float
     activity_level: str
     dietary_preferences: Optional[str] = None
+    # Skip the shared plan cache and generate a new plan
+    force_refresh: bool = False
 
 
 class DietMealRecipe(BaseModel):
@@ -254,6 +598,12 @@ class ProfileUpdate(BaseModel):
     goal_weight: Optional[float] = None
     activity_level: Optional[str] = None
     goal: Optional[str] = None
+    timezone: Optional[str] = None
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: Optional[str]) -> Optional[str]:
+        return validate_timezone(value) if value is not None else None
 
 # Chatbot Models
 
@@ -276,6 +626,17 @@ class ChatHistoryItem(BaseModel):
 class SentimentRequest(BaseModel):
     text: str
 
+
+class SentimentBatchRequest(BaseModel):
+    texts: List[str]
+
+
+class ChatTurn(BaseModel):
+    persona: str
+    coach_name: str
+    user_sentiment: Dict
+    prompt: str
+
 # Auth Routes
 
 
@@ -285,13 +646,16 @@ async def register(user_data: UserRegister):
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = bcrypt.hashpw(user_data.password.encode(), bcrypt.gensalt())
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
     user_id = str(uuid.uuid4())
 
     user_doc = {
         "id": user_id,
         "email": user_data.email,
-        "password": hashed_password.decode(),
+        "password": hashed_password,
         "name": user_data.name,
         "gender": user_data.gender,
         "age": user_data.age,
@@ -300,7 +664,8 @@ async def register(user_data: UserRegister):
         "goal_weight": user_data.goal_weight,
         "activity_level": user_data.activity_level,
         "goal": user_data.goal,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "timezone": user_data.timezone or DEFAULT_TIMEZONE,
+        "created_at": datetime.now(timezone.utc)
     }
 
     await db.users.insert_one(user_doc)
@@ -315,8 +680,16 @@ async def login(credentials: UserLogin):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not bcrypt.checkpw(credentials.password.encode(), user["password"].encode()):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        if not await password_hasher.verify(credentials.password, user["password"]):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        rehashed = await password_hasher.rehash_if_needed(credentials.password, user["password"])
+    except PasswordHasherBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
+    if rehashed:
+        # BCRYPT_ROUNDS changed since this hash was made; upgrade it transparently
+        await db.users.update_one({"id": user["id"], "password": user["password"]}, {"$set": {"password": rehashed}})
 
     token = create_token(user["id"])
     return TokenResponse(token=token, user_id=user["id"], name=user["name"])
@@ -324,23 +697,7 @@ async def login(credentials: UserLogin):
 # Food Routes
 
 
-@api_router.post("/food/analyze")
-async def analyze_food(file: UploadFile = File(...), user_id: str = Depends(get_current_user)):
-    try:
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-
-        if image.mode == 'RGBA':
-            image = image.convert('RGB')
-
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG", quality=85)
-        img_base64 = base64.b64encode(buffered.getvalue()).decode()
-
-        model = genai.GenerativeModel("gemini-2.5-flash")
-
-        prompt_text = """Analyze this food image and provide nutritional information in the following JSON format:
-{
+FOOD_ANALYSIS_FIELDS = """{
   "food_name": "name of the dish",
   "calories": estimated calories (number),
   "protein": grams of protein (number),
@@ -349,121 +706,255 @@ async def analyze_food(file: UploadFile = File(...), user_id: str = Depends(get_
   "fiber": grams of fiber (number),
   "sugar": grams of sugar (number),
   "confidence": percentage confidence (e.g., "85%")
-}
+}"""
+
+FOOD_ANALYSIS_PROMPT = f"""Analyze this food image and provide nutritional information in the following JSON format:
+{FOOD_ANALYSIS_FIELDS}
 
 Provide ONLY the JSON response, no additional text."""
 
-        response = model.generate_content([
+FOOD_BATCH_MAX_FILES = int(os.environ.get('FOOD_BATCH_MAX_FILES', '10'))
+FOOD_BATCH_IMAGES_PER_CALL = int(os.environ.get('FOOD_BATCH_IMAGES_PER_CALL', '5'))
+
+
+def build_food_analysis(nutrition_data: Dict) -> FoodAnalysisResponse:
+    return FoodAnalysisResponse(
+        food_name=nutrition_data.get("food_name", "Unknown Food"),
+        calories=float(nutrition_data.get("calories", 0)),
+        protein=float(nutrition_data.get("protein", 0)),
+        carbs=float(nutrition_data.get("carbs", 0)),
+        fat=float(nutrition_data.get("fat", 0)),
+        fiber=float(nutrition_data.get("fiber", 0)),
+        sugar=float(nutrition_data.get("sugar", 0)),
+        confidence=nutrition_data.get("confidence", "N/A"),
+        timestamp=datetime.now(timezone.utc)
+    )
+
+
+async def find_cached_analysis(prepared: PreparedImage) -> Tuple[str, Optional[FoodAnalysisResponse]]:
+    """Look up a prior analysis by exact JPEG digest, then by perceptual hash.
+
+    A reused analysis says which lookup found it in ``cache_match``.
+    """
+    # Identical normalized images always get the same analysis
+    cache_key = hashlib.sha256(prepared.jpeg).hexdigest()
+    cache_match = "exact"
+    cached = await food_analysis_cache.get(cache_key)
+    if cached is None:
+        # Not promoted to the digest cache, so a later upload of this photo is still reported as near_duplicate
+        cached = await food_image_hashes.find(prepared.dhash)
+        cache_match = "near_duplicate"
+    if cached is None:
+        return cache_key, None
+    return cache_key, FoodAnalysisResponse(
+        **{**cached, "timestamp": datetime.now(timezone.utc), "cache_match": cache_match}
+    )
+
+
+async def remember_analysis(cache_key: str, prepared: PreparedImage, analysis: FoodAnalysisResponse):
+    await food_analysis_cache.set(cache_key, analysis.model_dump())
+    await food_image_hashes.add(prepared.dhash, analysis.model_dump())
+
+
+async def analyze_food_images(images: List[PreparedImage]) -> List[Optional[FoodAnalysisResponse]]:
+    """Analyze several images in one Gemini call; missing entries come back as None."""
+    contents = []
+    for number, prepared in enumerate(images, start=1):
+        contents.append(f"Image {number}:")
+        contents.append({"mime_type": "image/jpeg", "data": base64.b64encode(prepared.jpeg).decode()})
+    contents.append(
+        f"Analyze each of the {len(images)} food images above and provide nutritional information. "
+        f"Respond with a JSON array of exactly {len(images)} objects, one per image in the same order, "
+        f"each in this format plus an \"image\" field holding the image number:\n"
+        f"{FOOD_ANALYSIS_FIELDS}\n\n"
+        f"Provide ONLY the JSON array, no additional text."
+    )
+
+    parsed = parse_llm_json(await llm_gateway.generate(contents))
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    if not isinstance(parsed, list):
+        raise ValueError("Model response was not a JSON array")
+
+    results: List[Optional[FoodAnalysisResponse]] = [None] * len(images)
+    for position, item in enumerate(parsed):
+        if not isinstance(item, dict):
+            continue
+        number = item.get("image")
+        slot = int(number) - 1 if isinstance(number, (int, float)) and 1 <= number <= len(images) else position
+        if slot < len(images) and results[slot] is None:
+            try:
+                results[slot] = build_food_analysis(item)
+            except (TypeError, ValueError):
+                continue
+    return results
+
+
+def describe_analysis_error(error: Exception) -> str:
+    if isinstance(error, (ImageTooLargeError, InvalidImageError)):
+        return str(error)
+    if isinstance(error, LLMTimeoutError):
+        return "Analysis timed out, please try again"
+    return f"Analysis failed: {str(error)}"
+
+
+@api_router.post("/food/analyze")
+async def analyze_food(file: UploadFile = File(...), user_id: str = Depends(get_current_user)):
+    try:
+        contents = await read_upload(file)
+        prepared = await image_preprocessor.prepare(contents)
+
+        cache_key, cached = await find_cached_analysis(prepared)
+        if cached is not None:
+            return cached
+
+        img_base64 = base64.b64encode(prepared.jpeg).decode()
+
+        response_text = await llm_gateway.generate([
             {"mime_type": "image/jpeg", "data": img_base64},
-            prompt_text
+            FOOD_ANALYSIS_PROMPT
         ])
 
-        import json
-        response_text = response.text.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        response_text = response_text.strip()
-
-        nutrition_data = json.loads(response_text)
-
-        return FoodAnalysisResponse(
-            food_name=nutrition_data.get("food_name", "Unknown Food"),
-            calories=float(nutrition_data.get("calories", 0)),
-            protein=float(nutrition_data.get("protein", 0)),
-            carbs=float(nutrition_data.get("carbs", 0)),
-            fat=float(nutrition_data.get("fat", 0)),
-            fiber=float(nutrition_data.get("fiber", 0)),
-            sugar=float(nutrition_data.get("sugar", 0)),
-            confidence=nutrition_data.get("confidence", "N/A"),
-            timestamp=datetime.now(timezone.utc)
-        )
+        nutrition_data = parse_llm_json(response_text)
 
+        analysis = build_food_analysis(nutrition_data)
+        await remember_analysis(cache_key, prepared, analysis)
+        return analysis
+
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LLMTimeoutError as e:
+        logging.error(f"Food analysis timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail="Analysis timed out, please try again")
     except Exception as e:
         logging.error(f"Food analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@api_router.post("/food/analyze/batch", response_model=BatchFoodAnalysisResponse)
+async def analyze_food_batch(files: List[UploadFile] = File(...), user_id: str = Depends(get_current_user)):
+    """Analyze several meal photos at once, packing uncached images into shared Gemini calls."""
+    if len(files) > FOOD_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {FOOD_BATCH_MAX_FILES} images per batch")
+
+    async def prepare(file: UploadFile) -> PreparedImage:
+        return await image_preprocessor.prepare(await read_upload(file))
+
+    prepared_images = await asyncio.gather(*(prepare(file) for file in files), return_exceptions=True)
+
+    results: List[Optional[BatchFoodAnalysisItem]] = [None] * len(files)
+    # Uncached images keyed by digest, so duplicates inside one batch are analyzed once
+    pending: Dict[str, Tuple[PreparedImage, List[int]]] = {}
+    for index, (file, prepared) in enumerate(zip(files, prepared_images)):
+        if isinstance(prepared, Exception):
+            results[index] = BatchFoodAnalysisItem(
+                index=index, filename=file.filename, status="error", error=describe_analysis_error(prepared)
+            )
+            continue
+        cache_key, cached = await find_cached_analysis(prepared)
+        if cached is not None:
+            results[index] = BatchFoodAnalysisItem(
+                index=index, filename=file.filename, status="ok", cached=True, analysis=cached
+            )
+        elif cache_key in pending:
+            pending[cache_key][1].append(index)
+        else:
+            pending[cache_key] = (prepared, [index])
+
+    groups = list(pending.items())
+    chunks = [groups[i:i + FOOD_BATCH_IMAGES_PER_CALL] for i in range(0, len(groups), FOOD_BATCH_IMAGES_PER_CALL)]
+    chunk_results = await asyncio.gather(
+        *(analyze_food_images([prepared for _, (prepared, _) in chunk]) for chunk in chunks),
+        return_exceptions=True
+    )
+
+    for chunk, outcome in zip(chunks, chunk_results):
+        if isinstance(outcome, Exception):
+            logging.error(f"Batch food analysis error: {str(outcome)}")
+        for position, (cache_key, (prepared, indices)) in enumerate(chunk):
+            analysis = None if isinstance(outcome, Exception) else outcome[position]
+            if analysis is not None:
+                await remember_analysis(cache_key, prepared, analysis)
+            for index in indices:
+                if analysis is not None:
+                    results[index] = BatchFoodAnalysisItem(
+                        index=index, filename=files[index].filename, status="ok", analysis=analysis
+                    )
+                else:
+                    error = describe_analysis_error(outcome) if isinstance(outcome, Exception) \
+                        else "No analysis returned for this image"
+                    results[index] = BatchFoodAnalysisItem(
+                        index=index, filename=files[index].filename, status="error", error=error
+                    )
+
+    succeeded = sum(1 for item in results if item.status == "ok")
+    return BatchFoodAnalysisResponse(
+        results=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        model_calls=len(chunks)
+    )
+
+
 @api_router.post("/food/log", response_model=FoodLog)
-async def create_food_log(food_data: FoodLogCreate, user_id: str = Depends(get_current_user)):
+async def create_food_log(food_data: FoodLogCreate, user_id: str = Depends(get_current_user),
+                          zone: tzinfo = Depends(get_user_zone)):
     food_dict = food_data.model_dump()
     food_obj = FoodLog(user_id=user_id, **food_dict)
 
     doc = food_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-
     await db.food_logs.insert_one(doc)
+    await apply_increments(db, user_id, food_obj.timestamp, food_increments(doc), zone)
     return food_obj
 
 
-@api_router.get("/food/log", response_model=List[FoodLog])
-async def get_food_logs(date: Optional[str] = None, user_id: str = Depends(get_current_user)):
+@api_router.get("/food/log", response_model=Union[List[FoodLog], LogRange[FoodLog]])
+async def get_food_logs(response: Response, date: Optional[str] = None,
+                        from_: Optional[str] = Query(None, alias="from"), to: Optional[str] = None,
+                        limit: int = Query(LOG_PAGE_MAX, ge=1, le=LOG_PAGE_MAX), cursor: Optional[str] = None,
+                        format: Literal["json", "ndjson"] = "json", user_id: str = Depends(get_current_user),
+                        zone: tzinfo = Depends(get_user_zone)):
     query = {"user_id": user_id}
-
-    if date:
-        try:
-            target_date = datetime.fromisoformat(date)
-            start_of_day = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_of_day = start_of_day + timedelta(days=1)
-
-            query["timestamp"] = {
-                "$gte": start_of_day.isoformat(),
-                "$lt": end_of_day.isoformat()
-            }
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format")
-
-    logs = await db.food_logs.find(query, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-
-    for log in logs:
-        if isinstance(log['timestamp'], str):
-            log['timestamp'] = datetime.fromisoformat(log['timestamp'])
-
-    return logs
+    window = log_window(date, from_, to, zone)
+    if window:
+        query["timestamp"] = window
+    grouped = from_ is not None or to is not None
+    return await list_logs("food_logs", FoodLog, query, response, limit, cursor, format, grouped, zone)
 
 
 @api_router.delete("/food/log/{log_id}")
-async def delete_food_log(log_id: str, user_id: str = Depends(get_current_user)):
-    result = await db.food_logs.delete_one({"id": log_id, "user_id": user_id})
-    if result.deleted_count == 0:
+async def delete_food_log(log_id: str, user_id: str = Depends(get_current_user),
+                          zone: tzinfo = Depends(get_user_zone)):
+    deleted = await db.food_logs.find_one_and_delete({"id": log_id, "user_id": user_id}, {"_id": 0})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Log not found")
+    await apply_increments(db, user_id, deleted["timestamp"], food_increments(deleted, sign=-1), zone)
     return {"message": "Log deleted"}
 
 # Water Routes
 
 
 @api_router.post("/water/log", response_model=WaterLog)
-async def create_water_log(water_data: WaterLogCreate, user_id: str = Depends(get_current_user)):
+async def create_water_log(water_data: WaterLogCreate, user_id: str = Depends(get_current_user),
+                           zone: tzinfo = Depends(get_user_zone)):
     water_obj = WaterLog(user_id=user_id, amount_ml=water_data.amount_ml)
 
     doc = water_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-
     await db.water_logs.insert_one(doc)
+    await apply_increments(db, user_id, water_obj.timestamp, water_increments(doc), zone)
     return water_obj
 
 
-@api_router.get("/water/log")
-async def get_water_logs(date: Optional[str] = None, user_id: str = Depends(get_current_user)):
-    query = {"user_id": user_id}
-
-    if date:
-        try:
-            target_date = datetime.fromisoformat(date)
-            start_of_day = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_of_day = start_of_day + timedelta(days=1)
-
-            query["timestamp"] = {
-                "$gte": start_of_day.isoformat(),
-                "$lt": end_of_day.isoformat()
-            }
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format")
-
-    logs = await db.water_logs.find(query, {"_id": 0}).sort("timestamp", -1).to_list(1000)
+@api_router.get("/water/log", response_model=Union[WaterDayLogs, LogRange[WaterLog]])
+async def get_water_logs(date: Optional[str] = None, from_: Optional[str] = Query(None, alias="from"),
+                         to: Optional[str] = None, user_id: str = Depends(get_current_user),
+                         zone: tzinfo = Depends(get_user_zone)):
+    if from_ is not None or to is not None:
+        window = log_window(date, from_, to, zone)
+        return await fetch_log_range("water_logs", {"user_id": user_id, "timestamp": window}, zone)
+    logs = await fetch_day_logs("water_logs", user_id, date, zone=zone)
 
     total = sum(log['amount_ml'] for log in logs)
 
@@ -471,10 +962,12 @@ async def get_water_logs(date: Optional[str] = None, user_id: str = Depends(get_
 
 
 @api_router.delete("/water/log/{log_id}")
-async def delete_water_log(log_id: str, user_id: str = Depends(get_current_user)):
-    result = await db.water_logs.delete_one({"id": log_id, "user_id": user_id})
-    if result.deleted_count == 0:
+async def delete_water_log(log_id: str, user_id: str = Depends(get_current_user),
+                           zone: tzinfo = Depends(get_user_zone)):
+    deleted = await db.water_logs.find_one_and_delete({"id": log_id, "user_id": user_id}, {"_id": 0})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Log not found")
+    await apply_increments(db, user_id, deleted["timestamp"], water_increments(deleted, sign=-1), zone)
     return {"message": "Log deleted"}
 
 # Weight Routes
@@ -485,165 +978,393 @@ async def create_weight_log(weight_data: WeightLogCreate, user_id: str = Depends
     weight_obj = WeightLog(user_id=user_id, **weight_data.model_dump())
 
     doc = weight_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-
     await db.weight_logs.insert_one(doc)
     return weight_obj
 
 
 @api_router.get("/weight/log", response_model=List[WeightLog])
-async def get_weight_logs(user_id: str = Depends(get_current_user)):
-    logs = await db.weight_logs.find({"user_id": user_id}, {"_id": 0}).sort("timestamp", -1).to_list(1000)
-
-    for log in logs:
-        if isinstance(log['timestamp'], str):
-            log['timestamp'] = datetime.fromisoformat(log['timestamp'])
-
-    return logs
+async def get_weight_logs(response: Response, limit: int = Query(LOG_PAGE_MAX, ge=1, le=LOG_PAGE_MAX),
+                          cursor: Optional[str] = None, format: Literal["json", "ndjson"] = "json",
+                          user_id: str = Depends(get_current_user)):
+    return await list_logs("weight_logs", WeightLog, {"user_id": user_id}, response, limit, cursor, format)
 
 # Workout Routes
 
 
 @api_router.post("/workout/log", response_model=WorkoutLog)
-async def create_workout_log(workout_data: WorkoutLogCreate, user_id: str = Depends(get_current_user)):
+async def create_workout_log(workout_data: WorkoutLogCreate, user_id: str = Depends(get_current_user),
+                             zone: tzinfo = Depends(get_user_zone)):
     workout_obj = WorkoutLog(user_id=user_id, **workout_data.model_dump())
 
     doc = workout_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-
     await db.workout_logs.insert_one(doc)
+    await apply_increments(db, user_id, workout_obj.timestamp, workout_increments(doc), zone)
     return workout_obj
 
 
-@api_router.get("/workout/log", response_model=List[WorkoutLog])
-async def get_workout_logs(date: Optional[str] = None, user_id: str = Depends(get_current_user)):
+@api_router.get("/workout/log", response_model=Union[List[WorkoutLog], LogRange[WorkoutLog]])
+async def get_workout_logs(response: Response, date: Optional[str] = None,
+                           from_: Optional[str] = Query(None, alias="from"), to: Optional[str] = None,
+                           limit: int = Query(LOG_PAGE_MAX, ge=1, le=LOG_PAGE_MAX), cursor: Optional[str] = None,
+                           format: Literal["json", "ndjson"] = "json", user_id: str = Depends(get_current_user),
+                           zone: tzinfo = Depends(get_user_zone)):
     query = {"user_id": user_id}
+    window = log_window(date, from_, to, zone)
+    if window:
+        query["timestamp"] = window
+    grouped = from_ is not None or to is not None
+    return await list_logs("workout_logs", WorkoutLog, query, response, limit, cursor, format, grouped, zone)
 
-    if date:
-        try:
-            target_date = datetime.fromisoformat(date)
-            start_of_day = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_of_day = start_of_day + timedelta(days=1)
 
-            query["timestamp"] = {
-                "$gte": start_of_day.isoformat(),
-                "$lt": end_of_day.isoformat()
-            }
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format")
+@api_router.delete("/workout/log/{log_id}")
+async def delete_workout_log(log_id: str, user_id: str = Depends(get_current_user),
+                             zone: tzinfo = Depends(get_user_zone)):
+    deleted = await db.workout_logs.find_one_and_delete({"id": log_id, "user_id": user_id}, {"_id": 0})
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Log not found")
+    await apply_increments(db, user_id, deleted["timestamp"], workout_increments(deleted, sign=-1), zone)
+    return {"message": "Log deleted"}
 
-    logs = await db.workout_logs.find(query, {"_id": 0}).sort("timestamp", -1).to_list(1000)
+# Offline Sync Routes
 
-    for log in logs:
-        if isinstance(log['timestamp'], str):
-            log['timestamp'] = datetime.fromisoformat(log['timestamp'])
+SYNC_MAX_ITEMS = int(os.environ.get('SYNC_MAX_ITEMS', '500'))
 
-    return logs
+# type -> (create model, stored model, collection, daily summary increments)
+SYNC_TYPES = {
+    "food": (FoodLogCreate, FoodLog, "food_logs", food_increments),
+    "water": (WaterLogCreate, WaterLog, "water_logs", water_increments),
+    "workout": (WorkoutLogCreate, WorkoutLog, "workout_logs", workout_increments),
+    "weight": (WeightLogCreate, WeightLog, "weight_logs", None),
+}
 
 
-@api_router.delete("/workout/log/{log_id}")
-async def delete_workout_log(log_id: str, user_id: str = Depends(get_current_user)):
-    result = await db.workout_logs.delete_one({"id": log_id, "user_id": user_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Log not found")
-    return {"message": "Log deleted"}
+async def insert_sync_docs(collection: str, user_id: str, docs: List[Dict]) -> Dict[str, Tuple[str, str]]:
+    """Insert unordered; map each idempotency key to ``(status, id or detail)``."""
+    outcome = {doc["idempotency_key"]: ("created", doc["id"]) for doc in docs}
+    try:
+        await db[collection].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        duplicate_keys = []
+        for error in e.details.get("writeErrors", []):
+            key = docs[error["index"]]["idempotency_key"]
+            if error.get("code") == 11000:
+                duplicate_keys.append(key)
+            else:
+                outcome[key] = ("error", error.get("errmsg", "Write failed"))
+        if duplicate_keys:
+            existing = await db[collection].find(
+                {"user_id": user_id, "idempotency_key": {"$in": duplicate_keys}},
+                {"_id": 0, "id": 1, "idempotency_key": 1}
+            ).to_list(len(duplicate_keys))
+            existing_ids = {doc["idempotency_key"]: doc["id"] for doc in existing}
+            for key in duplicate_keys:
+                outcome[key] = ("duplicate", existing_ids.get(key))
+    return outcome
+
+
+@api_router.post("/sync", response_model=SyncResponse)
+async def sync_logs(request: SyncRequest, user_id: str = Depends(get_current_user),
+                    zone: tzinfo = Depends(get_user_zone)):
+    """Ingest a batch of queued offline entries of any log type.
+
+    Items are validated individually, then written with one unordered
+    ``insert_many`` per collection. Each ``idempotency_key`` is stored on its
+    log, so replaying a batch reports earlier items as ``duplicate`` (with the
+    original id) instead of inserting them twice.
+    """
+    if len(request.items) > SYNC_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {SYNC_MAX_ITEMS} items per sync")
+
+    results: List[Optional[SyncItemResult]] = [None] * len(request.items)
+    pending: Dict[str, List[Tuple[int, Dict]]] = {}
+    first_index: Dict[Tuple[str, str], int] = {}
+    repeats: List[Tuple[int, int]] = []
+    now = datetime.now(timezone.utc)
+
+    for i, item in enumerate(request.items):
+        create_model, log_model, collection, _ = SYNC_TYPES[item.type]
+        seen = first_index.get((collection, item.idempotency_key))
+        if seen is not None:
+            repeats.append((i, seen))
+            continue
+        try:
+            fields = create_model(**item.data).model_dump()
+        except ValidationError as e:
+            results[i] = SyncItemResult(idempotency_key=item.idempotency_key, type=item.type, status="error",
+                                        detail="; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                                                         for err in e.errors()))
+            continue
+        timestamp = item.timestamp or now
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        doc = log_model(user_id=user_id, timestamp=timestamp, **fields).model_dump()
+        doc["idempotency_key"] = item.idempotency_key
+        first_index[(collection, item.idempotency_key)] = i
+        pending.setdefault(item.type, []).append((i, doc))
+
+    outcomes = await asyncio.gather(*(
+        insert_sync_docs(SYNC_TYPES[log_type][2], user_id, [doc for _, doc in entries])
+        for log_type, entries in pending.items()
+    ))
+
+    increments = []
+    for (log_type, entries), outcome in zip(pending.items(), outcomes):
+        to_increments = SYNC_TYPES[log_type][3]
+        for i, doc in entries:
+            status, value = outcome[doc["idempotency_key"]]
+            results[i] = SyncItemResult(
+                idempotency_key=doc["idempotency_key"],
+                type=log_type,
+                status=status,
+                id=value if status != "error" else None,
+                detail=value if status == "error" else None
+            )
+            if status == "created" and to_increments:
+                increments.append((doc["timestamp"], to_increments(doc)))
+    for i, seen in repeats:
+        results[i] = SyncItemResult(idempotency_key=request.items[i].idempotency_key, type=request.items[i].type,
+                                    status="duplicate", id=results[seen].id, detail=f"Same key as item {seen}")
+    if increments:
+        await apply_increments_many(db, user_id, increments, zone)
+
+    return SyncResponse(
+        results=results,
+        created=sum(1 for r in results if r.status == "created"),
+        duplicates=sum(1 for r in results if r.status == "duplicate"),
+        failed=sum(1 for r in results if r.status == "error")
+    )
 
 # Workout Library
 
 
-@api_router.get("/workout/library", response_model=List[WorkoutVideo])
-async def get_workout_library(muscle_group: Optional[str] = None, difficulty: Optional[str] = None):
-    workout_videos = [
-        {
-            "id": "1",
-            "title": "Full Body HIIT Workout",
-            "description": "High-intensity interval training for fat loss",
-            "duration_minutes": 30,
-            "difficulty": "intermediate",
-            "muscle_group": "full_body",
-            "equipment": "none",
-            "video_url": "https://www.youtube.com/watch?v=ml6cT4AZdqI",
-            "thumbnail_url": "https://images.unsplash.com/photo-1517838277536-f5f99be501cd?w=400"
-        },
-        {
-            "id": "2",
-            "title": "Chest & Triceps Blast",
-            "description": "Build upper body strength and size",
-            "duration_minutes": 45,
-            "difficulty": "advanced",
-            "muscle_group": "chest",
-            "equipment": "dumbbells",
-            "video_url": "https://www.youtube.com/watch?v=IODxDxX7oi4",
-            "thumbnail_url": "https://images.unsplash.com/photo-1571019614242-c5c5dee9f50b?w=400"
-        },
-        {
-            "id": "3",
-            "title": "Leg Day Power",
-            "description": "Build strong and powerful legs",
-            "duration_minutes": 50,
-            "difficulty": "intermediate",
-            "muscle_group": "legs",
-            "equipment": "barbell",
-            "video_url": "https://www.youtube.com/watch?v=BS8Y7Q3gHjY",
-            "thumbnail_url": "https://images.pexels.com/photos/136404/pexels-photo-136404.jpeg?w=400"
-        },
-        {
-            "id": "4",
-            "title": "Back & Biceps",
-            "description": "Sculpt a strong back and arms",
-            "duration_minutes": 40,
-            "difficulty": "intermediate",
-            "muscle_group": "back",
-            "equipment": "dumbbells",
-            "video_url": "https://www.youtube.com/watch?v=eE7dzZEMwfg",
-            "thumbnail_url": "https://images.unsplash.com/photo-1605296867304-46d5465a13f1?w=400"
-        },
-        {
-            "id": "5",
-            "title": "Yoga Flow for Recovery",
-            "description": "Stretch and recover with gentle yoga",
-            "duration_minutes": 25,
-            "difficulty": "beginner",
-            "muscle_group": "mobility",
-            "equipment": "mat",
-            "video_url": "https://www.youtube.com/watch?v=v7AYKMP6rOE",
-            "thumbnail_url": "https://images.unsplash.com/photo-1544367567-0f2fcb009e0b?w=400"
-        },
-        {
-            "id": "6",
-            "title": "Core Shredder",
-            "description": "Intense ab workout for a strong core",
-            "duration_minutes": 20,
-            "difficulty": "intermediate",
-            "muscle_group": "abs",
-            "equipment": "none",
-            "video_url": "https://www.youtube.com/watch?v=DHD1-2P94DI",
-            "thumbnail_url": "https://images.unsplash.com/photo-1571019613454-1cb2f99b2d8b?w=400"
-        }
-    ]
+WORKOUT_LIBRARY_SOURCE = os.environ.get('WORKOUT_LIBRARY_SOURCE', 'file').strip().lower()
+
+
+def build_workout_catalog(entries: List[Dict]) -> WorkoutCatalog:
+    return WorkoutCatalog(WorkoutVideo(**entry).model_dump() for entry in entries)
+
+
+# Loaded once; replaced wholesale (never mutated) when the Mongo source is used
+workout_catalog = build_workout_catalog(load_file())
+
+
+async def load_workout_catalog() -> None:
+    """Serve the ``workout_library`` collection instead of the bundled data file."""
+    global workout_catalog
+    entries = await load_collection(db.workout_library)
+    if not entries:
+        logging.warning("workout_library collection is empty, serving the bundled data file")
+        return
+    workout_catalog = build_workout_catalog(entries)
+    logging.info(f"Loaded {len(workout_catalog)} workouts from Mongo")
+
 
-    filtered = workout_videos
-    if muscle_group:
-        filtered = [v for v in filtered if v["muscle_group"] == muscle_group]
-    if difficulty:
-        filtered = [v for v in filtered if v["difficulty"] == difficulty]
+@http_cache.validator("/api/workout/library")
+async def workout_library_validator(request: Request) -> Validator:
+    query = tuple(request.query_params.get(name) for name in ("muscle_group", "difficulty", "equipment", "q", "limit"))
+    return Validator(weak_etag("workout_library", workout_catalog.version, query), STATIC_CACHE_CONTROL)
 
-    return filtered
+
+@api_router.get("/workout/library", response_model=List[WorkoutVideo])
+async def get_workout_library(muscle_group: Optional[str] = None, difficulty: Optional[str] = None,
+                              equipment: Optional[str] = None, q: Optional[str] = None,
+                              limit: Optional[int] = Query(None, ge=1)):
+    """Filter the in-memory catalog; the body is joined from pre-serialized entries."""
+    catalog = workout_catalog
+    positions = catalog.search(q=q, limit=limit, muscle_group=muscle_group, difficulty=difficulty, equipment=equipment)
+    return Response(catalog.render(positions), media_type="application/json")
 
 # Diet Coach Routes
 
 
+def build_diet_plan(plan_data: Dict) -> DietPlanResponse:
+    """Turn Gemini's (possibly partial or malformed) plan JSON into a complete response."""
+    def to_int(value, default):
+        try:
+            if value is None:
+                return default
+            return int(float(value))
+        except (TypeError, ValueError):
+            return default
+
+    def to_float(value, default):
+        try:
+            if value is None:
+                return default
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+
+    meal_recipes: List[DietMealRecipe] = []
+    raw_recipes = plan_data.get("meal_recipes", [])
+    if isinstance(raw_recipes, list):
+        for recipe in raw_recipes[:5]:
+            if not isinstance(recipe, dict):
+                continue
+
+            meal_name = str(recipe.get("meal_name") or recipe.get("name") or "").strip()
+            if not meal_name:
+                continue
+
+            ingredients_raw = recipe.get("ingredients", [])
+            steps_raw = recipe.get("steps", [])
+            ingredients = [str(item).strip() for item in ingredients_raw if str(item).strip()] if isinstance(ingredients_raw, list) else []
+            steps = [str(item).strip() for item in steps_raw if str(item).strip()] if isinstance(steps_raw, list) else []
+
+            if not ingredients:
+                ingredients = [
+                    "Lean protein source",
+                    "Complex carbohydrate",
+                    "Fresh vegetables",
+                    "Healthy fat source"
+                ]
+
+            if not steps:
+                steps = [
+                    f"Gather ingredients for {meal_name}.",
+                    "Prep and portion all ingredients.",
+                    "Cook protein and vegetables with minimal oil.",
+                    "Serve in a balanced portion based on your calorie target."
+                ]
+
+            short_description = str(recipe.get("short_description") or recipe.get("description") or "").strip()
+            if not short_description:
+                short_description = "Balanced meal aligned to your calorie and macro targets."
+            video_url = str(recipe.get("video_url") or "").strip() or None
+            video_query = str(recipe.get("video_query") or meal_name).strip()
+            video_search_url = build_youtube_search_url(video_query)
+
+            prep_time = recipe.get("prep_time_minutes")
+            calories_estimate = recipe.get("calories_estimate")
+
+            prep_time_int = None
+            if prep_time is not None:
+                try:
+                    prep_time_int = int(float(prep_time))
+                except (TypeError, ValueError):
+                    prep_time_int = None
+
+            calories_estimate_int = None
+            if calories_estimate is not None:
+                try:
+                    calories_estimate_int = int(float(calories_estimate))
+                except (TypeError, ValueError):
+                    calories_estimate_int = None
+
+            meal_recipes.append(
+                DietMealRecipe(
+                    meal_name=meal_name,
+                    short_description=short_description,
+                    ingredients=ingredients,
+                    steps=steps,
+                    prep_time_minutes=prep_time_int,
+                    calories_estimate=calories_estimate_int,
+                    video_url=video_url,
+                    video_search_url=video_search_url,
+                )
+            )
+
+    meal_suggestions_raw = plan_data.get("meal_suggestions", [])
+    meal_suggestions = [
+        str(meal).strip()
+        for meal in meal_suggestions_raw
+        if isinstance(meal, str) and meal.strip()
+    ] if isinstance(meal_suggestions_raw, list) else []
+
+    if not meal_suggestions and meal_recipes:
+        meal_suggestions = [recipe.meal_name for recipe in meal_recipes]
+
+    if not meal_recipes and meal_suggestions:
+        for meal in meal_suggestions[:5]:
+            meal_recipes.append(
+                DietMealRecipe(
+                    meal_name=meal,
+                    short_description="Balanced meal tailored to your goal.",
+                    ingredients=[
+                        "Lean protein source",
+                        "Complex carbohydrate",
+                        "Fiber-rich vegetables",
+                        "Healthy fat source"
+                    ],
+                    steps=[
+                        "Prepare and portion all ingredients.",
+                        "Cook protein with minimal oil.",
+                        "Add vegetables and cook until tender.",
+                        "Serve with complex carbs and healthy fat in balanced portions."
+                    ],
+                    video_search_url=build_youtube_search_url(f"{meal} healthy recipe")
+                )
+            )
+
+    if not meal_recipes:
+        fallback_meals = [
+            "High-protein breakfast bowl",
+            "Grilled protein and quinoa salad",
+            "Lentil and vegetable power lunch",
+            "Greek yogurt fruit snack",
+            "Baked fish or tofu with roasted vegetables"
+        ]
+        meal_suggestions = fallback_meals.copy()
+
+        for meal in fallback_meals:
+            meal_recipes.append(
+                DietMealRecipe(
+                    meal_name=meal,
+                    short_description="A practical, balanced meal for sustainable progress.",
+                    ingredients=[
+                        "Lean protein",
+                        "Whole grain or complex carbs",
+                        "Colorful vegetables",
+                        "Healthy fat (nuts, seeds, or olive oil)"
+                    ],
+                    steps=[
+                        "Prepare and portion all ingredients.",
+                        "Cook protein and carbs until done.",
+                        "Add vegetables and season lightly.",
+                        "Plate and adjust portion size to fit your daily target."
+                    ],
+                    video_search_url=build_youtube_search_url(f"{meal} healthy recipe")
+                )
+            )
+
+    advice_text = str(plan_data.get("advice") or "").strip()
+    if not advice_text:
+        advice_text = (
+            "Prioritize whole foods, hydrate well, and keep portions aligned with your calorie target. "
+            "Aim for consistent meal timing and include protein in every meal for better satiety and recovery."
+        )
+
+    return DietPlanResponse(
+        plan=advice_text,
+        daily_calories=to_int(plan_data.get("daily_calories"), 2000),
+        macro_split={
+            "protein": to_float(plan_data.get("protein_percentage"), 30),
+            "carbs": to_float(plan_data.get("carbs_percentage"), 40),
+            "fat": to_float(plan_data.get("fat_percentage"), 30)
+        },
+        meal_suggestions=meal_suggestions,
+        meal_recipes=meal_recipes
+    )
+
+
 @api_router.post("/diet/plan", response_model=DietPlanResponse)
 async def generate_diet_plan(plan_request: DietPlanRequest, user_id: str = Depends(get_current_user)):
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
+    # Near-identical requests share one plan; force_refresh regenerates and replaces it
+    params = canonical_plan_request(plan_request.goal, plan_request.current_weight, plan_request.goal_weight,
+                                    plan_request.activity_level, plan_request.dietary_preferences)
+    cache_key = plan_cache_key(params)
+    if not plan_request.force_refresh:
+        cached = await diet_plan_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+    try:
         prompt = f"""You are a professional nutritionist and diet coach. Create a personalized diet plan for a user with the following details:
-- Goal: {plan_request.goal}
-- Current Weight: {plan_request.current_weight} kg
-- Goal Weight: {plan_request.goal_weight} kg
-- Activity Level: {plan_request.activity_level}
-- Dietary Preferences: {plan_request.dietary_preferences or 'None'}
+- Goal: {params['goal']}
+- Current Weight: {params['current_weight']} kg
+- Goal Weight: {params['goal_weight']} kg
+- Activity Level: {params['activity_level']}
+- Dietary Preferences: {params['dietary_preferences'] or 'None'}
 
 Provide:
 1. Recommended daily calorie intake
@@ -682,21 +1403,9 @@ Format your response as JSON:
 }}
 """
 
-        import json
-
         plan_data: Dict = {}
         try:
-            response = model.generate_content(prompt)
-            response_text = (response.text or "").strip()
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-
-            parsed = json.loads(response_text)
+            parsed = parse_llm_json(await llm_gateway.generate(prompt))
             if isinstance(parsed, dict):
                 plan_data = parsed
             else:
@@ -704,234 +1413,53 @@ Format your response as JSON:
         except Exception as llm_error:
             logging.warning(f"Diet plan LLM response parse failed, using defaults: {str(llm_error)}")
 
-        def to_int(value, default):
-            try:
-                if value is None:
-                    return default
-                return int(float(value))
-            except (TypeError, ValueError):
-                return default
-
-        def to_float(value, default):
-            try:
-                if value is None:
-                    return default
-                return float(value)
-            except (TypeError, ValueError):
-                return default
-
-        meal_recipes: List[DietMealRecipe] = []
-        raw_recipes = plan_data.get("meal_recipes", [])
-        if isinstance(raw_recipes, list):
-            for recipe in raw_recipes[:5]:
-                if not isinstance(recipe, dict):
-                    continue
-
-                meal_name = str(recipe.get("meal_name") or recipe.get("name") or "").strip()
-                if not meal_name:
-                    continue
-
-                ingredients_raw = recipe.get("ingredients", [])
-                steps_raw = recipe.get("steps", [])
-                ingredients = [str(item).strip() for item in ingredients_raw if str(item).strip()] if isinstance(ingredients_raw, list) else []
-                steps = [str(item).strip() for item in steps_raw if str(item).strip()] if isinstance(steps_raw, list) else []
-
-                if not ingredients:
-                    ingredients = [
-                        "Lean protein source",
-                        "Complex carbohydrate",
-                        "Fresh vegetables",
-                        "Healthy fat source"
-                    ]
-
-                if not steps:
-                    steps = [
-                        f"Gather ingredients for {meal_name}.",
-                        "Prep and portion all ingredients.",
-                        "Cook protein and vegetables with minimal oil.",
-                        "Serve in a balanced portion based on your calorie target."
-                    ]
-
-                short_description = str(recipe.get("short_description") or recipe.get("description") or "").strip()
-                if not short_description:
-                    short_description = "Balanced meal aligned to your calorie and macro targets."
-                video_url = str(recipe.get("video_url") or "").strip() or None
-                video_query = str(recipe.get("video_query") or meal_name).strip()
-                video_search_url = build_youtube_search_url(video_query)
-
-                prep_time = recipe.get("prep_time_minutes")
-                calories_estimate = recipe.get("calories_estimate")
-
-                prep_time_int = None
-                if prep_time is not None:
-                    try:
-                        prep_time_int = int(float(prep_time))
-                    except (TypeError, ValueError):
-                        prep_time_int = None
-
-                calories_estimate_int = None
-                if calories_estimate is not None:
-                    try:
-                        calories_estimate_int = int(float(calories_estimate))
-                    except (TypeError, ValueError):
-                        calories_estimate_int = None
-
-                meal_recipes.append(
-                    DietMealRecipe(
-                        meal_name=meal_name,
-                        short_description=short_description,
-                        ingredients=ingredients,
-                        steps=steps,
-                        prep_time_minutes=prep_time_int,
-                        calories_estimate=calories_estimate_int,
-                        video_url=video_url,
-                        video_search_url=video_search_url,
-                    )
-                )
-
-        meal_suggestions_raw = plan_data.get("meal_suggestions", [])
-        meal_suggestions = [
-            str(meal).strip()
-            for meal in meal_suggestions_raw
-            if isinstance(meal, str) and meal.strip()
-        ] if isinstance(meal_suggestions_raw, list) else []
-
-        if not meal_suggestions and meal_recipes:
-            meal_suggestions = [recipe.meal_name for recipe in meal_recipes]
-
-        if not meal_recipes and meal_suggestions:
-            for meal in meal_suggestions[:5]:
-                meal_recipes.append(
-                    DietMealRecipe(
-                        meal_name=meal,
-                        short_description="Balanced meal tailored to your goal.",
-                        ingredients=[
-                            "Lean protein source",
-                            "Complex carbohydrate",
-                            "Fiber-rich vegetables",
-                            "Healthy fat source"
-                        ],
-                        steps=[
-                            "Prepare and portion all ingredients.",
-                            "Cook protein with minimal oil.",
-                            "Add vegetables and cook until tender.",
-                            "Serve with complex carbs and healthy fat in balanced portions."
-                        ],
-                        video_search_url=build_youtube_search_url(f"{meal} healthy recipe")
-                    )
-                )
-
-        if not meal_recipes:
-            fallback_meals = [
-                "High-protein breakfast bowl",
-                "Grilled protein and quinoa salad",
-                "Lentil and vegetable power lunch",
-                "Greek yogurt fruit snack",
-                "Baked fish or tofu with roasted vegetables"
-            ]
-            meal_suggestions = fallback_meals.copy()
-
-            for meal in fallback_meals:
-                meal_recipes.append(
-                    DietMealRecipe(
-                        meal_name=meal,
-                        short_description="A practical, balanced meal for sustainable progress.",
-                        ingredients=[
-                            "Lean protein",
-                            "Whole grain or complex carbs",
-                            "Colorful vegetables",
-                            "Healthy fat (nuts, seeds, or olive oil)"
-                        ],
-                        steps=[
-                            "Prepare and portion all ingredients.",
-                            "Cook protein and carbs until done.",
-                            "Add vegetables and season lightly.",
-                            "Plate and adjust portion size to fit your daily target."
-                        ],
-                        video_search_url=build_youtube_search_url(f"{meal} healthy recipe")
-                    )
-                )
-
-        advice_text = str(plan_data.get("advice") or "").strip()
-        if not advice_text:
-            advice_text = (
-                "Prioritize whole foods, hydrate well, and keep portions aligned with your calorie target. "
-                "Aim for consistent meal timing and include protein in every meal for better satiety and recovery."
-            )
-
-        return DietPlanResponse(
-            plan=advice_text,
-            daily_calories=to_int(plan_data.get("daily_calories"), 2000),
-            macro_split={
-                "protein": to_float(plan_data.get("protein_percentage"), 30),
-                "carbs": to_float(plan_data.get("carbs_percentage"), 40),
-                "fat": to_float(plan_data.get("fat_percentage"), 30)
-            },
-            meal_suggestions=meal_suggestions,
-            meal_recipes=meal_recipes
-        )
+        plan = build_diet_plan(plan_data)
     except Exception as e:
         logging.error(f"Diet plan generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Plan generation failed: {str(e)}")
 
+    # Default plans (Gemini failed or returned no JSON object) are not worth sharing
+    if plan_data:
+        await diet_plan_cache.set(cache_key, plan.model_dump())
+    return plan
+
 # Analytics Routes
 
 
 @api_router.get("/analytics/progress")
-async def get_progress_analytics(days: int = 30, user_id: str = Depends(get_current_user)):
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-    cutoff_iso = cutoff_date.isoformat()
+async def get_progress_analytics(days: int = 30, user_id: str = Depends(get_current_user),
+                                 zone: tzinfo = Depends(get_user_zone)):
+    # Today plus the ``days`` local days before it, bucketed like the summaries
+    first_day = days_back(days + 1, zone)
+    cutoff_date, _ = day_bounds(first_day, zone)
 
     weight_logs = await db.weight_logs.find(
-        {"user_id": user_id, "timestamp": {"$gte": cutoff_iso}},
+        {"user_id": user_id, "timestamp": {"$gte": cutoff_date}},
         {"_id": 0}
     ).sort("timestamp", 1).to_list(1000)
 
-    food_logs = await db.food_logs.find(
-        {"user_id": user_id, "timestamp": {"$gte": cutoff_iso}},
-        {"_id": 0}
-    ).to_list(10000)
+    summaries = await get_summaries(db, user_id, first_day.isoformat())
 
-    workout_logs = await db.workout_logs.find(
-        {"user_id": user_id, "timestamp": {"$gte": cutoff_iso}},
-        {"_id": 0}
-    ).to_list(10000)
-
-    daily_calories = {}
-    for log in food_logs:
-        date_str = log['timestamp'][:10]
-        if date_str not in daily_calories:
-            daily_calories[date_str] = {"calories": 0, "protein": 0, "carbs": 0, "fat": 0}
-        daily_calories[date_str]["calories"] += log['calories']
-        daily_calories[date_str]["protein"] += log['protein']
-        daily_calories[date_str]["carbs"] += log['carbs']
-        daily_calories[date_str]["fat"] += log['fat']
+    daily_calories = {
+        summary["date"]: {field: summary.get(field, 0) for field in ("calories", "protein", "carbs", "fat")}
+        for summary in summaries
+        if summary.get("food_count", 0) > 0
+    }
+    total_workouts = sum(summary.get("workout_count", 0) for summary in summaries)
 
     return {
         "weight_trend": weight_logs,
         "daily_nutrition": daily_calories,
-        "total_workouts": len(workout_logs),
+        "total_workouts": total_workouts,
         "avg_daily_calories": sum(d["calories"] for d in daily_calories.values()) / max(len(daily_calories), 1)
     }
 
 
-@api_router.get("/analytics/insights")
-async def get_health_insights(user_id: str = Depends(get_current_user)):
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
-    cutoff_iso = cutoff_date.isoformat()
+async def build_health_insights(user_id: str, zone: Optional[tzinfo] = None) -> Dict:
+    summaries = await get_summaries(db, user_id, week_start(zone=zone))
 
-    food_logs = await db.food_logs.find(
-        {"user_id": user_id, "timestamp": {"$gte": cutoff_iso}},
-        {"_id": 0}
-    ).to_list(10000)
-
-    water_logs = await db.water_logs.find(
-        {"user_id": user_id, "timestamp": {"$gte": cutoff_iso}},
-        {"_id": 0}
-    ).to_list(10000)
-
-    total_protein = sum(log['protein'] for log in food_logs)
-    total_water = sum(log['amount_ml'] for log in water_logs)
+    total_protein = sum(summary.get('protein', 0) for summary in summaries)
+    total_water = sum(summary.get('water_ml', 0) for summary in summaries)
     avg_daily_protein = total_protein / 7
     avg_daily_water = total_water / 7
 
@@ -949,6 +1477,53 @@ async def get_health_insights(user_id: str = Depends(get_current_user)):
 
     return {"insights": insights, "weekly_summary": {"avg_protein": avg_daily_protein, "avg_water": avg_daily_water}}
 
+
+@api_router.get("/analytics/insights")
+async def get_health_insights(user_id: str = Depends(get_current_user), zone: tzinfo = Depends(get_user_zone)):
+    return await build_health_insights(user_id, zone)
+
+# Dashboard Routes
+
+# Only the fields the dashboard renders; full documents stay on the per-log routes
+DASHBOARD_PROJECTIONS = {
+    "food_logs": {"id": 1, "food_name": 1, "calories": 1, "protein": 1, "carbs": 1, "fat": 1,
+                  "meal_type": 1, "timestamp": 1},
+    "water_logs": {"id": 1, "amount_ml": 1, "timestamp": 1},
+    "workout_logs": {"id": 1, "exercise_name": 1, "sets": 1, "reps": 1, "duration_minutes": 1,
+                     "calories_burned": 1, "timestamp": 1},
+}
+
+
+@api_router.get("/dashboard/today")
+async def get_dashboard(date: Optional[str] = None, user_id: str = Depends(get_current_user),
+                        zone: tzinfo = Depends(get_user_zone)):
+    """Today's logs, totals and weekly insights in one round trip.
+
+    Replaces the four requests the dashboards used to make; the Mongo reads
+    run concurrently. ``date`` (YYYY-MM-DD) defaults to the user's current
+    local day.
+    """
+    date = date or local_today(zone)
+    food_logs, water_logs, workout_logs, insights = await asyncio.gather(
+        fetch_day_logs("food_logs", user_id, date, DASHBOARD_PROJECTIONS["food_logs"], zone),
+        fetch_day_logs("water_logs", user_id, date, DASHBOARD_PROJECTIONS["water_logs"], zone),
+        fetch_day_logs("workout_logs", user_id, date, DASHBOARD_PROJECTIONS["workout_logs"], zone),
+        build_health_insights(user_id, zone),
+    )
+
+    totals = {field: sum(log.get(field) or 0 for log in food_logs) for field in ("calories", "protein", "carbs", "fat")}
+    totals["water_ml"] = sum(log.get("amount_ml") or 0 for log in water_logs)
+    totals["workouts"] = len(workout_logs)
+
+    return {
+        "date": date,
+        "totals": totals,
+        "food_logs": food_logs,
+        "water_logs": water_logs,
+        "workout_logs": workout_logs,
+        **insights,
+    }
+
 # Calculator Routes
 
 
@@ -1007,12 +1582,17 @@ async def calculate_tdee(data: CalculatorInput):
 # Profile Routes
 
 
+@http_cache.validator("/api/profile")
+async def profile_validator(request: Request) -> Optional[Validator]:
+    return await user_validator(request, "profile")
+
+
 @api_router.get("/profile")
 async def get_profile(user_id: str = Depends(get_current_user)):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+    user = await user_profiles.get(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return public_profile(user)
 
 
 @api_router.put("/profile")
@@ -1022,14 +1602,14 @@ async def update_profile(profile_data: ProfileUpdate, user_id: str = Depends(get
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
 
-    result = await db.users.update_one(
-        {"id": user_id},
-        {"$set": update_data}
-    )
-
-    if result.matched_count == 0:
+    previous = await user_profiles.get(user_id) if "timezone" in update_data else None
+    if await user_profiles.update(user_id, update_data) is None:
         raise HTTPException(status_code=404, detail="User not found")
 
+    if previous is not None and zone_key(get_zone(previous.get("timezone"))) != update_data["timezone"]:
+        # Summaries are keyed by local day; re-bucket this user's history in the new zone
+        await rebuild_user(db, user_id)
+
     return {"message": "Profile updated successfully"}
 
 # ==================== CHATBOT ROUTES ====================
@@ -1115,51 +1695,23 @@ You take a mind-body-soul approach to fitness and health.
 
 PERSONA_PROMPTS = {k: v["prompt"] for k, v in COACH_PROFILES.items()}
 
-SENTIMENT_KEYWORDS = {
-    "positive": ["great", "awesome", "love", "amazing", "happy", "excited", "wonderful",
-                 "fantastic", "good", "excellent", "progress", "achieved", "proud", "strong",
-                 "motivated", "energized", "thanks", "thank", "perfect", "yes", "yeah", "crushed"],
-    "negative": ["tired", "exhausted", "hate", "can't", "quit", "give up", "sore", "pain",
-                 "frustrated", "angry", "disappointed", "failed", "weak", "sad", "depressed",
-                 "unmotivated", "lazy", "bored", "hurt", "injury", "sick", "stressed", "anxious"],
-    "curious": ["how", "what", "why", "when", "should", "could", "explain", "tell me",
-                "help", "advice", "recommend", "suggest", "best", "difference", "?"],
-    "greeting": ["hi", "hello", "hey", "sup", "yo", "morning", "evening", "night",
-                 "what's up", "howdy", "greetings"]
-}
-
 
-def analyze_sentiment(text: str) -> Dict:
-    """Fast keyword-based sentiment analysis for real-time coach reactions."""
-    text_lower = text.lower()
-    scores = {}
-    for sentiment, keywords in SENTIMENT_KEYWORDS.items():
-        score = sum(1 for kw in keywords if kw in text_lower)
-        scores[sentiment] = score
-
-    max_sentiment = max(scores, key=scores.get)
-    if scores[max_sentiment] == 0:
-        max_sentiment = "neutral"
-
-    # Determine animation mood for 3D coach
-    mood_map = {
-        "positive": "celebrating",
-        "negative": "encouraging",
-        "curious": "thinking",
-        "greeting": "waving",
-        "neutral": "idle"
-    }
+def build_coach_prefix(coach: Dict) -> str:
+    """The part of every chat prompt that only depends on the coach."""
+    return (
+        f"{coach['prompt']}\n\n"
+        f"You are a fitness and health chatbot named {coach['name']}. "
+        f"You know about workouts, nutrition, supplements, recovery, "
+        f"mental health related to fitness, and general wellness.\n\n"
+        f"Respond naturally in character as {coach['name']}. "
+        f"Keep responses helpful and conversational (2-4 paragraphs max).\n"
+        f"If the user asks something unrelated to health/fitness, "
+        f"gently steer the conversation back while being helpful.\n"
+        f"Always remember you're chatting with a real person - be personable!"
+    )
 
-    # Determine energy level (1-5)
-    total_hits = sum(scores.values())
-    energy = min(5, max(1, total_hits))
 
-    return {
-        "sentiment": max_sentiment,
-        "mood": mood_map.get(max_sentiment, "idle"),
-        "energy": energy,
-        "scores": scores
-    }
+COACH_PREFIXES = {k: build_coach_prefix(v) for k, v in COACH_PROFILES.items()}
 
 
 @api_router.post("/chatbot/sentiment")
@@ -1169,20 +1721,40 @@ async def get_sentiment(data: SentimentRequest):
     return result
 
 
+SENTIMENT_BATCH_MAX = int(os.environ.get('SENTIMENT_BATCH_MAX', '200'))
+
+
+@api_router.post("/chatbot/sentiment/batch")
+async def get_sentiment_batch(data: SentimentBatchRequest):
+    """Score many texts in one request, e.g. to replay coach reactions; results keep input order."""
+    if len(data.texts) > SENTIMENT_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {SENTIMENT_BATCH_MAX} texts per batch")
+    return {"results": analyze_many(data.texts)}
+
+
+COACH_SUMMARIES = [
+    {
+        "id": cid,
+        "name": profile["name"],
+        "gender": profile["gender"],
+        "tagline": profile["tagline"],
+        "avatar_style": profile["avatar_style"],
+        "accent_color": profile["accent_color"]
+    }
+    for cid, profile in COACH_PROFILES.items()
+]
+COACHES_ETAG = weak_etag("coaches", COACH_SUMMARIES)
+
+
+@http_cache.validator("/api/chatbot/coaches")
+async def coaches_validator(request: Request) -> Validator:
+    return Validator(COACHES_ETAG, STATIC_CACHE_CONTROL)
+
+
 @api_router.get("/chatbot/coaches")
 async def get_coaches():
     """Return all available coaches with full profile info."""
-    coaches = []
-    for cid, profile in COACH_PROFILES.items():
-        coaches.append({
-            "id": cid,
-            "name": profile["name"],
-            "gender": profile["gender"],
-            "tagline": profile["tagline"],
-            "avatar_style": profile["avatar_style"],
-            "accent_color": profile["accent_color"]
-        })
-    return {"coaches": coaches}
+    return {"coaches": COACH_SUMMARIES}
 
 
 @api_router.put("/chatbot/persona")
@@ -1194,144 +1766,215 @@ async def set_chatbot_persona(data: ChatPersonaUpdate, user_id: str = Depends(ge
             detail=f"Invalid coach. Choose from: {list(COACH_PROFILES.keys())}"
         )
 
-    await db.users.update_one(
-        {"id": user_id},
-        {"$set": {"chatbot_persona": data.persona}}
-    )
+    await user_profiles.update(user_id, {"chatbot_persona": data.persona})
     coach = COACH_PROFILES[data.persona]
     return {"message": f"Coach set to {coach['name']}", "persona": data.persona}
 
 
+@http_cache.validator("/api/chatbot/persona")
+async def persona_validator(request: Request) -> Optional[Validator]:
+    return await user_validator(request, "persona")
+
+
 @api_router.get("/chatbot/persona")
 async def get_chatbot_persona(user_id: str = Depends(get_current_user)):
     """Get user's selected chatbot coach."""
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "chatbot_persona": 1})
+    user = await user_profiles.get(user_id)
     persona = user.get("chatbot_persona", "alex") if user else "alex"
     return {"persona": persona}
 
 
+async def prepare_chat_turn(data: ChatMessage, user_id: str) -> ChatTurn:
+    """Resolve the coach, score the message and build the full Gemini prompt."""
+    user = await user_profiles.get(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    persona = data.persona or user.get("chatbot_persona", "alex")
+    if persona not in COACH_PROFILES:
+        persona = "alex"
+    coach = COACH_PROFILES[persona]
+
+    # Sentiment analysis on user input
+    sentiment_data = analyze_sentiment(data.message)
+
+    # Gather user context
+    user_context = ""
+    if user.get("name"):
+        user_context += f"User's name: {user['name']}. "
+    if user.get("current_weight"):
+        user_context += f"Current weight: {user['current_weight']}kg. "
+    if user.get("goal_weight"):
+        user_context += f"Goal weight: {user['goal_weight']}kg. "
+    if user.get("goal"):
+        user_context += f"Fitness goal: {user['goal']}. "
+    if user.get("activity_level"):
+        user_context += f"Activity level: {user['activity_level']}. "
+
+    # Summary of older turns plus the recent messages that fit the token budget
+    memory = await chat_memory.load(user_id)
+    summary_text = f"CONVERSATION SUMMARY (earlier messages):\n{memory.summary}\n\n" if memory.summary else ""
+
+    # Enhanced prompt with sentiment awareness
+    sentiment_instruction = ""
+    if sentiment_data["sentiment"] == "positive":
+        sentiment_instruction = "The user seems happy and positive. Match their energy! Celebrate with them."
+    elif sentiment_data["sentiment"] == "negative":
+        sentiment_instruction = (
+            "The user seems frustrated, tired, or down. "
+            "Respond with extra empathy and encouragement in your style. Lift them up."
+        )
+    elif sentiment_data["sentiment"] == "curious":
+        sentiment_instruction = "The user is asking a question. Be thorough and helpful with your answer."
+    elif sentiment_data["sentiment"] == "greeting":
+        sentiment_instruction = "The user is greeting you. Be warm and welcoming in your character's style."
+
+    # The coach persona and response rules travel as the model's cached prefix (COACH_PREFIXES)
+    full_prompt = (
+        f"SENTIMENT CONTEXT: {sentiment_instruction}\n\n"
+        f"USER CONTEXT: {user_context}\n\n"
+        f"{summary_text}"
+        f"CONVERSATION HISTORY:\n{memory.history_text}\n\n"
+        f"User: {data.message}"
+    )
+
+    chat_memory.record_prompt(COACH_PREFIXES[persona] + full_prompt, memory)
+
+    return ChatTurn(
+        persona=persona,
+        coach_name=coach["name"],
+        user_sentiment=sentiment_data,
+        prompt=full_prompt
+    )
+
+
+async def save_chat_turn(user_id: str, turn: ChatTurn, message: str, bot_reply: str,
+                         reply_sentiment: Dict, now: datetime):
+    """Persist the user message and coach reply to chat history."""
+    await db.chat_history.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "role": "user",
+            "content": message,
+            "persona": turn.persona,
+            **history_fields(turn.user_sentiment),
+            "timestamp": now
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "role": "assistant",
+            "content": bot_reply,
+            "persona": turn.persona,
+            **history_fields(reply_sentiment),
+            "timestamp": now + timedelta(seconds=1)
+        }
+    ])
+    chat_memory.schedule_update(user_id)
+
+
+def format_sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @api_router.post("/chatbot/message")
 async def send_chat_message(data: ChatMessage, user_id: str = Depends(get_current_user)):
     """Send a message to the fitness chatbot and get a response with sentiment."""
     try:
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        persona = data.persona or user.get("chatbot_persona", "alex")
-        coach = COACH_PROFILES.get(persona, COACH_PROFILES["alex"])
-        persona_prompt = coach["prompt"]
-
-        # Sentiment analysis on user input
-        sentiment_data = analyze_sentiment(data.message)
-
-        # Gather user context
-        user_context = ""
-        if user.get("name"):
-            user_context += f"User's name: {user['name']}. "
-        if user.get("current_weight"):
-            user_context += f"Current weight: {user['current_weight']}kg. "
-        if user.get("goal_weight"):
-            user_context += f"Goal weight: {user['goal_weight']}kg. "
-        if user.get("goal"):
-            user_context += f"Fitness goal: {user['goal']}. "
-        if user.get("activity_level"):
-            user_context += f"Activity level: {user['activity_level']}. "
-
-        # Get recent chat history
-        recent_history = await db.chat_history.find(
-            {"user_id": user_id}
-        ).sort("timestamp", -1).limit(10).to_list(10)
-        recent_history.reverse()
-
-        history_text = ""
-        for msg in recent_history:
-            role = "User" if msg["role"] == "user" else "Assistant"
-            history_text += f"{role}: {msg['content']}\n"
-
-        model = genai.GenerativeModel("gemini-2.5-flash")
-
-        # Enhanced prompt with sentiment awareness
-        sentiment_instruction = ""
-        if sentiment_data["sentiment"] == "positive":
-            sentiment_instruction = "The user seems happy and positive. Match their energy! Celebrate with them."
-        elif sentiment_data["sentiment"] == "negative":
-            sentiment_instruction = (
-                "The user seems frustrated, tired, or down. "
-                "Respond with extra empathy and encouragement in your style. Lift them up."
-            )
-        elif sentiment_data["sentiment"] == "curious":
-            sentiment_instruction = "The user is asking a question. Be thorough and helpful with your answer."
-        elif sentiment_data["sentiment"] == "greeting":
-            sentiment_instruction = "The user is greeting you. Be warm and welcoming in your character's style."
-
-        full_prompt = (
-            f"{persona_prompt}\n\n"
-            f"You are a fitness and health chatbot named {coach['name']}. "
-            f"You know about workouts, nutrition, supplements, recovery, "
-            f"mental health related to fitness, and general wellness.\n\n"
-            f"SENTIMENT CONTEXT: {sentiment_instruction}\n\n"
-            f"USER CONTEXT: {user_context}\n\n"
-            f"CONVERSATION HISTORY:\n{history_text}\n\n"
-            f"User: {data.message}\n\n"
-            f"Respond naturally in character as {coach['name']}. "
-            f"Keep responses helpful and conversational (2-4 paragraphs max).\n"
-            f"If the user asks something unrelated to health/fitness, "
-            f"gently steer the conversation back while being helpful.\n"
-            f"Always remember you're chatting with a real person - be personable!"
-        )
+        turn = await prepare_chat_turn(data, user_id)
 
-        response = model.generate_content(full_prompt)
-        bot_reply = response.text.strip()
+        bot_reply = await llm_gateway.generate(
+            turn.prompt,
+            model=persona_prefixes.model_for(turn.persona),
+            system_instruction=COACH_PREFIXES[turn.persona]
+        )
 
         # Analyze sentiment of bot reply too for animations
         reply_sentiment = analyze_sentiment(bot_reply)
 
         # Save both messages to history
         now = datetime.now(timezone.utc)
-        await db.chat_history.insert_many([
-            {
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "role": "user",
-                "content": data.message,
-                "persona": persona,
-                "sentiment": sentiment_data["sentiment"],
-                "timestamp": now.isoformat()
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "role": "assistant",
-                "content": bot_reply,
-                "persona": persona,
-                "sentiment": reply_sentiment["sentiment"],
-                "timestamp": (now + timedelta(seconds=1)).isoformat()
-            }
-        ])
+        await save_chat_turn(user_id, turn, data.message, bot_reply, reply_sentiment, now)
 
         return {
             "reply": bot_reply,
-            "persona": persona,
-            "coach_name": coach["name"],
+            "persona": turn.persona,
+            "coach_name": turn.coach_name,
             "timestamp": now.isoformat(),
-            "user_sentiment": sentiment_data,
+            "user_sentiment": turn.user_sentiment,
             "reply_sentiment": reply_sentiment
         }
 
+    except LLMTimeoutError as e:
+        logging.error(f"Chatbot timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail="Coach is taking too long to respond, please try again")
     except Exception as e:
         logging.error(f"Chatbot error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
 
+@api_router.post("/chatbot/message/stream")
+async def stream_chat_message(data: ChatMessage, user_id: str = Depends(get_current_user)):
+    """Stream the coach reply as server-sent events.
+
+    Events, in order: ``user_sentiment`` (immediately), ``token`` per text
+    chunk, then ``reply_sentiment`` and ``done`` once the turn has been saved.
+    A failure mid-stream sends an ``error`` event and nothing is saved.
+    """
+    turn = await prepare_chat_turn(data, user_id)
+
+    async def events():
+        yield format_sse("user_sentiment", {
+            **turn.user_sentiment,
+            "persona": turn.persona,
+            "coach_name": turn.coach_name
+        })
+
+        parts = []
+        try:
+            async for text in llm_gateway.stream(
+                turn.prompt,
+                model=persona_prefixes.model_for(turn.persona),
+                system_instruction=COACH_PREFIXES[turn.persona]
+            ):
+                parts.append(text)
+                yield format_sse("token", {"text": text})
+        except LLMTimeoutError as e:
+            logging.error(f"Chatbot stream timed out: {str(e)}")
+            yield format_sse("error", {"detail": "Coach is taking too long to respond, please try again"})
+            return
+        except Exception as e:
+            logging.error(f"Chatbot stream error: {str(e)}")
+            yield format_sse("error", {"detail": f"Chat failed: {str(e)}"})
+            return
+
+        bot_reply = "".join(parts).strip()
+        reply_sentiment = analyze_sentiment(bot_reply)
+        now = datetime.now(timezone.utc)
+        await save_chat_turn(user_id, turn, data.message, bot_reply, reply_sentiment, now)
+
+        yield format_sse("reply_sentiment", reply_sentiment)
+        yield format_sse("done", {"reply": bot_reply, "timestamp": now.isoformat()})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @api_router.get("/chatbot/history")
 async def get_chat_history(limit: int = 50, user_id: str = Depends(get_current_user)):
-    """Get chat history for the user."""
+    """Get chat history for the user, each message with its stored sentiment, mood and energy."""
     messages = await db.chat_history.find(
-        {"user_id": user_id},
-        {"_id": 0}
+        {"user_id": user_id}
     ).sort("timestamp", -1).limit(limit).to_list(limit)
     messages.reverse()
+    # Messages saved before mood was stored are scored once here and written back
+    writes = backfill_messages(messages)
+    if writes:
+        await db.chat_history.bulk_write(writes, ordered=False)
     return {"messages": messages}
 
 
@@ -1339,6 +1982,7 @@ async def get_chat_history(limit: int = 50, user_id: str = Depends(get_current_u
 async def clear_chat_history(user_id: str = Depends(get_current_user)):
     """Clear all chat history for the user."""
     await db.chat_history.delete_many({"user_id": user_id})
+    await chat_memory.clear(user_id)
     return {"message": "Chat history cleared"}
 
 
@@ -1363,6 +2007,23 @@ async def health_check():
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
+
+@app.get("/metrics")
+async def metrics():
+    """Process-level counters for the LLM gateway, caches and auth helpers."""
+    return {
+        "llm_gateway": llm_gateway.stats(),
+        "food_analysis_cache": food_analysis_cache.stats(),
+        "diet_plan_cache": diet_plan_cache.stats(),
+        "food_image_hashes": food_image_hashes.stats(),
+        "password_hasher": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "user_profile_cache": user_profiles.cache.stats(),
+        "chat_memory": chat_memory.stats(),
+        "persona_prefixes": persona_prefixes.stats(),
+        "http_cache": http_cache.stats(),
+    }
+
 app.include_router(api_router)
 
 cors_origins = [
@@ -1373,12 +2034,16 @@ cors_origins = [
 if not cors_origins:
     cors_origins = ['*']
 
+# Innermost, so 304s still pass through CORS
+app.add_middleware(ConditionalGetMiddleware, registry=http_cache)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.add_middleware(
@@ -0,0 +1,112 @@
+"""Cache of already-verified JWTs.
+
+Every authenticated request used to run a full ``jwt.decode`` (parse plus
+HMAC check) even though a dashboard load sends the same token to several
+endpoints at once. :class:`TokenCache` remembers the decoded ``user_id`` and
+``exp`` of tokens that passed verification, keyed on the token's SHA-256
+digest so raw tokens are never held in memory. Entries are bounded by an LRU
+limit and dropped once the token expires.
+
+:meth:`TokenCache.revoke` is an internal hook that rejects a token in this
+worker until it would have expired anyway. It is process-local and lost on
+restart, so it is not exposed as a logout route: signing out means the
+client discards its token, and nothing here claims server-side revocation.
+"""
+import hashlib
+import heapq
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', '10000'))
+
+
+class TokenCache:
+    """Bounded LRU of ``sha256(token) -> (user_id, exp)`` for verified tokens."""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._expiry: List[Tuple[float, bytes]] = []
+        self._revoked: Dict[bytes, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """The cached ``user_id`` for a token digest, or None if unknown or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        user_id, exp = entry
+        if exp <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user_id
+
+    def put(self, key: bytes, user_id: str, exp: float) -> None:
+        if self.max_entries <= 0 or key in self._revoked:
+            return
+        self._purge_expired()
+        self._entries[key] = (user_id, exp)
+        self._entries.move_to_end(key)
+        heapq.heappush(self._expiry, (exp, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def revoke(self, token: str, exp: float) -> None:
+        """Reject ``token`` from now on.
+
+        ``exp`` bounds how long the revocation is kept; the token's own expiry
+        is used when it is cached, since it is rejected after that anyway.
+        """
+        key = self.key(token)
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            exp = cached[1]
+        self._revoked[key] = exp
+        heapq.heappush(self._expiry, (exp, key))
+
+    def is_revoked(self, key: bytes) -> bool:
+        return key in self._revoked
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        while self._expiry and self._expiry[0][0] <= now:
+            exp, key = heapq.heappop(self._expiry)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+            if self._revoked.get(key, now + 1) <= now:
+                del self._revoked[key]
+        # Entries evicted by the LRU limit leave stale heap items behind
+        if len(self._expiry) > 4 * (self.max_entries + len(self._revoked)) + 1024:
+            live = [(entry[1], key) for key, entry in self._entries.items()]
+            live += [(exp, key) for key, exp in self._revoked.items()]
+            heapq.heapify(live)
+            self._expiry = live
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "revoked": len(self._revoked),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache()
@@ -0,0 +1,68 @@
+"""Write-through cache of user profile documents.
+
+The chat routes, ``/profile`` and ``/chatbot/persona`` all read the same
+``users`` document, so a chat turn used to start with a Mongo round trip just
+to rebuild the coach's user context. :class:`UserProfileStore` serves those
+reads from a :class:`cache.ResultCache` and refreshes the cached copy from
+the write itself (``find_one_and_update`` returns the new document), so a
+profile edit is visible to the next read without waiting for the TTL.
+
+Every update also increments the document's ``cache_version``, which
+``http_cache`` uses as the ETag version of ``/profile`` and
+``/chatbot/persona``, so a client's copy is stale exactly when a write
+happened. It is a server-side detail: routes returning the document pass it
+through :func:`public_profile`.
+
+Cached documents never include the password hash. With several workers use
+a shared backend (``redis``); local tiers in other workers only see an
+update once their entry expires.
+"""
+from typing import Dict, Optional
+
+from pymongo import ReturnDocument
+
+from cache import ResultCache
+
+PROFILE_PROJECTION = {"_id": 0, "password": 0}
+# Kept on cached documents for the ETag, never sent to clients
+INTERNAL_FIELDS = ("cache_version",)
+
+
+def public_profile(profile: Dict) -> Dict:
+    """``profile`` without :data:`INTERNAL_FIELDS`."""
+    return {key: value for key, value in profile.items() if key not in INTERNAL_FIELDS}
+
+
+class UserProfileStore:
+    """Reads and updates ``users`` documents through a result cache."""
+
+    def __init__(self, collection, cache: ResultCache, ttl_seconds: Optional[float] = None):
+        self.collection = collection
+        self.cache = cache
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, user_id: str) -> Optional[Dict]:
+        profile = await self.cache.get(user_id)
+        if profile is not None:
+            return profile
+        profile = await self.collection.find_one({"id": user_id}, PROFILE_PROJECTION)
+        if profile is not None:
+            await self.cache.set(user_id, profile, self.ttl_seconds)
+        return profile
+
+    async def update(self, user_id: str, fields: Dict) -> Optional[Dict]:
+        """``$set`` ``fields``, bump ``cache_version`` and cache the resulting document; None if no such user."""
+        profile = await self.collection.find_one_and_update(
+            {"id": user_id},
+            {"$set": fields, "$inc": {"cache_version": 1}},
+            projection=PROFILE_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if profile is None:
+            await self.cache.delete(user_id)
+        else:
+            await self.cache.set(user_id, profile, self.ttl_seconds)
+        return profile
+
+    async def invalidate(self, user_id: str) -> None:
+        await self.cache.delete(user_id)
@@ -0,0 +1,111 @@
+"""Immutable, indexed workout catalog served from memory.
+
+The library used to be a list literal rebuilt and filtered with list
+comprehensions on every request. It is now loaded once at startup, from
+``data/workout_library.json`` or a Mongo collection, into a
+:class:`WorkoutCatalog`. The catalog holds:
+
+- one posting set per value of ``muscle_group``, ``difficulty`` and
+  ``equipment``; a filtered query intersects the sets of the given filters;
+- an inverted index of title and description words for ``q``; every query
+  word must prefix-match a word of the entry;
+- each entry pre-serialized to JSON, so a response body is a join of
+  fragments, with no per-request validation or encoding;
+- a content hash, ``version``, from which ``http_cache`` derives response
+  ETags.
+
+The catalog never changes after it is built; loading a new one means
+building a new catalog and swapping the reference.
+"""
+import bisect
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+DATA_FILE = Path(__file__).parent / "data" / "workout_library.json"
+
+INDEXED_FIELDS = ("muscle_group", "difficulty", "equipment")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def words(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower())
+
+
+class WorkoutCatalog:
+    """Read-only workout entries with prebuilt field and text indexes."""
+
+    def __init__(self, entries: Iterable[Dict]):
+        self.entries: Tuple[Dict, ...] = tuple(entries)
+        self._json: Tuple[bytes, ...] = tuple(
+            json.dumps(entry, separators=(",", ":"), ensure_ascii=False).encode() for entry in self.entries
+        )
+        self.version = hashlib.sha256(b"\n".join(self._json)).hexdigest()[:16]
+
+        fields: Dict[str, Dict[str, set]] = {field: {} for field in INDEXED_FIELDS}
+        text: Dict[str, set] = {}
+        for position, entry in enumerate(self.entries):
+            for field in INDEXED_FIELDS:
+                fields[field].setdefault(entry.get(field), set()).add(position)
+            for word in words(f"{entry.get('title', '')} {entry.get('description', '')}"):
+                text.setdefault(word, set()).add(position)
+        self._fields: Dict[str, Dict[str, FrozenSet[int]]] = {
+            field: {value: frozenset(positions) for value, positions in index.items()}
+            for field, index in fields.items()
+        }
+        self._text: Dict[str, FrozenSet[int]] = {word: frozenset(p) for word, p in text.items()}
+        self._vocabulary: Tuple[str, ...] = tuple(sorted(self._text))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def values(self, field: str) -> List[str]:
+        """Distinct values of an indexed field, e.g. for filter menus."""
+        return sorted(value for value in self._fields[field] if value is not None)
+
+    def _prefixed(self, prefix: str) -> FrozenSet[int]:
+        """Entries with any word starting with ``prefix``."""
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        matched = set()
+        for word in self._vocabulary[start:]:
+            if not word.startswith(prefix):
+                break
+            matched |= self._text[word]
+        return frozenset(matched)
+
+    def search(self, q: Optional[str] = None, limit: Optional[int] = None, **filters: Optional[str]) -> List[int]:
+        """Positions of matching entries in catalog order.
+
+        ``filters`` are exact matches on :data:`INDEXED_FIELDS`; ``None`` or an
+        empty string means any value. ``q`` matches entries containing every word as a prefix.
+        """
+        candidates: Optional[FrozenSet[int]] = None
+        for field, value in filters.items():
+            if field not in self._fields:
+                raise ValueError(f"Not an indexed field: {field}")
+            if not value:
+                continue
+            postings = self._fields[field].get(value, frozenset())
+            candidates = postings if candidates is None else candidates & postings
+        for word in words(q or ""):
+            postings = self._prefixed(word)
+            candidates = postings if candidates is None else candidates & postings
+        positions = range(len(self.entries)) if candidates is None else sorted(candidates)
+        return list(positions[:limit] if limit is not None else positions)
+
+    def render(self, positions: List[int]) -> bytes:
+        """JSON array of the entries at ``positions``."""
+        return b"[" + b",".join(self._json[p] for p in positions) + b"]"
+
+
+def load_file(path: Path = DATA_FILE) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def load_collection(collection) -> List[Dict]:
+    """Catalog entries stored in Mongo, in insertion order."""
+    return await collection.find({}, {"_id": 0}).sort("_id", 1).to_list(None)
+
@@ -3,7 +3,7 @@ import sys
 import json
 import base64
 import io
-from datetime import datetime
+from datetime import datetime, timedelta
 from PIL import Image
 import time
 
@@ -148,6 +148,29 @@ class SmartNutritionAPITester:
             self.log_result("Food Analysis", False, error_msg=str(e))
             return False
 
+    def test_food_analysis_batch(self):
+        """Test batch AI food image analysis with one invalid upload"""
+        try:
+            img_bytes = self.create_test_image()
+            files = [
+                ('files', ('meal_1.jpg', img_bytes, 'image/jpeg')),
+                ('files', ('meal_2.jpg', img_bytes, 'image/jpeg')),
+                ('files', ('not_an_image.jpg', b'not an image', 'image/jpeg')),
+            ]
+
+            success, response_data, status_code = self.make_request('POST', 'food/analyze/batch', files=files, expected_status=200)
+
+            results = response_data.get('results', [])
+            if success and len(results) == 3 and results[2].get('status') == 'error':
+                self.log_result("Batch Food Analysis", True, {"message": f"{response_data['succeeded']} analyzed, {response_data['failed']} failed, {response_data['model_calls']} model calls"})
+                return True
+            else:
+                self.log_result("Batch Food Analysis", False, error_msg=f"Status: {status_code}, Response: {response_data}")
+                return False
+        except Exception as e:
+            self.log_result("Batch Food Analysis", False, error_msg=str(e))
+            return False
+
     def test_food_logging(self):
         """Test manual food logging"""
         data = {
@@ -239,15 +262,78 @@ class SmartNutritionAPITester:
             self.log_result("Get Workout Logs", False, error_msg=f"Status: {status_code}")
             return False
 
+    def test_paginated_logs(self):
+        """Test cursor paging and NDJSON export of workout logs"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        try:
+            first = requests.get(f"{self.base_url}/workout/log", params={"limit": 1}, headers=headers)
+            cursor = first.headers.get('X-Next-Cursor')
+            pages = [first.json()]
+            if cursor:
+                pages.append(requests.get(f"{self.base_url}/workout/log",
+                                          params={"limit": 1, "cursor": cursor}, headers=headers).json())
+            export = requests.get(f"{self.base_url}/workout/log", params={"format": "ndjson"}, headers=headers)
+        except Exception as e:
+            self.log_result("Paginated Logs", False, error_msg=str(e))
+            return False
+
+        ids = [log['id'] for page in pages for log in page]
+        exported = [json.loads(line)['id'] for line in export.text.splitlines() if line]
+        if first.status_code == 200 and len(pages[0]) <= 1 and ids == exported[:len(ids)]:
+            self.log_result("Paginated Logs", True, {"message": f"{len(ids)} logs paged, {len(exported)} exported"})
+            return True
+        else:
+            self.log_result("Paginated Logs", False, error_msg=f"Status: {first.status_code}, Paged: {ids}, Exported: {exported[:len(ids)]}")
+            return False
+
+    def test_log_range(self):
+        """Test a week of food logs grouped by day"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        week_ago = (datetime.now() - timedelta(days=6)).strftime('%Y-%m-%d')
+        success, response_data, status_code = self.make_request('GET', f'food/log?from={week_ago}&to={today}', expected_status=200)
+
+        days = response_data.get('days') if isinstance(response_data, dict) else None
+        if success and isinstance(days, list) and all('totals' in day for day in days):
+            self.log_result("Log Range", True, {"message": f"{len(days)} days with food logs this week"})
+            return True
+        else:
+            self.log_result("Log Range", False, error_msg=f"Status: {status_code}, Response: {response_data}")
+            return False
+
+    def test_offline_sync(self):
+        """Test batched offline sync and idempotent replay"""
+        key = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        data = {"items": [
+            {"type": "water", "idempotency_key": f"water-{key}", "data": {"amount_ml": 250}},
+            {"type": "workout", "idempotency_key": f"workout-{key}",
+             "data": {"exercise_name": "Squats", "sets": 3, "reps": 12, "duration_minutes": 15}},
+        ]}
+
+        success, response_data, status_code = self.make_request('POST', 'sync', data, expected_status=200)
+        replay_success, replay_data, _ = self.make_request('POST', 'sync', data, expected_status=200)
+
+        if success and response_data.get('created') == 2 and replay_success and replay_data.get('duplicates') == 2:
+            self.log_result("Offline Sync", True, {"message": "2 items created, replay reported 2 duplicates"})
+            return True
+        else:
+            self.log_result("Offline Sync", False, error_msg=f"Status: {status_code}, Response: {response_data}, Replay: {replay_data}")
+            return False
+
     def test_workout_library(self):
         """Test workout library"""
         success, response_data, status_code = self.make_request('GET', 'workout/library', expected_status=200)
         
-        if success and isinstance(response_data, list) and len(response_data) > 0:
-            self.log_result("Workout Library", True, {"message": f"Found {len(response_data)} workout videos"})
+        revalidated = None
+        if success:
+            etag = requests.get(f"{self.base_url}/workout/library").headers.get('ETag')
+            revalidated = requests.get(f"{self.base_url}/workout/library",
+                                       headers={'If-None-Match': etag or ''}).status_code
+
+        if success and isinstance(response_data, list) and len(response_data) > 0 and revalidated == 304:
+            self.log_result("Workout Library", True, {"message": f"Found {len(response_data)} workout videos, ETag revalidated"})
             return True
         else:
-            self.log_result("Workout Library", False, error_msg=f"Status: {status_code}")
+            self.log_result("Workout Library", False, error_msg=f"Status: {status_code}, Revalidation: {revalidated}")
             return False
 
     def test_weight_logging(self):
@@ -288,6 +374,19 @@ class SmartNutritionAPITester:
             self.log_result("Health Insights", False, error_msg=f"Status: {status_code}")
             return False
 
+    def test_dashboard(self):
+        """Test aggregated dashboard endpoint"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        success, response_data, status_code = self.make_request('GET', f'dashboard/today?date={today}', expected_status=200)
+
+        if success and 'totals' in response_data and 'insights' in response_data:
+            totals = response_data['totals']
+            self.log_result("Dashboard", True, {"message": f"{totals['calories']:.0f} kcal, {totals['water_ml']:.0f} ml, {totals['workouts']} workouts"})
+            return True
+        else:
+            self.log_result("Dashboard", False, error_msg=f"Status: {status_code}")
+            return False
+
     def test_diet_coach(self):
         """Test AI diet coach"""
         data = {
@@ -308,6 +407,19 @@ class SmartNutritionAPITester:
             self.log_result("AI Diet Coach", False, error_msg=f"Status: {status_code}, Response: {response_data}")
             return False
 
+    def test_sentiment_batch(self):
+        """Test scoring several chat messages in one request"""
+        data = {"texts": ["Hey coach!", "I'm exhausted and sore", "How many rest days should I take?"]}
+        success, response_data, status_code = self.make_request('POST', 'chatbot/sentiment/batch', data, expected_status=200)
+
+        results = response_data.get('results', [])
+        if success and [r.get('sentiment') for r in results] == ['greeting', 'negative', 'curious']:
+            self.log_result("Sentiment Batch", True, {"message": f"Scored {len(results)} texts"})
+            return True
+        else:
+            self.log_result("Sentiment Batch", False, error_msg=f"Status: {status_code}, Response: {response_data}")
+            return False
+
     def test_calculators(self):
         """Test fitness calculators"""
         calc_data = {
@@ -353,7 +465,8 @@ class SmartNutritionAPITester:
             update_data = {
                 "name": "Updated Test User",
                 "age": 26,
-                "current_weight": 69.0
+                "current_weight": 69.0,
+                "timezone": "Asia/Kolkata"
             }
             
             update_success, update_response, _ = self.make_request('PUT', 'profile', update_data, expected_status=200)
@@ -368,6 +481,25 @@ class SmartNutritionAPITester:
             self.log_result("Get Profile", False, error_msg=f"Status: {status_code}")
             return False
 
+    def test_profile_etag(self):
+        """Profile revalidates with 304 until it is updated"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        try:
+            etag = requests.get(f"{self.base_url}/profile", headers=headers).headers.get('ETag')
+            unchanged = requests.get(f"{self.base_url}/profile", headers={**headers, 'If-None-Match': etag or ''})
+            requests.put(f"{self.base_url}/profile", json={"age": 27}, headers=headers)
+            updated = requests.get(f"{self.base_url}/profile", headers={**headers, 'If-None-Match': etag or ''})
+        except Exception as e:
+            self.log_result("Profile ETag", False, error_msg=str(e))
+            return False
+
+        if etag and unchanged.status_code == 304 and updated.status_code == 200:
+            self.log_result("Profile ETag", True, {"message": "304 before update, 200 after"})
+            return True
+        else:
+            self.log_result("Profile ETag", False, error_msg=f"Before: {unchanged.status_code}, After: {updated.status_code}")
+            return False
+
     def run_all_tests(self):
         """Run comprehensive test suite"""
         print("🚀 Starting Smart Nutrition Hub API Test Suite")
@@ -385,6 +517,7 @@ class SmartNutritionAPITester:
         
         # Core Feature Tests
         self.test_food_analysis()
+        self.test_food_analysis_batch()
         food_log_id = self.test_food_logging()
         self.test_get_food_logs()
         
@@ -393,18 +526,24 @@ class SmartNutritionAPITester:
         
         workout_log_id = self.test_workout_logging()
         self.test_get_workout_logs()
+        self.test_paginated_logs()
+        self.test_log_range()
+        self.test_offline_sync()
         self.test_workout_library()
         
         self.test_weight_logging()
         self.test_analytics()
         self.test_health_insights()
+        self.test_dashboard()
         
         # AI Features (may take time)
         self.test_diet_coach()
         
         # Calculators and Profile
+        self.test_sentiment_batch()
         self.test_calculators()
         self.test_profile_management()
+        self.test_profile_etag()
         
         # Print summary
         print("=" * 60)
@@ -318,33 +318,22 @@ export const Dashboard = () => {
 
   const fetchDailyData = async () => {
     try {
-      const today = new Date().toISOString().split('T')[0];
-      
-      const [foodRes, waterRes, workoutRes, insightsRes] = await Promise.all([
-        axios.get(`${API}/food/log?date=${today}`),
-        axios.get(`${API}/water/log?date=${today}`),
-        axios.get(`${API}/workout/log?date=${today}`),
-        axios.get(`${API}/analytics/insights`),
-      ]);
-
-      const foodLogs = foodRes.data;
-      const totalCalories = foodLogs.reduce((sum, log) => sum + log.calories, 0);
-      const totalProtein = foodLogs.reduce((sum, log) => sum + log.protein, 0);
-      const totalCarbs = foodLogs.reduce((sum, log) => sum + log.carbs, 0);
-      const totalFat = foodLogs.reduce((sum, log) => sum + log.fat, 0);
+      const today = new Date().toLocaleDateString('en-CA'); // local YYYY-MM-DD
+      const res = await axios.get(`${API}/dashboard/today?date=${today}`);
+      const { totals } = res.data;
 
       setStats({
-        calories: Math.round(totalCalories),
+        calories: Math.round(totals.calories),
         calorieGoal: 2500,
-        protein: Math.round(totalProtein),
-        carbs: Math.round(totalCarbs),
-        fat: Math.round(totalFat),
-        water: Math.round(waterRes.data.total_ml),
+        protein: Math.round(totals.protein),
+        carbs: Math.round(totals.carbs),
+        fat: Math.round(totals.fat),
+        water: Math.round(totals.water_ml),
         waterGoal: 3000,
-        workouts: workoutRes.data.length,
+        workouts: totals.workouts,
       });
 
-      setInsights(insightsRes.data.insights || []);
+      setInsights(res.data.insights || []);
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
     } finally {
@@ -34,6 +34,8 @@ export const DietCoach = () => {
         goal: formData.goal,
         activity_level: formData.activity_level,
         dietary_preferences: formData.dietary_preferences || undefined,
+        // Generating again with a plan on screen asks for a fresh one instead of the shared cached plan
+        force_refresh: plan !== null,
       });
 
       setPlan(response.data);
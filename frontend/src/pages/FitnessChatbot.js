@@ -269,6 +269,9 @@ export const FitnessChatbot = () => {
         setSelectedCoach(personaRes.data.persona);
         if (historyRes.data.messages?.length > 0) {
           setMessages(historyRes.data.messages);
+          // Resume the coach's last reaction from the mood stored with each message
+          const lastReply = [...historyRes.data.messages].reverse().find((m) => m.role === 'assistant');
+          setCoachMood(lastReply?.mood || 'idle');
         }
       } catch (err) {
         // No saved coach — set default
@@ -34,7 +34,7 @@ export const FoodTracker = () => {
 
   const fetchFoodLogs = async () => {
     try {
-      const today = new Date().toISOString().split('T')[0];
+      const today = new Date().toLocaleDateString('en-CA'); // local YYYY-MM-DD
       const response = await axios.get(`${API}/food/log?date=${today}`);
       setFoodLogs(response.data);
     } catch (error) {
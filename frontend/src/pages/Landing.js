@@ -70,6 +70,7 @@ export const Landing = () => {
             current_weight: parseFloat(formData.current_weight) || undefined,
             goal_weight: parseFloat(formData.goal_weight) || undefined,
             goal: formData.goal,
+            timezone: Intl.DateTimeFormat().resolvedOptions().timeZone,
           };
 
       const response = await axios.post(`${API}${endpoint}`, payload);
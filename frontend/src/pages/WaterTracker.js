@@ -24,7 +24,7 @@ export const WaterTracker = () => {
 
   const fetchWaterLogs = async () => {
     try {
-      const today = new Date().toISOString().split('T')[0];
+      const today = new Date().toLocaleDateString('en-CA'); // local YYYY-MM-DD
       const response = await axios.get(`${API}/water/log?date=${today}`);
       setTotalWater(response.data.total_ml);
     } catch (error) {
@@ -29,7 +29,7 @@ export const WorkoutTracker = () => {
 
   const fetchWorkouts = async () => {
     try {
-      const today = new Date().toISOString().split('T')[0];
+      const today = new Date().toLocaleDateString('en-CA'); // local YYYY-MM-DD
       const response = await axios.get(`${API}/workout/log?date=${today}`);
       setWorkouts(response.data);
     } catch (error) {
@@ -44,6 +44,7 @@ export default function RegisterScreen() {
         name: form.name.trim(),
         email: form.email.trim().toLowerCase(),
         password: form.password,
+        timezone: Intl.DateTimeFormat().resolvedOptions().timeZone,
       });
       Haptics.notificationAsync(Haptics.NotificationFeedbackType.Success);
       router.replace('/(tabs)');
@@ -25,7 +25,7 @@ export default function FoodScreen() {
   const [selectedImage, setSelectedImage] = useState(null);
   const [analysisResult, setAnalysisResult] = useState(null);
 
-  const today = new Date().toISOString().split('T')[0];
+  const today = new Date().toLocaleDateString('en-CA'); // local YYYY-MM-DD
 
   const loadLogs = useCallback(async () => {
     try {
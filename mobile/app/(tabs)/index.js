@@ -8,7 +8,7 @@ import { LinearGradient } from 'expo-linear-gradient';
 import { Ionicons } from '@expo/vector-icons';
 import { router } from 'expo-router';
 import { useAuth } from '../../src/context/AuthContext';
-import { foodAPI, waterAPI, workoutAPI, analyticsAPI } from '../../src/services/api';
+import { dashboardAPI } from '../../src/services/api';
 import StatCard from '../../src/components/StatCard';
 import { Card, SectionHeader, Badge } from '../../src/components/UI';
 import { Colors, Spacing, FontSize, BorderRadius, Shadows } from '../../src/constants/theme';
@@ -24,40 +24,23 @@ export default function DashboardScreen() {
   });
   const [insights, setInsights] = useState([]);
 
-  const today = new Date().toISOString().split('T')[0];
+  const today = new Date().toLocaleDateString('en-CA'); // local YYYY-MM-DD
 
   const loadData = useCallback(async () => {
     try {
-      const [foodRes, waterRes, workoutRes, insightsRes] = await Promise.allSettled([
-        foodAPI.getLogs(today),
-        waterAPI.getLogs(today),
-        workoutAPI.getLogs(today),
-        analyticsAPI.getInsights(),
-      ]);
-
-      const foodLogs = foodRes.status === 'fulfilled' && Array.isArray(foodRes.value.data)
-        ? foodRes.value.data
-        : [];
-      const waterLogs = waterRes.status === 'fulfilled' && Array.isArray(waterRes.value.data)
-        ? waterRes.value.data
-        : [];
-      const workoutLogs = workoutRes.status === 'fulfilled' && Array.isArray(workoutRes.value.data)
-        ? workoutRes.value.data
-        : [];
-      const insightsData = insightsRes.status === 'fulfilled' && Array.isArray(insightsRes.value.data?.insights)
-        ? insightsRes.value.data.insights
-        : [];
+      const res = await dashboardAPI.getToday(today);
+      const totals = res.data?.totals || {};
 
       setTodayStats({
-        calories: Math.round(foodLogs.reduce((sum, l) => sum + (l.calories || 0), 0)),
-        protein: Math.round(foodLogs.reduce((sum, l) => sum + (l.protein || 0), 0)),
-        carbs: Math.round(foodLogs.reduce((sum, l) => sum + (l.carbs || 0), 0)),
-        fat: Math.round(foodLogs.reduce((sum, l) => sum + (l.fat || 0), 0)),
-        water: Math.round(waterLogs.reduce((sum, l) => sum + (l.amount_ml || 0), 0)),
-        workouts: workoutLogs.length,
+        calories: Math.round(totals.calories || 0),
+        protein: Math.round(totals.protein || 0),
+        carbs: Math.round(totals.carbs || 0),
+        fat: Math.round(totals.fat || 0),
+        water: Math.round(totals.water_ml || 0),
+        workouts: totals.workouts || 0,
       });
 
-      setInsights(insightsData);
+      setInsights(Array.isArray(res.data?.insights) ? res.data.insights : []);
     } catch (e) {
       console.log('Dashboard load error:', e);
     }
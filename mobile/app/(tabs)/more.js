@@ -278,6 +278,7 @@ function DietCoachSection({ onClose }) {
     dietary_preferences: '',
   });
   const [plan, setPlan] = useState(null);
+  const [forceRefresh, setForceRefresh] = useState(false);
   const [loading, setLoading] = useState(false);
 
   const goals = ['weight_loss', 'muscle_gain', 'maintenance', 'endurance'];
@@ -296,8 +297,10 @@ function DietCoachSection({ onClose }) {
         ...form,
         current_weight: parseFloat(form.current_weight),
         goal_weight: parseFloat(form.goal_weight),
+        force_refresh: forceRefresh,
       });
       setPlan(res.data);
+      setForceRefresh(false);
       Haptics.notificationAsync(Haptics.NotificationFeedbackType.Success);
     } catch (e) {
       Alert.alert('Error', 'Failed to generate diet plan. Please try again.');
@@ -474,7 +477,7 @@ function DietCoachSection({ onClose }) {
               </>
             )}
 
-            <GradientButton title="Generate New Plan" onPress={() => setPlan(null)} gradient={Colors.gradients.accent} style={{ marginTop: Spacing.xxl }} />
+            <GradientButton title="Generate New Plan" onPress={() => { setPlan(null); setForceRefresh(true); }} gradient={Colors.gradients.accent} style={{ marginTop: Spacing.xxl }} />
           </>
         )}
       </ScrollView>
@@ -27,7 +27,7 @@ export default function WaterScreen() {
   const [adding, setAdding] = useState(false);
   const [deletingId, setDeletingId] = useState(null);
 
-  const today = new Date().toISOString().split('T')[0];
+  const today = new Date().toLocaleDateString('en-CA'); // local YYYY-MM-DD
 
   const loadLogs = useCallback(async () => {
     try {
@@ -22,7 +22,7 @@ export default function WorkoutScreen() {
     duration_minutes: '', calories_burned: '', notes: '',
   });
 
-  const today = new Date().toISOString().split('T')[0];
+  const today = new Date().toLocaleDateString('en-CA'); // local YYYY-MM-DD
 
   const loadData = useCallback(async () => {
     try {
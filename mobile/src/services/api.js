@@ -75,7 +75,9 @@ export const foodAPI = {
     timeout: 60000,
   }),
   createLog: (data) => api.post('/food/log', data),
-  getLogs: (date) => api.get('/food/log', { params: date ? { date } : {} }),
+  getLogs: (date, page = {}) => api.get('/food/log', { params: { ...(date ? { date } : {}), ...page } }),
+  // Inclusive YYYY-MM-DD range; returns { days: [{ date, totals, logs }] }
+  getRange: (from, to) => api.get('/food/log', { params: { from, to } }),
   deleteLog: (id) => api.delete(`/food/log/${id}`),
 };
 
@@ -83,6 +85,7 @@ export const foodAPI = {
 export const waterAPI = {
   createLog: (data) => api.post('/water/log', data),
   deleteLog: (id) => api.delete(`/water/log/${id}`),
+  getRange: (from, to) => api.get('/water/log', { params: { from, to } }),
   getLogs: async (date) => {
     const response = await api.get('/water/log', { params: date ? { date } : {} });
 
@@ -103,13 +106,15 @@ export const waterAPI = {
 // ==================== WEIGHT ====================
 export const weightAPI = {
   createLog: (data) => api.post('/weight/log', data),
-  getLogs: () => api.get('/weight/log'),
+  // page: { limit, cursor }; the next cursor comes back in the X-Next-Cursor header
+  getLogs: (page = {}) => api.get('/weight/log', { params: page }),
 };
 
 // ==================== WORKOUT ====================
 export const workoutAPI = {
   createLog: (data) => api.post('/workout/log', data),
-  getLogs: (date) => api.get('/workout/log', { params: date ? { date } : {} }),
+  getLogs: (date, page = {}) => api.get('/workout/log', { params: { ...(date ? { date } : {}), ...page } }),
+  getRange: (from, to) => api.get('/workout/log', { params: { from, to } }),
   deleteLog: (id) => api.delete(`/workout/log/${id}`),
   getLibrary: (params) => api.get('/workout/library', { params }),
 };
@@ -125,6 +130,18 @@ export const analyticsAPI = {
   getInsights: () => api.get('/analytics/insights'),
 };
 
+// ==================== OFFLINE SYNC ====================
+// items: [{ type: 'food' | 'water' | 'workout' | 'weight', idempotency_key, data, timestamp? }]
+// Safe to retry: items already stored come back with status 'duplicate'.
+export const syncAPI = {
+  push: (items) => api.post('/sync', { items }),
+};
+
+// ==================== DASHBOARD ====================
+export const dashboardAPI = {
+  getToday: (date) => api.get('/dashboard/today', { params: date ? { date } : {} }),
+};
+
 // ==================== CALCULATOR ====================
 export const calculatorAPI = {
   bmi: (data) => api.post('/calculator/bmi', data),
@@ -145,6 +162,8 @@ export const chatbotAPI = {
   setPersona: (data) => api.put('/chatbot/persona', data),
   sendMessage: (data) => api.post('/chatbot/message', data),
   getHistory: (limit = 50) => api.get('/chatbot/history', { params: { limit } }),
+  // Scores many texts in one request; results are in input order
+  analyzeSentiments: (texts) => api.post('/chatbot/sentiment/batch', { texts }),
   clearHistory: () => api.delete('/chatbot/history'),
 };
 
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Backend modules import each other as top-level modules (``from cache import ...``)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+TEST_ENV = {
+    "MONGO_URL": "mongodb://localhost:27017",
+    "DB_NAME": "fittrack_test",
+    "JWT_SECRET": "test-secret-with-at-least-32-bytes!",
+    "GOOGLE_API_KEY": "test-key",
+}
+
+
+def _patch_mongomock_bulk_updates():
+    """pymongo >= 4.11 passes ``sort=`` to bulk update builders, which mongomock 4.3 does not accept."""
+    import mongomock.collection
+
+    original = mongomock.collection.BulkOperationBuilder.add_update
+    if getattr(original, "_accepts_sort", False):
+        return
+
+    def add_update(self, *args, sort=None, **kwargs):
+        return original(self, *args, **kwargs)
+
+    add_update._accepts_sort = True
+    mongomock.collection.BulkOperationBuilder.add_update = add_update
+
+
+@pytest.fixture(scope="session")
+def server():
+    """``server`` imported against an in-memory Mongo; tests that reach Gemini must stub ``llm_gateway``."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import motor.motor_asyncio
+
+    _patch_mongomock_bulk_updates()
+    os.environ.update(TEST_ENV)
+    real_client = motor.motor_asyncio.AsyncIOMotorClient
+    motor.motor_asyncio.AsyncIOMotorClient = lambda *args, **kwargs: mongomock_motor.AsyncMongoMockClient(tz_aware=True)
+    try:
+        import server as server_module
+    finally:
+        motor.motor_asyncio.AsyncIOMotorClient = real_client
+    return server_module
+
+
+@pytest.fixture
+def api(server):
+    """A TestClient over a freshly emptied database."""
+    from fastapi.testclient import TestClient
+
+    from db_indexes import IDEMPOTENCY_INDEX, SYNC_COLLECTIONS
+
+    asyncio.run(server.client.drop_database(TEST_ENV["DB_NAME"]))
+    with TestClient(server.app) as client:
+        # mongomock ignores partialFilterExpression, so the idempotency index
+        # would reject every second log without a key
+        for collection in SYNC_COLLECTIONS:
+            asyncio.run(server.db[collection].drop_index(IDEMPOTENCY_INDEX.document["name"]))
+        yield client
+
+
+@pytest.fixture
+def auth(api):
+    """Authorization headers for a newly registered user."""
+    response = api.post("/api/auth/register", json={
+        "email": "tester@example.com", "password": "pw123456", "name": "Tester",
+        "current_weight": 80, "goal_weight": 75,
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
@@ -0,0 +1,176 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import cache as cache_module
+from cache import MemoryCache, MongoCache, RedisCache, ResultCache, TieredCache, build_cache_backend
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def collection():
+    return mongomock_motor.AsyncMongoMockClient(tz_aware=True)["t"]["cache"]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None):
+        self.data[key] = value.encode()
+        self.ttls[key] = px
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(cache_module, "redis_asyncio", type("redis", (), {"from_url": staticmethod(lambda url: client)}))
+    return client
+
+
+class BrokenBackend:
+    async def get(self, key):
+        raise ConnectionError("down")
+
+    async def set(self, key, value, ttl_seconds=None):
+        raise ConnectionError("down")
+
+    async def delete(self, key):
+        raise ConnectionError("down")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_memory_entries_expire_after_their_ttl(clock):
+    cache = MemoryCache(max_entries=10, ttl_seconds=60)
+    run(cache.set("a", 1))
+    run(cache.set("b", 2, ttl_seconds=5))
+    clock[0] += 10
+    assert run(cache.get("a")) == 1
+    assert run(cache.get("b")) is None
+    clock[0] += 60
+    assert run(cache.get("a")) is None
+    assert len(cache) == 0
+
+
+def test_memory_evicts_least_recently_used(clock):
+    cache = MemoryCache(max_entries=2)
+    run(cache.set("a", 1))
+    run(cache.set("b", 2))
+    run(cache.get("a"))
+    run(cache.set("c", 3))
+    assert run(cache.get("b")) is None
+    assert (run(cache.get("a")), run(cache.get("c"))) == (1, 3)
+
+
+def test_mongo_round_trip_and_expiry(collection):
+    cache = MongoCache(collection, ttl_seconds=60)
+    run(cache.ensure_indexes())
+    run(cache.set("k", {"food_name": "Salad", "at": datetime(2026, 1, 1, tzinfo=timezone.utc)}))
+    assert run(cache.get("k")) == {"food_name": "Salad", "at": datetime(2026, 1, 1, tzinfo=timezone.utc)}
+    # Expired documents are ignored even before the TTL monitor removes them
+    run(cache.set("old", 1, ttl_seconds=-1))
+    assert run(cache.get("old")) is None
+    run(cache.delete("k"))
+    assert run(cache.get("k")) is None
+
+
+def test_mongo_set_replaces_the_entry(collection):
+    cache = MongoCache(collection)
+    run(cache.set("k", 1))
+    run(cache.set("k", 2))
+    assert run(cache.get("k")) == 2
+    assert run(collection.count_documents({})) == 1
+
+
+def test_redis_prefixes_keys_and_round_trips_datetimes(fake_redis):
+    cache = RedisCache("redis://fake", ttl_seconds=60, prefix="food_analysis:")
+    value = {"calories": 200.0, "timestamp": datetime(2026, 1, 1, 12, tzinfo=timezone.utc)}
+    run(cache.set("abc", value))
+    assert list(fake_redis.data) == ["food_analysis:abc"]
+    assert fake_redis.ttls["food_analysis:abc"] == 60_000
+    assert run(cache.get("abc")) == value
+    run(cache.set("short", 1, ttl_seconds=0))
+    assert fake_redis.ttls["food_analysis:short"] == 1
+    run(cache.delete("abc"))
+    assert run(cache.get("abc")) is None
+
+
+def test_tiered_falls_through_and_backfills_local(collection, clock):
+    local = MemoryCache(max_entries=10, ttl_seconds=60)
+    shared = MongoCache(collection, ttl_seconds=60)
+    tiered = TieredCache(local, shared)
+    run(shared.set("k", "from another worker"))
+    assert run(local.get("k")) is None
+    assert run(tiered.get("k")) == "from another worker"
+    assert run(local.get("k")) == "from another worker"
+
+
+def test_tiered_writes_and_deletes_both_tiers(collection, clock):
+    local = MemoryCache(max_entries=10, ttl_seconds=60)
+    shared = MongoCache(collection, ttl_seconds=60)
+    tiered = TieredCache(local, shared)
+    run(tiered.set("k", 1))
+    assert (run(local.get("k")), run(shared.get("k"))) == (1, 1)
+    run(tiered.delete("k"))
+    assert (run(local.get("k")), run(shared.get("k"))) == (None, None)
+
+
+def test_result_cache_counts_hits_and_misses():
+    cache = ResultCache("test", MemoryCache())
+    run(cache.set("k", 1))
+    assert run(cache.get("k")) == 1
+    assert run(cache.get("missing")) is None
+    assert cache.stats() == {"backend": "MemoryCache", "hits": 1, "misses": 1, "errors": 0, "hit_ratio": 0.5}
+
+
+def test_result_cache_treats_backend_errors_as_misses():
+    cache = ResultCache("test", BrokenBackend())
+    assert run(cache.get("k")) is None
+    run(cache.set("k", 1))
+    run(cache.delete("k"))
+    assert cache.stats()["errors"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.parametrize("kind, expected", [
+    ("memory", MemoryCache),
+    (" Mongo ", MongoCache),
+    ("tiered", TieredCache),
+])
+def test_build_cache_backend(kind, expected, collection):
+    assert isinstance(build_cache_backend(kind, collection=collection), expected)
+
+
+def test_build_cache_backend_redis(fake_redis):
+    backend = build_cache_backend("tiered-redis", redis_url="redis://fake", redis_prefix="p:")
+    assert isinstance(backend, TieredCache)
+    assert isinstance(backend.shared, RedisCache) and backend.shared.prefix == "p:"
+
+
+@pytest.mark.parametrize("kind, kwargs", [
+    ("redis", {}),
+    ("mongo", {}),
+    ("memcached", {"collection": object()}),
+])
+def test_build_cache_backend_rejects_bad_config(kind, kwargs):
+    with pytest.raises(ValueError):
+        build_cache_backend(kind, **kwargs)
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from chat_memory import TRUNCATION_MARK, ChatMemory, estimate_tokens, fit_messages
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt):
+        self.prompts.append(prompt)
+        return f"summary #{len(self.prompts)}"
+
+
+def message(i, content=None, role=None):
+    return {"user_id": "u1", "role": role or ("user" if i % 2 == 0 else "assistant"),
+            "content": content or f"message {i}", "timestamp": START + timedelta(minutes=i)}
+
+
+@pytest.fixture
+def memory():
+    db = mongomock_motor.AsyncMongoMockClient()["t"]
+    # Each short message costs 6 tokens, so three fit in the window
+    return ChatMemory(db, FakeLLM(), window_tokens=18, overflow_tokens=60, summary_max_chars=600, fetch_limit=40,
+                      min_fold_messages=3)
+
+
+def add(memory, messages):
+    asyncio.run(memory.history.insert_many(messages))
+
+
+def test_window_keeps_the_newest_messages_within_budget(memory):
+    messages = [message(i) for i in range(5)]
+    assert [m["content"] for m in memory._window(messages)] == ["message 2", "message 3", "message 4"]
+
+
+def test_window_always_keeps_the_latest_exchange(memory):
+    huge = "x" * 400
+    assert estimate_tokens(huge) > memory.window_tokens
+    messages = [message(0), message(1, huge), message(2, huge)]
+    assert memory._window(messages) == messages[1:]
+
+
+def test_overflow_waiting_to_be_folded_stays_in_the_prompt(memory):
+    add(memory, [message(i) for i in range(5)])
+    # Two messages overflowed, fewer than min_fold_messages: no summary call yet
+    assert asyncio.run(memory.update_summary("u1")) is False
+    context = asyncio.run(memory.load("u1"))
+    assert context.summary == ""
+    assert all(f"message {i}" in context.history_text for i in range(5))
+
+
+def test_folded_messages_leave_the_prompt(memory):
+    add(memory, [message(i) for i in range(7)])
+    assert asyncio.run(memory.update_summary("u1")) is True
+    assert "message 3" in memory.llm.prompts[0] and "message 4" not in memory.llm.prompts[0]
+
+    context = asyncio.run(memory.load("u1"))
+    assert context.summary == "summary #1"
+    assert "message 3" not in context.history_text
+    assert all(f"message {i}" in context.history_text for i in range(4, 7))
+
+
+def test_next_fold_starts_after_the_previous_one(memory):
+    add(memory, [message(i) for i in range(7)])
+    asyncio.run(memory.update_summary("u1"))
+    add(memory, [message(i) for i in range(7, 10)])
+    assert asyncio.run(memory.update_summary("u1")) is True
+    folded = memory.llm.prompts[1]
+    assert "CURRENT SUMMARY:\nsummary #1" in folded
+    assert "message 3" not in folded
+    assert all(f"message {i}" in folded for i in range(4, 7))
+
+
+def test_clear_forgets_the_summary(memory):
+    add(memory, [message(i) for i in range(7)])
+    asyncio.run(memory.update_summary("u1"))
+    asyncio.run(memory.clear("u1"))
+    assert asyncio.run(memory.load("u1")).summary == ""
+
+
+class FailingLLM:
+    async def generate(self, prompt):
+        raise RuntimeError("model unavailable")
+
+
+def test_fit_messages_cuts_the_oldest_kept_message_to_its_tail():
+    messages = [message(0, "a" * 100), message(1, "b" * 40 + "end")]
+    kept = fit_messages(messages, 30)
+    assert kept[1] == messages[1]
+    assert kept[0]["content"].startswith(TRUNCATION_MARK) and kept[0]["content"].endswith("a")
+    assert sum(estimate_tokens(m["content"]) + 3 for m in kept) <= 30
+    assert messages[0]["content"] == "a" * 100
+
+
+def test_stalled_summary_and_long_messages_stay_within_the_prompt_budget(memory):
+    memory.llm = FailingLLM()
+    add(memory, [message(i, f"<{i}>" + "x" * 2000) for i in range(30)])
+    asyncio.run(memory._update("u1"))
+    assert memory.summary_failures == 1
+
+    context = asyncio.run(memory.load("u1"))
+    budget = memory.window_tokens + memory.overflow_tokens
+    assert estimate_tokens(context.history_text) <= budget
+    assert context.tokens <= budget
+    # The latest message survives, cut to its tail; the oldest are only left out of the prompt
+    assert context.history_text.rstrip().endswith("x")
+    assert TRUNCATION_MARK in context.history_text
+    assert "<0>" not in context.history_text
+    assert asyncio.run(memory.summaries.find_one({"_id": "u1"})) is None
+
+
+def test_messages_clipped_from_the_prompt_are_still_folded(memory):
+    add(memory, [message(i, f"m{i} " + "y" * 300) for i in range(8)])
+    assert "m0 " not in asyncio.run(memory.load("u1")).history_text
+    assert asyncio.run(memory.update_summary("u1")) is True
+    assert "m0 " in memory.llm.prompts[0]
@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from daily_summaries import (FOOD_FIELDS, SUMMARY_FIELDS, _zone_groups, apply_increments, apply_increments_many,
+                             food_increments, get_summaries, local_day_expression, rebuild_user, reconcile,
+                             summary_date, water_increments, workout_increments)
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+KOLKATA = ZoneInfo("Asia/Kolkata")
+T0 = datetime(2026, 6, 1, 9, 0, tzinfo=timezone.utc)
+LUNCH = {"calories": 600, "protein": 40, "carbs": 70, "fat": 20, "fiber": 8, "sugar": None}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def db():
+    return mongomock_motor.AsyncMongoMockClient(tz_aware=True)["t"]
+
+
+def summary(db, date, user_id="u1"):
+    return run(db.daily_summaries.find_one({"user_id": user_id, "date": date}, {"_id": 0}))
+
+
+def test_increment_builders():
+    assert food_increments(LUNCH) == {
+        "calories": 600.0, "protein": 40.0, "carbs": 70.0, "fat": 20.0, "fiber": 8.0, "sugar": 0.0, "food_count": 1
+    }
+    assert food_increments(LUNCH, sign=-1)["calories"] == -600.0
+    assert food_increments(LUNCH, sign=-1)["food_count"] == -1
+    assert water_increments({"amount_ml": 250}) == {"water_ml": 250.0, "water_count": 1}
+    assert workout_increments({"calories_burned": None, "duration_minutes": 30}, sign=-1) == {
+        "workout_count": -1, "calories_burned": 0.0, "workout_minutes": -30.0
+    }
+
+
+def test_summary_date_is_the_local_day():
+    late = datetime(2026, 6, 1, 20, 0, tzinfo=timezone.utc)
+    assert summary_date(late) == "2026-06-01"
+    assert summary_date(late, KOLKATA) == "2026-06-02"
+
+
+def test_create_upserts_and_accumulates(db):
+    run(apply_increments(db, "u1", T0, food_increments(LUNCH)))
+    doc = summary(db, "2026-06-01")
+    assert doc["calories"] == 600 and doc["food_count"] == 1
+    assert doc["updated_at"].tzinfo is not None
+
+    run(apply_increments(db, "u1", T0 + timedelta(hours=3), food_increments({"calories": 200})))
+    run(apply_increments(db, "u1", T0, water_increments({"amount_ml": 500})))
+    doc = summary(db, "2026-06-01")
+    assert doc["calories"] == 800 and doc["food_count"] == 2
+    assert doc["water_ml"] == 500 and doc["water_count"] == 1
+    assert run(db.daily_summaries.count_documents({})) == 1
+
+
+def test_delete_applies_the_negative_increment(db):
+    run(apply_increments(db, "u1", T0, food_increments(LUNCH)))
+    run(apply_increments(db, "u1", T0, food_increments({"calories": 150})))
+    run(apply_increments(db, "u1", T0, food_increments(LUNCH, sign=-1)))
+    doc = summary(db, "2026-06-01")
+    assert doc["calories"] == 150 and doc["protein"] == 0 and doc["food_count"] == 1
+
+
+def test_increments_are_keyed_by_the_users_local_day(db):
+    late = datetime(2026, 6, 1, 20, 0, tzinfo=timezone.utc)
+    run(apply_increments(db, "u1", late, water_increments({"amount_ml": 300}), KOLKATA))
+    assert summary(db, "2026-06-01") is None
+    assert summary(db, "2026-06-02")["water_ml"] == 300
+
+
+def test_batched_increments_upsert_once_per_day(db):
+    entries = [
+        (T0, food_increments(LUNCH)),
+        (T0 + timedelta(hours=1), water_increments({"amount_ml": 250})),
+        (T0 + timedelta(hours=2), food_increments({"calories": 100})),
+        (T0 + timedelta(days=1), workout_increments({"calories_burned": 300, "duration_minutes": 45})),
+    ]
+    run(apply_increments_many(db, "u1", entries))
+    first, second = summary(db, "2026-06-01"), summary(db, "2026-06-02")
+    assert first["calories"] == 700 and first["food_count"] == 2 and first["water_ml"] == 250
+    assert second["workout_count"] == 1 and second["workout_minutes"] == 45
+    assert run(db.daily_summaries.count_documents({})) == 2
+
+
+def test_get_summaries_filters_and_orders_by_date(db):
+    for day in (3, 1, 2, 5):
+        run(apply_increments(db, "u1", T0.replace(day=day), water_increments({"amount_ml": day})))
+    run(apply_increments(db, "u2", T0, water_increments({"amount_ml": 99})))
+
+    rows = run(get_summaries(db, "u1", "2026-06-02", "2026-06-03"))
+    assert [row["date"] for row in rows] == ["2026-06-02", "2026-06-03"]
+    assert set(rows[0]) == {"date", "water_ml", "water_count"}
+    assert [row["date"] for row in run(get_summaries(db, "u1", "2026-06-02"))] == ["2026-06-02", "2026-06-03", "2026-06-05"]
+
+
+def seed_logs(db, user_id="u1"):
+    run(db.users.insert_one({"id": user_id, "timezone": "UTC"}))
+    run(db.food_logs.insert_many([
+        {"user_id": user_id, "timestamp": T0, **LUNCH},
+        {"user_id": user_id, "timestamp": T0 + timedelta(days=1), "calories": 300, "protein": 10},
+    ]))
+    run(db.water_logs.insert_one({"user_id": user_id, "timestamp": T0, "amount_ml": 500}))
+    run(db.workout_logs.insert_one({"user_id": user_id, "timestamp": T0, "calories_burned": 250, "duration_minutes": 40}))
+
+
+def test_reconcile_reports_and_repairs_drift(db):
+    seed_logs(db)
+    run(apply_increments(db, "u1", T0, food_increments(LUNCH)))
+    # the day-two food log and the water and workout logs never reached the summaries
+    drift = run(reconcile(db, "u1"))
+    assert [(entry["date"], sorted(entry["fields"])) for entry in drift] == [
+        ("2026-06-01", ["calories_burned", "water_count", "water_ml", "workout_count", "workout_minutes"]),
+        ("2026-06-02", ["calories", "food_count", "protein"]),
+    ]
+    assert drift[0]["fields"]["water_ml"] == {"stored": 0, "expected": 500}
+    assert summary(db, "2026-06-02") is None
+
+    assert len(run(reconcile(db, "u1", fix=True))) == 2
+    assert run(reconcile(db, "u1")) == []
+    assert summary(db, "2026-06-02")["calories"] == 300
+
+
+def test_reconcile_flags_summaries_without_logs(db):
+    seed_logs(db)
+    run(apply_increments(db, "u1", T0 - timedelta(days=3), water_increments({"amount_ml": 100})))
+    drift = {entry["date"]: entry for entry in run(reconcile(db, "u1"))}
+    assert drift["2026-05-29"]["fields"]["water_ml"] == {"stored": 100, "expected": 0}
+
+
+def test_rebuild_user_replaces_summaries_from_logs(db):
+    seed_logs(db)
+    seed_logs(db, "u2")
+    run(apply_increments(db, "u1", T0 - timedelta(days=3), water_increments({"amount_ml": 100})))
+    run(apply_increments(db, "u1", T0, food_increments({"calories": 5000})))
+
+    run(rebuild_user(db, "u1"))
+    docs = run(get_summaries(db, "u1", "2026-01-01"))
+    assert [doc["date"] for doc in docs] == ["2026-06-01", "2026-06-02"]
+    assert docs[0]["calories"] == 600 and docs[0]["water_ml"] == 500 and docs[0]["workout_minutes"] == 40
+    assert set(SUMMARY_FIELDS) <= set(docs[0])
+    assert run(reconcile(db)) != []  # u2 was left alone
+    assert run(reconcile(db, "u1")) == []
+
+
+def test_zone_groups_split_users_by_timezone(db):
+    run(db.users.insert_many([
+        {"id": "utc", "timezone": "UTC"},
+        {"id": "unset"},
+        {"id": "india", "timezone": "Asia/Kolkata"},
+        {"id": "india2", "timezone": "Asia/Kolkata"},
+        {"id": "bogus", "timezone": "Mars/Olympus_Mons"},
+    ]))
+    groups = run(_zone_groups(db, None))
+    assert groups == [
+        ({"user_id": {"$nin": ["india", "india2"]}}, "UTC"),
+        ({"user_id": {"$in": ["india", "india2"]}}, "Asia/Kolkata"),
+    ]
+    assert run(_zone_groups(db, "india")) == [({"user_id": "india"}, "Asia/Kolkata")]
+    assert run(_zone_groups(db, "missing")) == [({"user_id": "missing"}, "UTC")]
+
+
+def test_local_day_expression_only_names_non_utc_zones():
+    assert local_day_expression("UTC") == {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+    assert local_day_expression("Asia/Kolkata")["$dateToString"]["timezone"] == "Asia/Kolkata"
+
+
+def test_log_routes_keep_summaries_current(server, api, auth):
+    meal = {"food_name": "Dal", "meal_type": "lunch", **{field: 10 for field in FOOD_FIELDS}}
+    created = [api.post("/api/food/log", headers=auth, json=meal).json() for _ in range(2)]
+    user_id, date = created[0]["user_id"], created[0]["timestamp"][:10]
+    assert summary(server.db, date, user_id)["food_count"] == 2
+    assert summary(server.db, date, user_id)["protein"] == 20
+
+    assert api.delete(f"/api/food/log/{created[0]['id']}", headers=auth).status_code == 200
+    doc = summary(server.db, date, user_id)
+    assert doc["food_count"] == 1 and doc["calories"] == 10
+    assert run(reconcile(server.db, user_id)) == []
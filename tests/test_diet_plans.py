@@ -0,0 +1,90 @@
+import pytest
+
+from diet_plans import (canonical_plan_request, normalize_activity, normalize_goal, normalize_preferences,
+                        plan_cache_key, round_kg)
+
+
+@pytest.mark.parametrize("weight, expected", [
+    (80.5, 81),
+    (81.5, 82),
+    (82.5, 83),
+    (80.49, 80),
+    (80.4999, 80),
+    (79.6, 80),
+    (80, 80),
+    (0.5, 1),
+])
+def test_round_kg_rounds_halves_up(weight, expected):
+    assert round_kg(weight) == expected
+
+
+def test_half_kg_boundaries_bucket_consistently():
+    def key(current, goal):
+        return plan_cache_key(canonical_plan_request("fat_loss", current, goal, "moderate"))
+
+    assert key(80.5, 75.5) == key(81.0, 76.0) == key(81.4, 75.6)
+    assert key(81.5, 76.5) == key(82.0, 77.0)
+    assert key(80.5, 75) != key(80.4, 75)
+
+
+@pytest.mark.parametrize("goal, expected", [
+    ("fat_loss", "fat_loss"),
+    ("Weight Loss", "fat_loss"),
+    ("weight-loss", "fat_loss"),
+    (" muscle_gain ", "muscle_gain"),
+    ("Bulk", "muscle_gain"),
+    ("maintain", "maintenance"),
+    ("Run a marathon", "run_a_marathon"),
+])
+def test_normalize_goal(goal, expected):
+    assert normalize_goal(goal) == expected
+
+
+@pytest.mark.parametrize("activity, expected", [
+    ("moderate", "moderate"),
+    ("Moderately Active", "moderate"),
+    ("very active", "very_active"),
+    ("Lightly-active", "light"),
+    ("couch", "couch"),
+])
+def test_normalize_activity(activity, expected):
+    assert normalize_activity(activity) == expected
+
+
+@pytest.mark.parametrize("preferences, expected", [
+    (None, None),
+    ("", None),
+    (" , ;", None),
+    ("Vegan", "vegan"),
+    ("vegan, Gluten-free", "gluten free, vegan"),
+    ("gluten free;vegan / VEGAN", "gluten free, vegan"),
+    ("no  nuts\nhalal", "halal, no nuts"),
+])
+def test_normalize_preferences(preferences, expected):
+    assert normalize_preferences(preferences) == expected
+
+
+def test_near_identical_requests_share_a_key():
+    a = canonical_plan_request("weight_loss", 80.4, 70.2, "Moderate", "vegan, gluten-free")
+    b = canonical_plan_request("Fat Loss", 79.6, 69.8, "moderate", "Gluten Free,vegan")
+    assert a == b == {
+        "goal": "fat_loss",
+        "current_weight": 80,
+        "goal_weight": 70,
+        "activity_level": "moderate",
+        "dietary_preferences": "gluten free, vegan",
+    }
+    assert plan_cache_key(a) == plan_cache_key(b)
+
+
+@pytest.mark.parametrize("change", [
+    {"goal": "muscle_gain"},
+    {"current_weight": 81.6},
+    {"goal_weight": 60},
+    {"activity_level": "active"},
+    {"dietary_preferences": "vegetarian"},
+])
+def test_different_requests_get_different_keys(change):
+    base = {"goal": "fat_loss", "current_weight": 80, "goal_weight": 70, "activity_level": "moderate",
+            "dietary_preferences": None}
+    assert plan_cache_key(canonical_plan_request(**base)) != plan_cache_key(canonical_plan_request(**{**base, **change}))
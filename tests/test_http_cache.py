@@ -0,0 +1,102 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from http_cache import ConditionalGetMiddleware, ConditionalGets, Validator, etag_matches, weak_etag
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ("*", True),
+    ('"abd"', False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+    assert etag_matches(header, 'W/"abc"') is matches
+
+
+def test_weak_etag_is_quoted_and_depends_on_every_part():
+    etag = weak_etag("profile", "u1", 3)
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == weak_etag("profile", "u1", 3)
+    assert len({etag, weak_etag("profile", "u1", 4), weak_etag("profile", "u2", 3),
+                weak_etag("persona", "u1", 3)}) == 4
+
+
+@pytest.fixture
+def app():
+    state = {"version": 1, "calls": 0}
+    registry = ConditionalGets()
+
+    async def thing(request):
+        state["calls"] += 1
+        return JSONResponse({"version": state["version"]})
+
+    async def missing(request):
+        return PlainTextResponse("nope", status_code=404)
+
+    @registry.validator("/thing")
+    async def thing_validator(request):
+        if request.headers.get("x-anonymous"):
+            return None
+        return Validator(weak_etag("thing", state["version"]), "private, no-cache")
+
+    @registry.validator("/missing")
+    async def missing_validator(request):
+        return Validator('"m"', "private, no-cache")
+
+    app = Starlette(routes=[Route("/thing", thing, methods=["GET", "PUT"]), Route("/missing", missing)])
+    app.add_middleware(ConditionalGetMiddleware, registry=registry)
+    return TestClient(app), state, registry
+
+
+def test_matching_etag_gets_304_without_running_the_route(app):
+    client, state, registry = app
+    first = client.get("/thing")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = client.get("/thing", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+    assert again.content == b""
+    assert state["calls"] == 1
+    assert registry.stats() == {"paths": 2, "tagged": 1, "not_modified": 1}
+
+
+def test_version_bump_invalidates(app):
+    client, state, _ = app
+    etag = client.get("/thing").headers["etag"]
+    state["version"] += 1
+    fresh = client.get("/thing", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json() == {"version": 2}
+    assert fresh.headers["etag"] != etag
+
+
+def test_untagged_requests_pass_through(app):
+    client, _, _ = app
+    assert "etag" not in client.put("/thing").headers
+    assert "etag" not in client.get("/thing", headers={"X-Anonymous": "1"}).headers
+    missing = client.get("/missing", headers={"If-None-Match": '"other"'})
+    assert missing.status_code == 404
+    assert "etag" not in missing.headers
+
+
+def test_gzip_and_identity_bodies_share_a_weak_tag(api):
+    gzipped = api.get("/api/workout/library", headers={"Accept-Encoding": "gzip"})
+    identity = api.get("/api/workout/library", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["etag"] == identity.headers["etag"]
+    assert gzipped.headers["etag"].startswith('W/"')
+
+    for encoding in ("gzip", "identity"):
+        again = api.get("/api/workout/library",
+                        headers={"Accept-Encoding": encoding, "If-None-Match": identity.headers["etag"]})
+        assert again.status_code == 304
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from PIL import Image
+
+from image_hash import FoodImageHashStore, PerceptualHashIndex, dhash, has_detail
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def textured(seed: int) -> Image.Image:
+    image = Image.new("L", (90, 80))
+    image.putdata([(x * 37 + y * 91 + seed * 13 + (x * y) % 17 * 11) % 256 for y in range(80) for x in range(90)])
+    return image
+
+
+def gradient(vertical: bool) -> Image.Image:
+    image = Image.new("L", (90, 80))
+    image.putdata([(y if vertical else x) * 3 for y in range(80) for x in range(90)])
+    return image
+
+
+@pytest.fixture
+def store():
+    return FoodImageHashStore(mongomock_motor.AsyncMongoMockClient()["t"]["food_image_hashes"], max_distance=4)
+
+
+def test_flat_images_have_no_detail():
+    assert dhash(Image.new("RGB", (64, 64), (200, 30, 30))) == 0
+    assert dhash(gradient(vertical=True)) == 0
+    for value in (0, 1, 0x7F, (1 << 64) - 1, ((1 << 64) - 1) ^ 0b1):
+        assert not has_detail(value)
+    assert has_detail(dhash(textured(1)))
+
+
+def test_index_finds_closest_hash_within_radius():
+    index = PerceptualHashIndex()
+    base = dhash(textured(1))
+    index.add(base)
+    assert index.search(base ^ 0b101, 4) == (base, 2)
+    assert index.search(base ^ 0b11111, 4) is None
+    assert not index.add(base)
+
+
+def test_flat_photo_never_reuses_another_analysis(store):
+    async def scenario():
+        red = dhash(Image.new("RGB", (64, 64), (200, 30, 30)))
+        await store.add(red, {"food_name": "apple"})
+        return await store.find(dhash(gradient(vertical=True)))
+
+    assert asyncio.run(scenario()) is None
+    assert len(store.index) == 0
+    assert store.stats()["flat_hashes_skipped"] == 1
+
+
+def test_textured_near_duplicate_is_found(store):
+    value = dhash(textured(1))
+
+    async def scenario():
+        await store.add(value, {"food_name": "salad"})
+        return await store.find(value ^ 0b11)
+
+    assert asyncio.run(scenario()) == {"food_name": "salad"}
+    assert store.stats()["near_duplicate_hits"] == 1
@@ -0,0 +1,67 @@
+import asyncio
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from image_pipeline import ImagePreprocessor, ImageTooLargeError, InvalidImageError, pool_context, prepare_image
+
+
+def png_header(width: int, height: int) -> bytes:
+    """A PNG whose header claims ``width`` x ``height``; Pillow reads only the header on open."""
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IEND", b"")
+
+
+def encoded(size, fmt="JPEG", mode="RGB") -> bytes:
+    buffered = io.BytesIO()
+    Image.new(mode, size, 128).save(buffered, format=fmt)
+    return buffered.getvalue()
+
+
+def test_large_photo_is_downscaled_to_an_rgb_jpeg():
+    prepared = prepare_image(encoded((4000, 3000)), max_side=1024)
+    assert (prepared.width, prepared.height) == (1024, 768)
+    with Image.open(io.BytesIO(prepared.jpeg)) as image:
+        assert image.format == "JPEG" and image.mode == "RGB"
+
+
+def test_non_rgb_images_are_converted():
+    prepared = prepare_image(encoded((64, 64), fmt="PNG", mode="RGBA"))
+    assert (prepared.width, prepared.height) == (64, 64)
+
+
+def test_pixel_limit():
+    with pytest.raises(ImageTooLargeError):
+        prepare_image(encoded((200, 200)), max_pixels=100 * 100)
+
+
+def test_decompression_bomb_is_too_large_not_a_server_error():
+    assert 20000 * 10000 > 2 * Image.MAX_IMAGE_PIXELS
+    with pytest.raises(ImageTooLargeError):
+        prepare_image(png_header(20000, 10000))
+
+
+@pytest.mark.parametrize("data", [b"not an image", png_header(64, 64)[:20], encoded((64, 64))[:200]])
+def test_undecodable_data_is_invalid(data):
+    with pytest.raises(InvalidImageError):
+        prepare_image(data)
+
+
+def test_pool_workers_are_never_forked_from_the_server():
+    assert pool_context().get_start_method() in ("forkserver", "spawn")
+
+
+def test_preprocessor_decodes_in_a_worker_process():
+    preprocessor = ImagePreprocessor(max_workers=1, max_side=256)
+    preprocessor.start()
+    try:
+        assert preprocessor._executor._mp_context.get_start_method() != "fork"
+        prepared = asyncio.run(preprocessor.prepare(encoded((1024, 512))))
+    finally:
+        preprocessor.shutdown()
+    assert (prepared.width, prepared.height) == (256, 128)
@@ -0,0 +1,172 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from llm_gateway import LLMError, LLMGateway, LLMTimeoutError
+
+
+class FakeModel:
+    """Stands in for ``genai.GenerativeModel``; each call runs ``behaviour``."""
+
+    model_name = "fake-model"
+
+    def __init__(self, behaviour=None):
+        self.behaviour = behaviour
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, contents, stream=False, request_options=None):
+        self.calls.append((contents, stream, request_options))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if self.behaviour is not None:
+                result = await self.behaviour(contents)
+            else:
+                await asyncio.sleep(0.01)
+                result = f"  reply to {contents}  "
+        finally:
+            self.active -= 1
+        if stream:
+            return FakeStream(result)
+        return SimpleNamespace(text=result, usage_metadata=SimpleNamespace(
+            prompt_token_count=10, cached_content_token_count=4))
+
+
+class FakeStream:
+    def __init__(self, parts):
+        self.parts = parts
+
+    async def __aiter__(self):
+        for part in self.parts:
+            if isinstance(part, Exception):
+                raise part
+            await asyncio.sleep(0)
+            yield part
+
+
+def chunk(text):
+    return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(prompt_token_count=7))
+
+
+class NoTextChunk:
+    usage_metadata = SimpleNamespace(prompt_token_count=7, cached_content_token_count=0)
+
+    @property
+    def text(self):
+        raise ValueError("no text parts")
+
+
+def test_generate_returns_stripped_text_and_records_usage():
+    gateway = LLMGateway(max_concurrency=2, timeout_seconds=1)
+    model = FakeModel()
+    assert asyncio.run(gateway.generate("hi", model=model)) == "reply to hi"
+    assert model.calls[0][2] == {"timeout": 1}
+    stats = gateway.stats()
+    assert (stats["completed"], stats["prompt_tokens"], stats["cached_prompt_tokens"]) == (1, 10, 4)
+    assert stats["in_flight"] == 0
+
+
+def test_concurrency_is_bounded_by_the_semaphore():
+    gateway = LLMGateway(max_concurrency=3, timeout_seconds=5)
+    model = FakeModel()
+
+    async def burst():
+        return await asyncio.gather(*(gateway.generate(i, model=model) for i in range(10)))
+
+    assert asyncio.run(burst()) == [f"reply to {i}" for i in range(10)]
+    assert model.max_active == 3
+    assert gateway.stats()["completed"] == 10
+
+
+def test_timeout_cancels_the_call_and_raises():
+    cancelled = []
+
+    async def hang(contents):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(contents)
+            raise
+
+    gateway = LLMGateway(max_concurrency=1, timeout_seconds=5)
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(gateway.generate("slow", model=FakeModel(hang), timeout=0.05))
+    assert cancelled == ["slow"]
+    assert gateway.stats()["timeouts"] == 1
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_waiting_for_a_slot_counts_against_the_timeout():
+    async def slow(contents):
+        await asyncio.sleep(0.3)
+        return "done"
+
+    gateway = LLMGateway(max_concurrency=1, timeout_seconds=5)
+    model = FakeModel(slow)
+
+    async def scenario():
+        first = asyncio.create_task(gateway.generate("first", model=model))
+        await asyncio.sleep(0.01)
+        with pytest.raises(LLMTimeoutError):
+            await gateway.generate("second", model=model, timeout=0.05)
+        return await first
+
+    assert asyncio.run(scenario()) == "done"
+    assert len(model.calls) == 1
+
+
+def test_model_errors_are_wrapped_and_not_retried():
+    async def broken(contents):
+        raise RuntimeError("quota exceeded")
+
+    gateway = LLMGateway(max_concurrency=1, timeout_seconds=1)
+    model = FakeModel(broken)
+    with pytest.raises(LLMError, match="quota exceeded") as raised:
+        asyncio.run(gateway.generate("x", model=model))
+    assert not isinstance(raised.value, LLMTimeoutError)
+    assert isinstance(raised.value.__cause__, RuntimeError)
+    assert len(model.calls) == 1
+    assert gateway.stats()["failures"] == 1
+
+
+def test_stream_yields_text_chunks_and_skips_empty_ones():
+    async def parts(contents):
+        return [chunk("Hel"), NoTextChunk(), chunk(""), chunk("lo")]
+
+    gateway = LLMGateway(max_concurrency=1, timeout_seconds=1)
+
+    async def collect():
+        return [text async for text in gateway.stream("x", model=FakeModel(parts))]
+
+    assert asyncio.run(collect()) == ["Hel", "lo"]
+    assert gateway.stats()["completed"] == 1
+    assert gateway.stats()["prompt_tokens"] == 7
+
+
+def test_stream_errors_are_wrapped_and_release_the_slot():
+    async def parts(contents):
+        return [chunk("partial"), RuntimeError("connection reset")]
+
+    gateway = LLMGateway(max_concurrency=1, timeout_seconds=1)
+
+    async def collect():
+        received = []
+        with pytest.raises(LLMError, match="connection reset"):
+            async for text in gateway.stream("x", model=FakeModel(parts)):
+                received.append(text)
+        # The slot was released, so another call still gets through
+        await gateway.generate("y", model=FakeModel())
+        return received
+
+    assert asyncio.run(collect()) == ["partial"]
+    assert gateway.stats()["failures"] == 1
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_get_model_reuses_handles():
+    gateway = LLMGateway()
+    assert gateway.get_model(system_instruction="coach") is gateway.get_model(system_instruction="coach")
+    assert gateway.get_model(system_instruction="coach") is not gateway.get_model()
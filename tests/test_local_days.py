@@ -0,0 +1,139 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import pytest
+
+import local_days
+from local_days import (day_bounds, days_back, get_zone, local_date, local_today, parse_day, validate_timezone,
+                        zone_key)
+
+UTC = ZoneInfo("UTC")
+NEW_YORK = ZoneInfo("America/New_York")
+LONDON = ZoneInfo("Europe/London")
+KOLKATA = ZoneInfo("Asia/Kolkata")
+
+
+def hours(bounds):
+    start, end = bounds
+    return (end - start) / timedelta(hours=1)
+
+
+@pytest.mark.parametrize("name", ["Asia/Kolkata", "America/New_York", "UTC"])
+def test_known_timezones_are_accepted(name):
+    assert validate_timezone(name) == name
+
+
+@pytest.mark.parametrize("name", ["Mars/Olympus_Mons", "", "EST+5", "../etc/passwd", "Asia/"])
+def test_unknown_timezones_raise_value_error(name):
+    with pytest.raises(ValueError):
+        validate_timezone(name)
+
+
+@pytest.mark.parametrize("name", [None, "", "Mars/Olympus_Mons", "../etc/passwd"])
+def test_stored_zones_fall_back_to_utc(name):
+    assert get_zone(name) is timezone.utc
+
+
+@pytest.fixture
+def no_tz_database(monkeypatch):
+    """Behave like Windows or a slim image without tzdata."""
+    def missing(name):
+        raise ZoneInfoNotFoundError(f"No time zone found with key {name}")
+
+    monkeypatch.setattr(local_days, "ZoneInfo", missing)
+    get_zone.cache_clear()
+    yield
+    get_zone.cache_clear()
+
+
+def test_missing_tz_database_degrades_to_utc(no_tz_database):
+    assert get_zone("UTC") is timezone.utc
+    assert get_zone("Asia/Kolkata") is timezone.utc
+    assert validate_timezone("UTC") == "UTC"
+    with pytest.raises(ValueError):
+        validate_timezone("Asia/Kolkata")
+    assert day_bounds(date(2026, 1, 1), get_zone("Asia/Kolkata"))[0] == datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_zone_key():
+    assert zone_key(get_zone(None)) == "UTC"
+    assert zone_key(get_zone("Asia/Kolkata")) == "Asia/Kolkata"
+
+
+def test_plain_day_is_24_hours_and_starts_at_local_midnight():
+    start, end = day_bounds(date(2026, 6, 1), KOLKATA)
+    assert start == datetime(2026, 5, 31, 18, 30, tzinfo=timezone.utc)
+    assert end == datetime(2026, 6, 1, 18, 30, tzinfo=timezone.utc)
+    assert start.tzinfo == timezone.utc
+
+
+@pytest.mark.parametrize("zone, day, length", [
+    (NEW_YORK, date(2026, 3, 8), 23),
+    (NEW_YORK, date(2026, 11, 1), 25),
+    (LONDON, date(2026, 3, 29), 23),
+    (LONDON, date(2026, 10, 25), 25),
+    (NEW_YORK, date(2026, 3, 9), 24),
+])
+def test_dst_change_days(zone, day, length):
+    assert hours(day_bounds(day, zone)) == length
+
+
+def test_consecutive_days_tile_without_gaps_across_dst():
+    day = date(2026, 10, 30)
+    for _ in range(5):
+        assert day_bounds(day, NEW_YORK)[1] == day_bounds(day + timedelta(days=1), NEW_YORK)[0]
+        day += timedelta(days=1)
+
+
+def test_utc_default():
+    assert day_bounds(date(2026, 1, 1)) == (
+        datetime(2026, 1, 1, tzinfo=timezone.utc), datetime(2026, 1, 2, tzinfo=timezone.utc)
+    )
+
+
+def test_local_date_across_utc_midnight():
+    late = datetime(2026, 6, 1, 20, 0, tzinfo=timezone.utc)
+    assert local_date(late) == "2026-06-01"
+    assert local_date(late, KOLKATA) == "2026-06-02"
+    assert local_date(late, NEW_YORK) == "2026-06-01"
+    assert local_date(datetime(2026, 6, 1, 2, 0, tzinfo=timezone.utc), NEW_YORK) == "2026-05-31"
+
+
+def test_naive_timestamps_are_utc():
+    assert local_date(datetime(2026, 6, 1, 20, 0), KOLKATA) == "2026-06-02"
+
+
+def test_fall_back_hour_belongs_to_the_long_day():
+    # 01:30 happens twice on 2026-11-01 in New York; both are the same local day
+    start, end = day_bounds(date(2026, 11, 1), NEW_YORK)
+    for instant in (datetime(2026, 11, 1, 5, 30, tzinfo=timezone.utc), datetime(2026, 11, 1, 6, 30, tzinfo=timezone.utc)):
+        assert start <= instant < end
+        assert local_date(instant, NEW_YORK) == "2026-11-01"
+
+
+def test_parse_day():
+    assert parse_day("2026-06-01") == date(2026, 6, 1)
+    assert parse_day("2026-06-01T20:00:00+00:00", KOLKATA) == date(2026, 6, 2)
+    assert parse_day("2026-06-01T20:00:00", KOLKATA) == date(2026, 6, 1)
+    with pytest.raises(ValueError):
+        parse_day("yesterday")
+
+
+def test_today_and_days_back_use_the_local_day():
+    now = datetime(2026, 6, 1, 20, 0, tzinfo=timezone.utc)
+    assert local_today(KOLKATA, now) == "2026-06-02"
+    assert days_back(1, KOLKATA, now) == date(2026, 6, 2)
+    assert days_back(7, KOLKATA, now) == date(2026, 5, 27)
+    assert days_back(7, UTC, now) == date(2026, 5, 26)
+
+
+def test_profile_rejects_an_unknown_timezone(api, auth):
+    response = api.put("/api/profile", headers=auth, json={"timezone": "Mars/Olympus_Mons"})
+    assert response.status_code == 422
+    response = api.put("/api/profile", headers=auth, json={"timezone": "Asia/Kolkata"})
+    assert response.status_code == 200
+
+
+def test_requests_succeed_without_a_tz_database(server, api, auth, no_tz_database):
+    response = api.get("/api/dashboard/today", headers=auth)
+    assert response.status_code == 200, response.text
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pagination import InvalidCursorError, after_cursor, decode_cursor, encode_cursor, fetch_page
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+T0 = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def logs():
+    collection = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["t"]["workout_logs"]
+    docs = [{"id": f"log-{i:02d}", "user_id": "u1", "timestamp": T0 + timedelta(minutes=i // 3)} for i in range(12)]
+    docs.append({"id": "other", "user_id": "u2", "timestamp": T0})
+    run(collection.insert_many(docs))
+    return collection
+
+
+def test_cursor_round_trip():
+    doc = {"id": "abc", "timestamp": T0}
+    cursor = encode_cursor(doc)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == (T0, "abc")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "eyJ0IjoieCIsImkiOiIxIn0", "!!!"])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        after_cursor({"user_id": "u1"}, cursor)
+
+
+def test_no_cursor_leaves_the_query_alone():
+    assert after_cursor({"user_id": "u1"}, None) == {"user_id": "u1"}
+
+
+def test_pages_cover_every_row_once_in_order_across_equal_timestamps(logs):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = run(fetch_page(logs, {"user_id": "u1"}, 5, cursor))
+        pages += 1
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert pages == 3
+    assert [doc["id"] for doc in seen] == [f"log-{i:02d}" for i in reversed(range(12))]
+    assert all("_id" not in doc for doc in seen)
+
+
+def test_page_boundary_inside_a_timestamp_tie(logs):
+    # log-11, log-10, log-09 share a timestamp; the page ends between log-10 and log-09
+    first, cursor = run(fetch_page(logs, {"user_id": "u1"}, 2))
+    assert [doc["id"] for doc in first] == ["log-11", "log-10"]
+    second, _ = run(fetch_page(logs, {"user_id": "u1"}, 2, cursor))
+    assert [doc["id"] for doc in second] == ["log-09", "log-08"]
+
+
+def test_rows_inserted_after_the_cursor_do_not_shift_pages(logs):
+    first, cursor = run(fetch_page(logs, {"user_id": "u1"}, 4))
+    run(logs.insert_one({"id": "log-99", "user_id": "u1", "timestamp": T0 + timedelta(hours=1)}))
+    second, _ = run(fetch_page(logs, {"user_id": "u1"}, 4, cursor))
+    assert [doc["id"] for doc in second] == ["log-07", "log-06", "log-05", "log-04"]
+
+
+def test_exact_last_page_has_no_cursor(logs):
+    page, cursor = run(fetch_page(logs, {"user_id": "u1"}, 12))
+    assert len(page) == 12 and cursor is None
+
+
+def test_api_pages_with_the_next_cursor_header(server, api, auth):
+    user_id = server.verify_token(auth["Authorization"].split()[1])
+    run(server.db.workout_logs.insert_many([
+        {"id": f"log-{i}", "user_id": user_id, "exercise_name": "Squat", "sets": 3, "reps": 10,
+         "timestamp": T0 + timedelta(minutes=i // 2)}
+        for i in range(3)
+    ]))
+
+    first = api.get("/api/workout/log", headers=auth, params={"limit": 2})
+    assert first.status_code == 200
+    assert [log["id"] for log in first.json()] == ["log-2", "log-1"]
+    second = api.get("/api/workout/log", headers=auth, params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [log["id"] for log in second.json()] == ["log-0"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_api_rejects_a_bad_cursor(api, auth):
+    response = api.get("/api/workout/log", headers=auth, params={"cursor": "garbage"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_range_view_keeps_counts_integral(server, api, auth):
+    user_id = server.verify_token(auth["Authorization"].split()[1])
+    run(server.db.workout_logs.insert_many([
+        {"id": f"log-{i}", "user_id": user_id, "exercise_name": "Row", "sets": 3, "reps": 10,
+         "duration_minutes": 20, "calories_burned": 99.5, "timestamp": T0 + timedelta(hours=i)}
+        for i in range(3)
+    ]))
+
+    response = api.get("/api/workout/log", headers=auth, params={"from": "2026-03-01", "to": "2026-03-01"})
+    assert response.status_code == 200, response.text
+    [day] = response.json()["days"]
+    assert day["date"] == "2026-03-01"
+    assert len(day["logs"]) == 3
+    assert day["totals"] == {"count": 3, "duration_minutes": 60, "calories_burned": 298.5}
+    assert isinstance(day["totals"]["count"], int)
+    assert '"count":3,' in response.text.replace(" ", "")
+
+
+def test_ndjson_rows_match_the_json_page(server, api, auth):
+    user_id = server.verify_token(auth["Authorization"].split()[1])
+    run(server.db.workout_logs.insert_many([
+        {"id": f"log-{i}", "user_id": user_id, "exercise_name": "Café run", "sets": 1, "reps": 1,
+         "timestamp": T0 + timedelta(minutes=i, microseconds=500)}
+        for i in range(3)
+    ]))
+
+    page = api.get("/api/workout/log", headers=auth)
+    stream = api.get("/api/workout/log", headers=auth, params={"format": "ndjson"})
+    assert stream.headers["content-type"].startswith("application/x-ndjson")
+    lines = stream.text.splitlines()
+    assert [json.loads(line) for line in lines] == page.json()
+    assert page.text == "[" + ",".join(lines) + "]"
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+
+import bcrypt
+import pytest
+
+from password_hashing import PasswordHasher, PasswordHasherBusyError, hash_rounds
+
+ROUNDS = 4  # bcrypt's minimum, to keep the suite fast
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(rounds=ROUNDS, max_workers=2, max_queue=8)
+    yield hasher
+    hasher.shutdown()
+
+
+class Gate:
+    """A blocking call that records how many copies run at once."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+        return "done"
+
+
+async def until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+def test_hash_and_verify(hasher):
+    async def scenario():
+        hashed = await hasher.hash("s3cret-pass")
+        return hashed, await hasher.verify("s3cret-pass", hashed), await hasher.verify("wrong", hashed)
+
+    hashed, good, bad = run(scenario())
+    assert hashed.startswith("$2b$04$")
+    assert good is True and bad is False
+    assert bcrypt.checkpw(b"s3cret-pass", hashed.encode())
+
+
+def test_hashes_are_salted(hasher):
+    async def scenario():
+        return await hasher.hash("same"), await hasher.hash("same")
+
+    first, second = run(scenario())
+    assert first != second
+
+
+@pytest.mark.parametrize("stored", ["", "not-a-hash", "$2b$04$short"])
+def test_malformed_stored_hash_fails_verification(hasher, stored):
+    assert run(hasher.verify("anything", stored)) is False
+
+
+def test_hash_rounds():
+    assert hash_rounds(bcrypt.hashpw(b"x", bcrypt.gensalt(5)).decode()) == 5
+    assert hash_rounds("$2b$12$abcdefghijklmnopqrstuv") == 12
+    assert hash_rounds("plaintext") is None
+    assert hash_rounds("$2b$xx$abc") is None
+
+
+def test_rehash_only_when_the_cost_changed(hasher):
+    old = bcrypt.hashpw(b"pw", bcrypt.gensalt(5)).decode()
+    assert hasher.needs_rehash(old)
+
+    async def scenario():
+        current = await hasher.hash("pw")
+        return current, await hasher.rehash_if_needed("pw", current), await hasher.rehash_if_needed("pw", old)
+
+    current, unchanged, upgraded = run(scenario())
+    assert not hasher.needs_rehash(current)
+    assert unchanged is None
+    assert hash_rounds(upgraded) == ROUNDS
+    assert bcrypt.checkpw(b"pw", upgraded.encode())
+    assert hasher.stats()["rehashed"] == 1
+
+
+def test_at_most_max_workers_run_at_once(hasher):
+    gate = Gate()
+
+    async def scenario():
+        calls = [asyncio.ensure_future(hasher._run(gate)) for _ in range(5)]
+        await until(lambda: hasher.stats()["waiting"] == 3)
+        stats = hasher.stats()
+        gate.release.set()
+        return stats, await asyncio.gather(*calls)
+
+    stats, results = run(scenario())
+    assert stats["active"] == 2 and stats["waiting"] == 3
+    assert gate.peak == 2
+    assert results == ["done"] * 5
+    assert hasher.stats()["completed"] == 5 and hasher.stats()["active"] == 0
+
+
+def test_full_queue_rejects_new_work():
+    hasher = PasswordHasher(rounds=ROUNDS, max_workers=1, max_queue=1)
+    gate = Gate()
+
+    async def scenario():
+        running = asyncio.ensure_future(hasher._run(gate))
+        await until(lambda: gate.running == 1)
+        queued = asyncio.ensure_future(hasher._run(gate))
+        await until(lambda: hasher.stats()["waiting"] == 1)
+        with pytest.raises(PasswordHasherBusyError):
+            await hasher.hash("pw")
+        gate.release.set()
+        return await asyncio.gather(running, queued)
+
+    try:
+        assert run(scenario()) == ["done", "done"]
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["completed"] == 2
+
+
+def test_idle_pool_accepts_work_even_with_no_queue():
+    hasher = PasswordHasher(rounds=ROUNDS, max_workers=1, max_queue=0)
+    try:
+        assert run(hasher.verify("pw", bcrypt.hashpw(b"pw", bcrypt.gensalt(ROUNDS)).decode())) is True
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["rejected"] == 0
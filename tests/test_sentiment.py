@@ -0,0 +1,108 @@
+import pytest
+
+from sentiment import (KEYWORD_TABLE, SENTIMENT_KEYWORDS, analyze_many, analyze_sentiment, backfill_messages,
+                       compile_keywords, match_keywords)
+
+
+@pytest.mark.parametrize("text", [
+    "show me the plan",        # "how"
+    "this is it",              # "hi"
+    "whatever works",          # "what"
+    "the painting is done",    # "pain"
+    "a weakness of mine",      # "weak"
+    "supper was late",         # "sup"
+    "your routine",            # "yo"
+    "goodness me",             # "good"
+    "whenever you can",        # "when"
+    "stronger every week",     # "strong"
+])
+def test_keywords_do_not_match_inside_words(text):
+    assert match_keywords(text) == set()
+    assert analyze_sentiment(text)["sentiment"] == "neutral"
+
+
+@pytest.mark.parametrize("text, keyword", [
+    ("How do I start?", "how"),
+    ("hi!", "hi"),
+    ("Great, thanks.", "great"),
+    ("my knee is in pain", "pain"),
+    ("(sore) legs", "sore"),
+    ("I can't do this", "can't"),
+    ("I can’t do this", "can't"),
+    ("HELLO COACH", "hello"),
+    ("'hi' there", "hi"),
+    ("great—keep going", "great"),
+    ("legs/arms were sore...tired", "tired"),
+])
+def test_whole_words_match_at_any_position_and_case(text, keyword):
+    assert keyword in match_keywords(text)
+
+
+def test_phrases_match_across_whitespace():
+    assert {"give up", "tell me"} <= match_keywords("I want to give   up, tell\nme why")
+
+
+def test_contraction_is_not_its_stem():
+    hits = match_keywords("what's up coach")
+    assert "what's up" in hits
+    assert "what" not in hits
+
+
+def test_question_mark_counts_without_word_boundaries():
+    assert match_keywords("really?") == {"?"}
+
+
+def test_scores_count_distinct_keywords():
+    result = analyze_sentiment("great great great, awesome!")
+    assert result["scores"]["positive"] == 2
+    assert result["sentiment"] == "positive"
+    assert result["mood"] == "celebrating"
+    assert result["energy"] == 2
+
+
+def test_result_shape_for_neutral_text():
+    result = analyze_sentiment("")
+    assert result == {
+        "sentiment": "neutral",
+        "mood": "idle",
+        "energy": 1,
+        "scores": {sentiment: 0 for sentiment in SENTIMENT_KEYWORDS},
+    }
+
+
+def test_energy_is_capped():
+    assert analyze_sentiment("great awesome love amazing happy excited")["energy"] == 5
+
+
+def test_every_keyword_is_compiled():
+    assert len(KEYWORD_TABLE) == sum(len(words) for words in SENTIMENT_KEYWORDS.values())
+    for sentiment, words in SENTIMENT_KEYWORDS.items():
+        for keyword in words:
+            assert keyword in match_keywords(f"well {keyword} then")
+            assert KEYWORD_TABLE[keyword] == sentiment
+
+
+@pytest.mark.parametrize("keywords", [
+    {"positive": ["very good job"]},
+    {"positive": ["good"], "negative": ["good"]},
+    {"positive": ["good!"]},
+])
+def test_unsupported_keywords_are_rejected(keywords):
+    with pytest.raises(ValueError):
+        compile_keywords(keywords)
+
+
+def test_analyze_many_keeps_order():
+    texts = ["hi coach", "I want to give up", "show me"]
+    assert [r["sentiment"] for r in analyze_many(texts)] == ["greeting", "negative", "neutral"]
+
+
+def test_backfill_messages_scores_only_unscored_messages():
+    messages = [
+        {"_id": 1, "content": "so tired and sore"},
+        {"_id": 2, "content": "great!", "sentiment": "positive", "mood": "celebrating", "energy": 1},
+    ]
+    writes = backfill_messages(messages)
+    assert len(writes) == 1
+    assert messages[0] == {"content": "so tired and sore", "sentiment": "negative", "mood": "encouraging", "energy": 2}
+    assert "_id" not in messages[1]
@@ -0,0 +1,45 @@
+import pytest
+
+RECORDED = "2026-03-01T08:00:00+00:00"
+
+ITEMS = {
+    "water": ("/api/water/log", {"amount_ml": 250}),
+    "food": ("/api/food/log", {"food_name": "Oats", "calories": 300, "protein": 10, "carbs": 50, "fat": 6,
+                               "meal_type": "breakfast"}),
+    "workout": ("/api/workout/log", {"exercise_name": "Run", "sets": 1, "reps": 1, "duration_minutes": 30}),
+}
+
+
+def sync(api, auth, log_type):
+    response = api.post("/api/sync", headers=auth, json={"items": [
+        {"type": log_type, "idempotency_key": f"device-1:{log_type}", "data": ITEMS[log_type][1], "timestamp": RECORDED},
+    ]})
+    assert response.status_code == 200, response.text
+    assert response.json()["created"] == 1
+
+
+def test_synced_water_logs_do_not_expose_the_idempotency_key(api, auth):
+    sync(api, auth, "water")
+
+    day = api.get("/api/water/log", headers=auth, params={"date": "2026-03-01"})
+    assert day.status_code == 200
+    body = day.json()
+    assert body["total_ml"] == 250
+    assert len(body["logs"]) == 1
+    assert "idempotency_key" not in body["logs"][0]
+    assert "idempotency_key" not in day.text
+
+    ranged = api.get("/api/water/log", headers=auth, params={"from": "2026-03-01", "to": "2026-03-01"})
+    assert ranged.status_code == 200
+    [group] = ranged.json()["days"]
+    assert group["totals"] == {"count": 1, "amount_ml": 250}
+    assert "idempotency_key" not in ranged.text
+
+
+@pytest.mark.parametrize("log_type", ["food", "workout"])
+def test_synced_logs_do_not_expose_the_idempotency_key(api, auth, log_type):
+    sync(api, auth, log_type)
+    for params in ({}, {"from": "2026-03-01", "to": "2026-03-01"}, {"format": "ndjson"}):
+        response = api.get(ITEMS[log_type][0], headers=auth, params=params)
+        assert response.status_code == 200
+        assert "device-1" not in response.text
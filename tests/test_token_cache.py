@@ -0,0 +1,83 @@
+import pytest
+
+import token_cache as token_cache_module
+from token_cache import TokenCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_key_is_a_digest_not_the_token():
+    key = TokenCache.key("header.payload.signature")
+    assert len(key) == 32
+    assert b"payload" not in key
+    assert key == TokenCache.key("header.payload.signature")
+
+
+def test_hit_and_miss_counters(clock):
+    cache = TokenCache(max_entries=10)
+    key = cache.key("t1")
+    assert cache.get(key) is None
+    cache.put(key, "user-1", exp=2000)
+    assert cache.get(key) == "user-1"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_with_the_token(clock):
+    cache = TokenCache(max_entries=10)
+    cache.put(cache.key("t1"), "user-1", exp=1010)
+    clock[0] = 1010
+    assert cache.get(cache.key("t1")) is None
+    assert len(cache) == 0
+
+
+def test_expired_entries_are_purged_on_put(clock):
+    cache = TokenCache(max_entries=10)
+    cache.put(cache.key("old"), "user-1", exp=1010)
+    clock[0] = 1020
+    cache.put(cache.key("new"), "user-2", exp=2000)
+    assert len(cache) == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TokenCache(max_entries=2)
+    for token in ("a", "b"):
+        cache.put(cache.key(token), token, exp=2000)
+    cache.get(cache.key("a"))
+    cache.put(cache.key("c"), "c", exp=2000)
+    assert cache.get(cache.key("b")) is None
+    assert cache.get(cache.key("a")) == "a"
+    assert cache.get(cache.key("c")) == "c"
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = TokenCache(max_entries=0)
+    cache.put(cache.key("a"), "a", exp=2000)
+    assert len(cache) == 0
+
+
+def test_revoked_token_is_dropped_and_never_recached(clock):
+    cache = TokenCache(max_entries=10)
+    key = cache.key("t1")
+    cache.put(key, "user-1", exp=1500)
+    cache.revoke("t1", exp=9999)
+    assert cache.is_revoked(key)
+    assert cache.get(key) is None
+    cache.put(key, "user-1", exp=1500)
+    assert cache.get(key) is None
+
+
+def test_revocation_is_kept_until_the_token_expires(clock):
+    cache = TokenCache(max_entries=10)
+    key = cache.key("t1")
+    cache.put(key, "user-1", exp=1500)
+    cache.revoke("t1", exp=9999)
+    clock[0] = 1501
+    cache.put(cache.key("other"), "user-2", exp=2000)
+    assert not cache.is_revoked(key)
+    assert cache.stats()["revoked"] == 0
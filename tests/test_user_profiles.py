@@ -0,0 +1,20 @@
+from user_profiles import public_profile
+
+
+def test_public_profile_drops_internal_fields():
+    profile = {"id": "u1", "name": "Sam", "cache_version": 4}
+    assert public_profile(profile) == {"id": "u1", "name": "Sam"}
+    assert profile["cache_version"] == 4
+
+
+def test_profile_body_hides_the_cache_version(api, auth):
+    first = api.get("/api/profile", headers=auth)
+    assert first.status_code == 200
+    assert "cache_version" not in first.json() and "password" not in first.json()
+
+    assert api.put("/api/profile", headers=auth, json={"current_weight": 79}).status_code == 200
+    second = api.get("/api/profile", headers=auth)
+    assert second.json()["current_weight"] == 79
+    assert "cache_version" not in second.json()
+    # The version still drives revalidation
+    assert second.headers["etag"] != first.headers["etag"]
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from workout_library import WorkoutCatalog, load_file
+
+ENTRIES = [
+    {"id": "1", "title": "Leg Day Power", "description": "Strong legs", "muscle_group": "legs",
+     "difficulty": "intermediate", "equipment": "barbell"},
+    {"id": "2", "title": "Yoga Flow", "description": "Stretch and recover", "muscle_group": "mobility",
+     "difficulty": "beginner", "equipment": "mat"},
+    {"id": "3", "title": "Bodyweight Legs", "description": "No equipment leg burner", "muscle_group": "legs",
+     "difficulty": "beginner", "equipment": "none"},
+]
+
+
+@pytest.fixture
+def catalog():
+    return WorkoutCatalog(ENTRIES)
+
+
+def ids(catalog, positions):
+    return [catalog.entries[p]["id"] for p in positions]
+
+
+def test_no_filters_returns_everything_in_order(catalog):
+    assert ids(catalog, catalog.search()) == ["1", "2", "3"]
+    assert ids(catalog, catalog.search(muscle_group=None, difficulty="")) == ["1", "2", "3"]
+
+
+def test_filters_intersect(catalog):
+    assert ids(catalog, catalog.search(muscle_group="legs")) == ["1", "3"]
+    assert ids(catalog, catalog.search(muscle_group="legs", difficulty="beginner")) == ["3"]
+    assert catalog.search(muscle_group="legs", equipment="mat") == []
+    assert catalog.search(muscle_group="arms") == []
+
+
+def test_text_search_prefix_matches_every_word(catalog):
+    assert ids(catalog, catalog.search(q="leg")) == ["1", "3"]
+    assert ids(catalog, catalog.search(q="LEG burn")) == ["3"]
+    assert ids(catalog, catalog.search(q="stretch", difficulty="beginner")) == ["2"]
+    assert catalog.search(q="pilates") == []
+
+
+def test_limit(catalog):
+    assert ids(catalog, catalog.search(limit=2)) == ["1", "2"]
+    assert ids(catalog, catalog.search(muscle_group="legs", limit=1)) == ["1"]
+
+
+def test_unknown_filter_is_rejected(catalog):
+    with pytest.raises(ValueError):
+        catalog.search(title="Yoga Flow")
+
+
+def test_render_is_a_json_array_of_the_entries(catalog):
+    assert json.loads(catalog.render(catalog.search(muscle_group="legs"))) == [ENTRIES[0], ENTRIES[2]]
+    assert catalog.render([]) == b"[]"
+
+
+def test_version_tracks_content(catalog):
+    assert catalog.version == WorkoutCatalog(ENTRIES).version
+    changed = [dict(ENTRIES[0], title="Leg Day"), *ENTRIES[1:]]
+    assert WorkoutCatalog(changed).version != catalog.version
+
+
+def test_bundled_library_loads():
+    catalog = WorkoutCatalog(load_file())
+    assert len(catalog) >= 6
+    assert "legs" in catalog.values("muscle_group")